@@ -3,7 +3,10 @@
 Constants and Utility classes
 """
 
-from django.core.mail import send_mail
+import time
+
+from django.core.mail import send_mail, get_connection
+from django.core.mail import EmailMultiAlternatives
 from django.core.urlresolvers import reverse
 from django.template import loader, Context
 
@@ -85,6 +88,119 @@ class EmailController():
         context = Context(context_params)
         return template.render(context)
 
+    # stands in for the recipients' manage_subscriptions_link in emails
+    # rendered once for many of them
+    LINK_PLACEHOLDER = u'%%MANAGE_SUBSCRIPTIONS_LINK%%'
+
+    @classmethod
+    def send_bulk(cls, groups, batch_size=None, rate_limit=None,
+                  retries=None, retry_delay=None, connection=None):
+        """
+        Sends the email to many recipients: groups is a list of
+        (recipients, context_params) tuples, the email is rendered once per
+        group. The recipients' users are fetched in one query; the emails
+        are sent in batches of batch_size over one connection, with at most
+        rate_limit emails per second (if set). Emails that can't be sent
+        are retried up to retries times, retry_delay seconds apart.
+        Like send_mass_mail, a connection can be passed in.
+
+        The defaults are the SUBSCRIPTION_EMAIL_* settings. Returns the
+        number of emails sent.
+        """
+        if batch_size is None:
+            batch_size = settings.SUBSCRIPTION_EMAIL_BATCH_SIZE
+        if rate_limit is None:
+            rate_limit = settings.SUBSCRIPTION_EMAIL_RATE_LIMIT
+        if retries is None:
+            retries = settings.SUBSCRIPTION_EMAIL_RETRIES
+        if retry_delay is None:
+            retry_delay = settings.SUBSCRIPTION_EMAIL_RETRY_DELAY
+
+        emails = [recipient for recipients, _ in groups
+                  for recipient in recipients]
+        users = dict(
+            (user.email, user) for user in User.objects
+            .select_related('verification').filter(email__in=emails))
+
+        template = loader.get_template(cls.template_file)
+        messages = []
+        for recipients, context_params in groups:
+            context_params = dict(
+                context_params, manage_subscriptions_link=cls.LINK_PLACEHOLDER)
+            rendered_mail = template.render(Context(context_params))
+            rendered_text_mail = html2text.html2text(rendered_mail)
+            for recipient in recipients:
+                user = users.get(recipient)
+                if user is None or user.verification is None:
+                    cls.logger.warning(
+                        u"No verified user for {}, skipping".format(recipient))
+                    continue
+                link = reverse(
+                    'subscriptions_login2',
+                    kwargs={
+                        'email': recipient,
+                        'key': user.verification.verification_hash}
+                )
+                message = EmailMultiAlternatives(
+                    cls.subject,
+                    rendered_text_mail.replace(cls.LINK_PLACEHOLDER, link),
+                    cls.sender,
+                    [recipient],
+                )
+                message.attach_alternative(
+                    rendered_mail.replace(cls.LINK_PLACEHOLDER, link),
+                    'text/html')
+                messages.append(message)
+
+        sent = 0
+        connection = connection or get_connection(fail_silently=False)
+        try:
+            # opened here, the connection is kept open between messages
+            connection.open()
+            for start in range(0, len(messages), batch_size):
+                started = time.time()
+                batch = messages[start:start + batch_size]
+                batch_sent = 0
+                for message in batch:
+                    if cls._send_message(
+                            connection, message, retries, retry_delay):
+                        batch_sent += 1
+                if rate_limit:
+                    # wait for the batch's share of the rate limit
+                    time.sleep(max(
+                        0, len(batch) / float(rate_limit) -
+                        (time.time() - started)))
+                sent += batch_sent
+                elapsed = time.time() - started
+                cls.logger.info(
+                    u"Sent batch of {} emails ({} failed) in {:.1f}s, {} of "
+                    u"{} sent".format(
+                        len(batch), len(batch) - batch_sent, elapsed, sent,
+                        len(messages)))
+        finally:
+            connection.close()
+        return sent
+
+    @classmethod
+    def _send_message(cls, connection, message, retries, retry_delay):
+        for attempt in range(retries + 1):
+            try:
+                connection.send_messages([message])
+                return True
+            except Exception as e:
+                cls.logger.warning(u"Error sending email to {} (attempt {}): "
+                                   u"{}".format(message.to[0], attempt + 1, e))
+                if attempt < retries:
+                    # start over with a fresh connection
+                    time.sleep(retry_delay)
+                    try:
+                        connection.close()
+                        connection.open()
+                    except Exception as e:
+                        cls.logger.warning(
+                            u"Error reconnecting: {}".format(e))
+        return False
+
 
 class EMAIL:
     class VERIFY_SUBSCRIPTION(EmailController):
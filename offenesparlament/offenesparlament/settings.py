@@ -29,6 +29,22 @@ class BaseConfig(Configuration):
     STATICFILES_DIRS = (os.path.join(PROJECT_PATH, 'static'), )
     DEBUG_SUBSCRIPTIONS = True
     OUTPUT_SUBSCRIPTIONS = True
+    # subscriptions checked (i.e. searched in elasticsearch) in parallel
+    SUBSCRIPTION_WORKERS = 4
+    # subscription emails: sent in batches over one connection, with at
+    # most SUBSCRIPTION_EMAIL_RATE_LIMIT per second (None: unlimited) and
+    # up to SUBSCRIPTION_EMAIL_RETRIES retries per email
+    SUBSCRIPTION_EMAIL_BATCH_SIZE = 100
+    SUBSCRIPTION_EMAIL_RATE_LIMIT = None
+    SUBSCRIPTION_EMAIL_RETRIES = 3
+    SUBSCRIPTION_EMAIL_RETRY_DELAY = 10
+    # search responses are cached until the next index update (cf.
+    # op_scraper.index_queue): 'local' for an in-process LRU cache of
+    # SEARCH_CACHE_SIZE responses, a CACHES alias for a shared cache, or
+    # None to disable caching
+    SEARCH_CACHE = 'local'
+    SEARCH_CACHE_SIZE = 1000
+    SEARCH_CACHE_TIMEOUT = 60 * 60
     BLEACH_ALLOWED_TAGS = ['h2', 'h3', 'p', 'b', 'i', 'strong', 'a']
     BLEACH_ALLOWED_ATTRIBUTES = ['href', 'title', 'style']
     BLEACH_ALLOWED_STYLES = []
@@ -54,8 +70,10 @@ class BaseConfig(Configuration):
         'django.contrib.sessions',
         'django.contrib.messages',
         'django.contrib.staticfiles',
-        'haystack',
+        # before haystack: op_scraper's update_index and clear_index
+        # override haystack's management commands
         'op_scraper',
+        'haystack',
         'annoying',
         'django_extensions',
         'django_bootstrap_breadcrumbs',
@@ -103,7 +121,8 @@ class BaseConfig(Configuration):
             'EXCLUDED_INDEXES': [
                 'op_scraper.search_indexes.PersonIndex',
                 'op_scraper.search_indexes.LawIndex',
-                'op_scraper.search_indexes.DebateIndex'
+                'op_scraper.search_indexes.DebateIndex',
+                'op_scraper.search_indexes.DebateStatementIndex'
             ]
         },
     }
@@ -289,6 +308,8 @@ class Dev(BaseConfig):
 
 class UnitTest(Dev):
     EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    # the tests index objects without bumping the index generation
+    SEARCH_CACHE = None
 
     STATIC_ROOT = os.path.join(PROJECT_PATH, 'static')
 
@@ -360,7 +381,8 @@ class UnitTest(Dev):
             'EXCLUDED_INDEXES': [
                 'op_scraper.search_indexes.PersonIndex',
                 'op_scraper.search_indexes.LawIndex',
-                'op_scraper.search_indexes.DebateIndex'
+                'op_scraper.search_indexes.DebateIndex',
+                'op_scraper.search_indexes.DebateStatementIndex'
             ]
         },
     }
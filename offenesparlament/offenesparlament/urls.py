@@ -53,13 +53,16 @@ urlpatterns = patterns(
 
     # Search Urls
     url(r'^search/?$',
-        search.JsonSearchView.as_view()),
+        search.JsonSearchView.as_view(), name='search'),
     url(r'^personen/search/?$',
-        search.PersonSearchView.as_view(search_model=Person)),
+        search.PersonSearchView.as_view(search_model=Person),
+        name='person_search'),
     url(r'^gesetze/search/?$',
-        search.LawSearchView.as_view(search_model=Law)),
+        search.LawSearchView.as_view(search_model=Law),
+        name='law_search'),
     url(r'^debatten/search/?$',
-        search.DebateSearchView.as_view(search_model=Debate)),
+        search.DebateSearchView.as_view(search_model=Debate),
+        name='debate_search'),
 
     # Subscription URLS
 
@@ -130,6 +133,8 @@ urlpatterns = patterns(
         admin_views.trigger_scrape, name='scrape_llp'),
     url(r'^admin/elastic/update',
         admin_views.trigger_reindex, name='update_index'),
+    url(r'^admin/search/cache',
+        search.search_cache_stats, name='search_cache_stats'),
     url(r'^admin/', include(admin.site.urls)),
 )
 
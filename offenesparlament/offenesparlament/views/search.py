@@ -1,11 +1,22 @@
+import time
 import datetime
 import json
+import hashlib
+import urlparse
+import threading
+import collections
 from haystack.generic_views import SearchView
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, QueryDict
+from django.core.urlresolvers import resolve
 
-from haystack.query import SearchQuerySet
+from haystack.inputs import AutoQuery
+from haystack.query import SearchQuerySet, SQ
 
-from op_scraper.models import Person, Law, Debate
+from op_scraper.models import Person, Law, Debate, DebateStatement
+from op_scraper.index_queue import index_generation
 from offenesparlament.constants import ES_DEFAULT_LIMIT
 
 # import the logging library
@@ -24,6 +35,109 @@ class QuerySetEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 
+class LocalSearchCache(object):
+
+    """
+    An in-process LRU cache, evicting the least recently used entries once
+    it holds more than size of them
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                return None
+            # re-insert as the most recently used entry
+            self.entries[key] = entry
+            return value
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (time.time() + timeout, value)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SearchCache(object):
+
+    """
+    Caches search responses, keyed by view, index generation and normalized
+    query arguments; counts hits and misses (per process)
+    """
+
+    def __init__(self, backend, timeout):
+        self.backend = backend
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, view, query_args):
+        key = json.dumps(
+            [type(view).__name__, index_generation(),
+             normalize_query_args(query_args)],
+            sort_keys=True)
+        return 'search:' + hashlib.md5(key).hexdigest()
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value, self.timeout)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {
+            'backend': settings.SEARCH_CACHE,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': float(self.hits) / lookups if lookups else None,
+            'generation': index_generation(),
+        }
+        if isinstance(self.backend, LocalSearchCache):
+            stats['size'] = len(self.backend)
+        return stats
+
+
+_search_caches = {}
+
+
+def get_search_cache():
+    """
+    Returns the search response cache configured by SEARCH_CACHE: 'local'
+    for an in-process LRU cache of SEARCH_CACHE_SIZE responses, or the
+    alias of a (shared) cache in CACHES. None if caching is disabled.
+    """
+    config = (settings.SEARCH_CACHE, settings.SEARCH_CACHE_SIZE,
+              settings.SEARCH_CACHE_TIMEOUT)
+    if not settings.SEARCH_CACHE:
+        return None
+    if config not in _search_caches:
+        if settings.SEARCH_CACHE == 'local':
+            backend = LocalSearchCache(settings.SEARCH_CACHE_SIZE)
+        else:
+            backend = caches[settings.SEARCH_CACHE]
+        _search_caches[config] = SearchCache(
+            backend, settings.SEARCH_CACHE_TIMEOUT)
+    return _search_caches[config]
+
+
 class JsonSearchView(SearchView):
 
     """Base SearchView that returns json-data"""
@@ -38,56 +152,56 @@ class JsonSearchView(SearchView):
         if search_model:
             self.search_model = search_model
 
-    def extract_query_args(self, request):
+    def extract_query_args(self, params):
         """
-        Extract the query arguments from request.GET
+        Extract the query arguments from the GET parameters
         """
         query_args = {
             'facet_filters': {}
         }
 
-        if 'fieldset' in request.GET:
-            query_args['fieldset'] = request.GET['fieldset']
+        if 'fieldset' in params:
+            query_args['fieldset'] = params['fieldset']
 
-        if 'only_facets' in request.GET:
+        if 'only_facets' in params:
             query_args['only_facets'] = True
 
         for facet_field in self.facet_fields:
-            if facet_field in request.GET and request.GET[facet_field]:
+            if facet_field in params and params[facet_field]:
                 query_args['facet_filters'][
-                    facet_field] = request.GET[facet_field]
+                    facet_field] = params[facet_field]
 
         # Do we have a query or are we just getting all of them?
-        if 'q' in request.GET and request.GET['q']:
-            query_args['q'] = request.GET['q']
+        if 'q' in params and params['q']:
+            query_args['q'] = params['q']
         # Do we want a single item (parl_id, parl_id + llp)?
-        elif 'parl_id' in request.GET and request.GET['parl_id']:
-            query_args['parl_id'] = request.GET['parl_id']
-            if 'llp_numeric' in request.GET and request.GET['llp_numeric']:
-                query_args['llp_numeric'] = request.GET['llp_numeric']
+        elif 'parl_id' in params and params['parl_id']:
+            query_args['parl_id'] = params['parl_id']
+            if 'llp_numeric' in params and params['llp_numeric']:
+                query_args['llp_numeric'] = params['llp_numeric']
             # In case of a single item, return immediately and ignore all other
             # parameters
             return query_args
 
         query_args['offset'] = 0
-        if 'offset' in request.GET and request.GET['offset']:
+        if 'offset' in params and params['offset']:
             try:
-                query_args['offset'] = int(request.GET['offset'])
+                query_args['offset'] = int(params['offset'])
             except ValueError:
                 logging.warn(
                     "Illegal query argument received: offset={}".format(
-                        request.GET['offset']))
+                        params['offset']))
                 pass
 
-        if 'limit' in request.GET and request.GET['limit']:
+        if 'limit' in params and params['limit']:
             try:
-                limit = int(request.GET['limit'])
+                limit = int(params['limit'])
                 if limit > 0:
                     query_args['limit'] = limit
             except ValueError:
                 logging.warn(
                     "Illegal query argument received: limit={}".format(
-                        request.GET['limit']))
+                        params['limit']))
                 pass
         else:
             query_args['limit'] = ES_DEFAULT_LIMIT
@@ -95,12 +209,39 @@ class JsonSearchView(SearchView):
         return query_args
 
     def get(self, request, *args, **kwargs):
-        query_args = self.extract_query_args(request)
+        query_args = self.extract_query_args(request.GET)
+
+        # responses are cached until the next index update
+        cache = get_search_cache()
+        if cache is not None:
+            key = cache.key(self, query_args)
+            json_result = cache.get(key)
+            if json_result is not None:
+                response = HttpResponse(
+                    json_result, content_type='application/json')
+                response['X-Search-Cache'] = 'hit'
+                return response
+
         logger.info("Searching {} with arguments {}".format(
             self.search_model, [query_args]))
 
+        json_result = json.dumps(self.search(query_args), cls=QuerySetEncoder)
+
+        response = HttpResponse(json_result, content_type='application/json')
+        if cache is not None:
+            cache.set(key, json_result)
+            response['X-Search-Cache'] = 'miss'
+        return response
+
+    def search(self, query_args, with_stats=True):
+        """
+        Runs the search, returns the response data: the results, stats and
+        facets
+        """
         (result, facet_counts) = self.get_queryset(query_args)
-        stats = {'num_results': result.count() if result else None}
+        stats = {}
+        if with_stats:
+            stats['num_results'] = result.count() if result else None
         # don't limit/offset empty results when we only return facets
         if 'only_facets' not in query_args:
             if 'limit' in query_args and query_args['limit']:
@@ -130,9 +271,7 @@ class JsonSearchView(SearchView):
         if facet_counts:
             result['facets'] = facet_counts
 
-        json_result = json.dumps(result, cls=QuerySetEncoder)
-
-        return HttpResponse(json_result, content_type='application/json')
+        return result
 
     def build_result_set(self, result, set_name='list'):
 
@@ -156,6 +295,9 @@ class JsonSearchView(SearchView):
         # parameter set in View instantiation)
         if self.search_model is not None:
             qs = qs.models(self.search_model)
+        else:
+            # debate statements are only found through their debates
+            qs = qs.models(Person, Law, Debate)
 
         # Do we have a query or are we just getting all of them?
         if 'q' in query_args:
@@ -166,7 +308,7 @@ class JsonSearchView(SearchView):
             # fuzzify search
             # qry = u'{}~'.format(qry.replace(' ', '~ '))
 
-            qs = qs.auto_query(qry)
+            qs = self.filter_query(qs, qry)
         elif 'parl_id' in query_args:
             qs = qs.filter(parl_id=query_args['parl_id'])
             if 'llp_numeric' in query_args:
@@ -211,6 +353,12 @@ class JsonSearchView(SearchView):
 
         return (result, facet_counts)
 
+    def filter_query(self, qs, qry):
+        """
+        Restricts the queryset to the results matching the query string
+        """
+        return qs.auto_query(qry)
+
     def get_context_data(self, *args, **kwargs):
         context = super(JsonSearchView, self).get_context_data(*args, **kwargs)
         # do something
@@ -255,3 +403,130 @@ class DebateSearchView(JsonSearchView):
         'debate_type': {'type': 'field'},
         'date': {'type': 'date'}
     }
+
+    # maximum number of debates found through their statements; debates
+    # beyond it (the ones with the fewest matching statements) are only
+    # found through their own fields, which is flagged in the stats
+    STATEMENT_DEBATES_LIMIT = 500
+
+    def __init__(self, search_model=None):
+        super(DebateSearchView, self).__init__(search_model)
+        self.statement_hits = {}
+        self.statement_hits_truncated = False
+
+    def search(self, query_args, with_stats=True):
+        result = super(DebateSearchView, self).search(query_args, with_stats)
+        if with_stats:
+            result['stats']['statement_hits_truncated'] = \
+                self.statement_hits_truncated
+        return result
+
+    def filter_query(self, qs, qry):
+        """
+        The statements are indexed separately; debates match if their own
+        fields or any of their statements match the query
+        """
+        self.statement_hits = self.get_statement_hits(qry)
+        matches = SQ(content=AutoQuery(qry))
+        if self.statement_hits:
+            matches = matches | SQ(django_id__in=self.statement_hits.keys())
+        return qs.filter(matches)
+
+    def get_statement_hits(self, qry):
+        """
+        Returns the number of matching statements by debate id, aggregated
+        by a facet on the statements' debate field. One more debate than
+        the limit is requested to tell whether the facet was truncated.
+        """
+        facets = SearchQuerySet().models(DebateStatement)\
+            .auto_query(qry)\
+            .facet('debate', size=self.STATEMENT_DEBATES_LIMIT + 1)\
+            .facet_counts()
+        counts = facets.get('fields', {}).get('debate', [])
+        self.statement_hits_truncated = \
+            len(counts) > self.STATEMENT_DEBATES_LIMIT
+        if self.statement_hits_truncated:
+            logger.warning(
+                u"Statements of more than {} debates match '{}', "
+                u"ignoring the rest".format(
+                    self.STATEMENT_DEBATES_LIMIT, qry))
+            counts = counts[:self.STATEMENT_DEBATES_LIMIT]
+        return dict((unicode(debate), count) for debate, count in counts)
+
+    def build_result_set(self, result, set_name='list'):
+        result_list = super(DebateSearchView, self).build_result_set(
+            result, set_name)
+        if self.statement_hits:
+            for sr, entry in zip(result, result_list):
+                entry['statement_hits'] = self.statement_hits.get(sr.pk, 0)
+        return result_list
+
+
+# search views by url name, cf. offenesparlament/urls.py
+SEARCH_VIEWS = {
+    'search': JsonSearchView,
+    'person_search': PersonSearchView,
+    'law_search': LawSearchView,
+    'debate_search': DebateSearchView,
+}
+
+
+def json_compatible(value):
+    """
+    Returns value as it would come out of a json response: dates and
+    datetimes become iso-formatted strings, tuples become lists
+    """
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [json_compatible(v) for v in value]
+    if isinstance(value, dict):
+        return dict((k, json_compatible(v)) for k, v in value.items())
+    return value
+
+
+def search_url(url):
+    """
+    Runs the search of a search view's url (for instance, a subscription's)
+    in process and returns the results like the view's json response
+    would, without the stats.
+    """
+    parsed = urlparse.urlparse(url)
+    view = SEARCH_VIEWS[resolve(parsed.path).url_name]()
+    query_args = view.extract_query_args(QueryDict(parsed.query))
+    result = view.search(query_args, with_stats=False)
+    return json_compatible(result['result'])
+
+
+def normalize_query_args(query_args):
+    """
+    Returns a copy of query_args with the query's whitespace normalized
+    """
+    query_args = dict(query_args)
+    if 'q' in query_args:
+        query_args['q'] = u' '.join(query_args['q'].split())
+    return query_args
+
+
+def search_key(url):
+    """
+    Returns a key identifying the search of a search view's url: the view
+    and the query arguments it extracts, regardless of the parameters'
+    order, of parameters the view ignores and of whitespace in the query
+    """
+    parsed = urlparse.urlparse(url)
+    url_name = resolve(parsed.path).url_name
+    query_args = SEARCH_VIEWS[url_name]().extract_query_args(
+        QueryDict(parsed.query))
+    return json.dumps(
+        [url_name, normalize_query_args(query_args)], sort_keys=True)
+
+
+@staff_member_required
+def search_cache_stats(request):
+    """
+    The search response cache's hits and misses in this process
+    """
+    cache = get_search_cache()
+    stats = cache.stats() if cache is not None else {'backend': None}
+    return HttpResponse(json.dumps(stats), content_type='application/json')
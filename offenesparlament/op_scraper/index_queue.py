@@ -0,0 +1,184 @@
+# -*- coding: UTF-8 -*-
+"""
+Incremental search index updates
+
+The spiders record the objects they touch with mark_dirty; every object is
+translated into the indexed objects whose documents contain its data (a
+step dirties its law, a debate statement its speaker, ...).
+These are kept in the database (DirtyObject) until process_index_queue
+reindexes them in batches.
+
+Every index update bumps the index generation (IndexGeneration), which
+invalidates the cached search responses (cf. offenesparlament.views.search).
+"""
+import collections
+
+import haystack
+from django.apps import apps
+from django.db import transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from op_scraper.models import Law, Person, Debate, Step, Statement
+from op_scraper.models import DebateStatement, Mandate, Opinion
+from op_scraper.models import Inquiry, InquiryResponse
+from op_scraper.models import Comittee, ComitteeMembership
+from op_scraper.models import DirtyObject, IndexGeneration
+
+import logging
+logger = logging.getLogger(__name__)
+
+LAW = 'op_scraper.law'
+PERSON = 'op_scraper.person'
+DEBATE = 'op_scraper.debate'
+DEBATE_STATEMENT = 'op_scraper.debatestatement'
+
+# number of primary keys per query
+CHUNK_SIZE = 500
+
+
+def index_targets(obj):
+    """
+    Returns the (model label, primary key) pairs of the indexed objects
+    whose documents depend on obj
+    """
+    targets = set()
+    if isinstance(obj, Law):
+        # inquiries, responses and petitions are indexed as laws
+        targets.add((LAW, obj.pk))
+        if isinstance(obj, Inquiry):
+            targets.add((PERSON, obj.receiver_id))
+            if obj.pk is not None:
+                targets.update(
+                    (PERSON, pk)
+                    for pk in obj.sender.values_list('pk', flat=True))
+        elif isinstance(obj, InquiryResponse):
+            targets.add((PERSON, obj.sender_id))
+    elif isinstance(obj, Person):
+        targets.add((PERSON, obj.pk))
+    elif isinstance(obj, Debate):
+        targets.add((DEBATE, obj.pk))
+        # the statement documents carry the debate's metadata
+        if obj.pk is not None:
+            targets.update(
+                (DEBATE_STATEMENT, pk) for pk in obj.debate_statements
+                .values_list('pk', flat=True))
+    elif isinstance(obj, Step):
+        targets.add((LAW, obj.law_id))
+    elif isinstance(obj, Statement):
+        targets.add((PERSON, obj.person_id))
+    elif isinstance(obj, DebateStatement):
+        targets.add((PERSON, obj.person_id))
+        targets.add((DEBATE_STATEMENT, obj.pk))
+    elif isinstance(obj, Opinion):
+        targets.add((LAW, obj.prelaw_id))
+    elif isinstance(obj, (Mandate, ComitteeMembership)):
+        targets.add((PERSON, obj.person_id))
+    elif isinstance(obj, Comittee):
+        if obj.pk is not None:
+            targets.update(
+                (PERSON, pk) for pk in obj.comittee_members
+                .values_list('person_id', flat=True))
+    return set((label, pk) for label, pk in targets if pk is not None)
+
+
+def mark_dirty(targets):
+    """
+    Adds (model label, primary key) pairs to the queue, or marks them as
+    changed again if they're already queued
+    """
+    now = timezone.now()
+    by_model = collections.defaultdict(set)
+    for label, pk in targets:
+        by_model[label].add(unicode(pk))
+
+    for label, pks in by_model.items():
+        pks = sorted(pks)
+        for start in range(0, len(pks), CHUNK_SIZE):
+            chunk = pks[start:start + CHUNK_SIZE]
+            queued = DirtyObject.objects.filter(model=label, object_pk__in=chunk)
+            # read after the update, so entries the queue removed before it
+            # are inserted again; entries it removes later were reindexed
+            # after this update marked them
+            queued.update(marked=now)
+            existing = set(queued.values_list('object_pk', flat=True))
+            missing = [pk for pk in chunk if pk not in existing]
+            try:
+                with transaction.atomic():
+                    DirtyObject.objects.bulk_create([
+                        DirtyObject(model=label, object_pk=pk, marked=now)
+                        for pk in missing])
+            except IntegrityError:
+                # queued concurrently (e.g. by another spider), one by one
+                for pk in missing:
+                    _queue(label, pk, now)
+
+
+def _queue(label, pk, now):
+    """
+    Adds a single entry to the queue or marks it again, whichever works
+    """
+    while True:
+        try:
+            with transaction.atomic():
+                DirtyObject.objects.create(
+                    model=label, object_pk=pk, marked=now)
+            return
+        except IntegrityError:
+            if DirtyObject.objects.filter(
+                    model=label, object_pk=pk).update(marked=now):
+                return
+
+
+def process_index_queue(batch_size=100, using='default'):
+    """
+    Reindexes the queued objects in batches (objects that no longer exist
+    are removed from the index), returns the number of processed entries
+    """
+    backend = haystack.connections[using].get_backend()
+    unified_index = haystack.connections[using].get_unified_index()
+    processed = 0
+    while True:
+        started = timezone.now()
+        entries = list(DirtyObject.objects.order_by('marked')[:batch_size])
+        if not entries:
+            break
+
+        by_model = collections.defaultdict(set)
+        for entry in entries:
+            by_model[entry.model].add(entry.object_pk)
+        for label, pks in by_model.items():
+            index = unified_index.get_index(apps.get_model(label))
+            objs = list(index.index_queryset(using=using).filter(pk__in=pks))
+            backend.update(index, objs, commit=False)
+            for pk in pks - set(unicode(obj.pk) for obj in objs):
+                backend.remove(u'{}.{}'.format(label, pk), commit=False)
+
+        # entries marked again while they were indexed stay queued
+        DirtyObject.objects.filter(
+            pk__in=[entry.pk for entry in entries],
+            marked__lte=started).delete()
+        processed += len(entries)
+        logger.info(u"Reindexed {} queued objects".format(processed))
+    if processed:
+        bump_index_generation()
+    return processed
+
+
+def index_generation():
+    """
+    Returns the current generation of the search index
+    """
+    generation = IndexGeneration.objects.values_list(
+        'generation', flat=True).first()
+    return generation or 0
+
+
+def bump_index_generation():
+    """
+    Marks the search index as updated; call after every index update
+    """
+    # update() skips auto_now fields
+    if not IndexGeneration.objects.update(
+            generation=F('generation') + 1, updated=timezone.now()):
+        IndexGeneration.objects.create(generation=1)
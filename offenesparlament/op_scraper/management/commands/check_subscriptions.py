@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from op_scraper.subscriptions import check_subscriptions
 
@@ -5,5 +6,16 @@ from op_scraper.subscriptions import check_subscriptions
 class Command(BaseCommand):
     help = 'Checks subscriptions for updates and sends emails'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.SUBSCRIPTION_WORKERS,
+            help='Subscriptions checked in parallel (default: {})'.format(
+                settings.SUBSCRIPTION_WORKERS))
+        parser.add_argument(
+            '--progress-every', type=int, default=100,
+            help='Log the progress every n subscriptions (default: 100)')
+
     def handle(self, *args, **options):
-        check_subscriptions()
+        check_subscriptions(
+            workers=options['workers'],
+            progress_every=options['progress_every'])
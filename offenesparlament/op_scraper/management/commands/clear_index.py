@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+from haystack.management.commands import clear_index
+
+from op_scraper.index_queue import bump_index_generation
+
+
+class Command(clear_index.Command):
+    help = clear_index.Command.help + \
+        ' Bumps the index generation, invalidating cached search responses.'
+
+    def handle(self, **options):
+        result = super(Command, self).handle(**options)
+        bump_index_generation()
+        return result
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+import time
+import datetime
+import multiprocessing
+
+import haystack
+from haystack.constants import ID
+from elasticsearch import helpers
+
+from django.apps import apps
+from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+
+from op_scraper.index_queue import bump_index_generation
+
+
+def _close_db_connections():
+    # connections must not be shared between forked processes
+    for connection in connections.all():
+        connection.close()
+
+
+def _init_worker():
+    _close_db_connections()
+    # a fresh backend, with its own elasticsearch client, per process
+    haystack.connections.reload('default')
+
+
+def index_shard(task):
+    """
+    Runs in the worker processes: prepares the documents for one shard
+    of primary keys and sends them to elasticsearch in bulk. Returns the
+    model label and the number of indexed documents.
+    """
+    label, pks, index_name, chunk_size = task
+    backend = haystack.connections['default'].get_backend()
+    model = apps.get_model(label)
+    index = haystack.connections['default'].get_unified_index()\
+        .get_index(model)
+
+    def actions():
+        for obj in index.index_queryset().filter(pk__in=pks):
+            prepped_data = index.full_prepare(obj)
+            doc = dict((key, backend._from_python(value))
+                       for key, value in prepped_data.items())
+            doc['_id'] = doc[ID]
+            doc['_index'] = index_name
+            doc['_type'] = 'modelresult'
+            yield doc
+
+    count, _ = helpers.bulk(backend.conn, actions(), chunk_size=chunk_size)
+    return label, count
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the search index into a new elasticsearch index in ' \
+        'parallel, then points the index alias to it'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=multiprocessing.cpu_count(),
+            help='Number of worker processes (default: one per cpu)')
+        parser.add_argument(
+            '--shard-size', type=int, default=500,
+            help='Objects per shard, i.e. per worker task (default: 500)')
+        parser.add_argument(
+            '--chunk-size', type=int, default=200,
+            help='Documents per bulk request (default: 200)')
+        parser.add_argument(
+            '--replicas', type=int, default=1,
+            help='Replicas of the new index once it is loaded (default: 1)')
+        parser.add_argument(
+            '--keep-old', action='store_true', default=False,
+            help="Don't delete the indices the alias pointed to before")
+
+    def handle(self, *args, **options):
+        backend = haystack.connections['default'].get_backend()
+        unified_index = haystack.connections['default'].get_unified_index()
+        conn = backend.conn
+        alias = backend.index_name
+        index_name = u'{}_{}'.format(
+            alias, datetime.datetime.now().strftime('%Y%m%d%H%M%S'))
+
+        # the new index is loaded without refreshes and replicas
+        _, field_mapping = backend.build_schema(
+            unified_index.all_searchfields())
+        body = {
+            'settings': dict(backend.DEFAULT_SETTINGS['settings']),
+            'mappings': {
+                'modelresult': {
+                    'properties': field_mapping,
+                    '_boost': {'name': 'boost', 'null_value': 1.0},
+                }
+            },
+        }
+        body['settings']['index'] = {
+            'refresh_interval': '-1',
+            'number_of_replicas': 0,
+        }
+        conn.indices.create(index=index_name, body=body)
+        self.stdout.write(u"Created index {}".format(index_name))
+
+        tasks = []
+        for model, index in unified_index.get_indexes().items():
+            label = u'{}.{}'.format(
+                model._meta.app_label, model._meta.model_name)
+            pks = list(index.index_queryset()
+                       .order_by('pk').values_list('pk', flat=True))
+            self.stdout.write(u"{}: {} objects".format(label, len(pks)))
+            for start in range(0, len(pks), options['shard_size']):
+                tasks.append((label, pks[start:start + options['shard_size']],
+                              index_name, options['chunk_size']))
+
+        started = time.time()
+        counts = {}
+        _close_db_connections()
+        pool = multiprocessing.Pool(options['workers'], _init_worker)
+        try:
+            for label, count in pool.imap_unordered(index_shard, tasks):
+                counts[label] = counts.get(label, 0) + count
+                if int(options['verbosity']) > 1:
+                    self.stdout.write(u"{}: {} documents indexed".format(
+                        label, counts[label]))
+            pool.close()
+        except:
+            pool.terminate()
+            conn.indices.delete(index=index_name, ignore=404)
+            raise
+        finally:
+            pool.join()
+
+        total = sum(counts.values())
+        elapsed = time.time() - started
+        self.stdout.write(u"Indexed {} documents in {:.0f}s ({:.1f}/s)".format(
+            total, elapsed, total / max(elapsed, 0.001)))
+
+        conn.indices.put_settings(index=index_name, body={'index': {
+            'refresh_interval': '1s',
+            'number_of_replicas': options['replicas'],
+        }})
+        conn.indices.refresh(index=index_name)
+        self.swap_alias(conn, alias, index_name, options['keep_old'])
+        bump_index_generation()
+
+    def swap_alias(self, conn, alias, index_name, keep_old):
+        """
+        Points the alias to the new index in one atomic step
+        """
+        actions = [{'add': {'index': index_name, 'alias': alias}}]
+        old_indices = []
+        if conn.indices.exists_alias(name=alias):
+            old_indices = conn.indices.get_alias(name=alias).keys()
+            actions = [{'remove': {'index': old, 'alias': alias}}
+                       for old in old_indices] + actions
+        elif conn.indices.exists(index=alias):
+            # an index created by haystack itself under the alias' name has
+            # to go before the alias can be created
+            if keep_old:
+                raise CommandError(
+                    u"{} is an index, not an alias; run without --keep-old "
+                    u"to replace it".format(alias))
+            conn.indices.delete(index=alias)
+        conn.indices.update_aliases(body={'actions': actions})
+        self.stdout.write(u"{} now points to {}".format(alias, index_name))
+
+        if not keep_old:
+            for old in old_indices:
+                conn.indices.delete(index=old, ignore=404)
+                self.stdout.write(u"Deleted index {}".format(old))
@@ -9,4 +9,5 @@ class Command(BaseCommand):
         haystack.connections['archive'].get_backend().setup()
         for sc in SubscribedContent.objects.all():
             sc.reset_content_hashes()
+        SubscribedContent.clean_archive()
 
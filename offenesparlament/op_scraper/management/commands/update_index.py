@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+from haystack.management.commands import update_index
+
+from op_scraper.index_queue import bump_index_generation
+
+
+class Command(update_index.Command):
+    help = update_index.Command.help + \
+        ' Bumps the index generation, invalidating cached search responses.'
+
+    def handle(self, *items, **options):
+        result = super(Command, self).handle(*items, **options)
+        bump_index_generation()
+        return result
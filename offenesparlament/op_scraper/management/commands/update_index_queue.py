@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from op_scraper.index_queue import process_index_queue
+
+
+class Command(BaseCommand):
+    help = 'Reindexes the objects the scrapers queued as changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Objects reindexed per batch (default: 100)')
+
+    def handle(self, *args, **options):
+        processed = process_index_queue(batch_size=options['batch_size'])
+        self.stdout.write(u"Reindexed {} queued objects".format(processed))
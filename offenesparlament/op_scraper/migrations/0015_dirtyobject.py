@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('op_scraper', '0014_auto_20171024_1842'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyObject',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('model', models.CharField(max_length=100)),
+                ('object_pk', models.CharField(max_length=30)),
+                ('marked', models.DateTimeField(default=django.utils.timezone.now, db_index=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='dirtyobject',
+            unique_together=set([('model', 'object_pk')]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('op_scraper', '0015_dirtyobject'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscribedcontent',
+            name='latest_field_hashes',
+            field=models.TextField(null=True, blank=True),
+        ),
+    ]
@@ -1,9 +1,9 @@
 # -*- coding: UTF-8 -*-
 import datetime
 from django.db import models
+from django.utils import timezone
 from django.utils.html import remove_tags
 from django.core.urlresolvers import reverse
-from django.test import Client
 from phonenumber_field.modelfields import PhoneNumberField
 from annoying import fields
 from django.contrib.postgres.fields import ArrayField
@@ -11,10 +11,12 @@ from django.conf import settings
 from django.template.loader import render_to_string
 import re
 import json
+import time
 import xxhash
 import requests
 import collections
 import uuid
+from elasticsearch import helpers
 
 import markdown
 import bleach
@@ -388,7 +390,7 @@ class Law(Timestamped, ParlIDMixIn):
                     'source_link':  op.source_link,
                     'documents':  docs,
                     'keywords':  [kw.title for kw in op.keywords.all()],
-                    'prelaw': op.prelaw.id,
+                    'prelaw': op.prelaw_id,
                     'entity': op.entity.title if op.entity else None
                 }
             )
@@ -707,10 +709,14 @@ class Person(Timestamped, ParlIDMixIn):
 
     @property
     def llps(self):
-        return list(set([
-            m.legislative_period
-            for m in self.mandate_set.all().order_by('-legislative_period__end_date')
-            if m.legislative_period]))
+        # sorted in python instead of the database (latest first, ongoing
+        # periods before all others), so prefetched mandates are used
+        mandates = [m for m in self.mandate_set.all() if m.legislative_period]
+        mandates.sort(
+            key=lambda m: (m.legislative_period.end_date is None,
+                           m.legislative_period.end_date),
+            reverse=True)
+        return list(set([m.legislative_period for m in mandates]))
 
     @property
     def llps_roman(self):
@@ -772,31 +778,31 @@ class Person(Timestamped, ParlIDMixIn):
             mandates.append(mand._json())
         return json.dumps(mandates)
 
+    def debate_statements_by_page(self):
+        """
+        Returns the ids of the person's debate statements, keyed by the
+        (date, page_start) they appear at in the protocol
+        """
+        by_page = collections.defaultdict(list)
+        for ds in self.debate_statements.all():
+            if ds.date is None or ds.page_start is None:
+                continue
+            date = timezone.localtime(ds.date) \
+                if timezone.is_aware(ds.date) else ds.date
+            by_page[(date.date(), ds.page_start)].append(ds.id)
+        return by_page
+
     def statements_json(self):
         statements = []
+        by_page = self.debate_statements_by_page()
         for st in self.statements.all():
             statement = st._json()
-            if st.protocol_url and self.debate_statements.count():
-                try:
-                    page_number = int(
-                        re.match('^.*SEITE_(\d+).*$', st.protocol_url).group(1))
-
-                    dsq = self.debate_statements\
-                        .filter(page_start=page_number)\
-                        .filter(date__year=st.step.date.year)\
-                        .filter(date__month=st.step.date.month)\
-                        .filter(date__day=st.step.date.day)
-                    if dsq.count() >= 1:
-                        statement['debate_statement'] = [
-                            ds.id for ds in dsq.all()]
-                    elif not dsq.count():
-                        # no matching debatestatement found
-                        pass
-                except:
-                    # something went wrong
-                    # logger.warn("Problem finding debate_statement: {}".format(
-                    #     e.message))
-                    pass
+            if st.protocol_url and by_page:
+                match = re.match('^.*SEITE_(\d+).*$', st.protocol_url)
+                if match:
+                    ids = by_page.get((st.step.date, int(match.group(1))))
+                    if ids:
+                        statement['debate_statement'] = ids
             statements.append(statement)
         return json.dumps(statements)
 
@@ -1011,6 +1017,44 @@ class User(models.Model):
             self.save()
 
 
+# documents per bulk or multi-get request to the archive index
+ARCHIVE_CHUNK_SIZE = 500
+
+# archived documents are stored before the hashes referring to them are
+# saved; clean_archive keeps unreferenced documents younger than this
+ARCHIVE_GRACE_SECS = 3600
+
+# field of the archived documents holding the time they were stored
+ARCHIVED_AT = 'archived_at'
+
+_archive_es = None
+
+
+def archive_index_name():
+    return settings.HAYSTACK_CONNECTIONS['archive'].get(
+        'INDEX_NAME', 'archive')
+
+
+def archive_es():
+    """
+    Returns the elasticsearch client for the archive index, configured from
+    HAYSTACK_CONNECTIONS['archive'] once and shared (with its connection
+    pool) by all archive operations
+    """
+    global _archive_es
+    if _archive_es is None:
+        from elasticsearch import Elasticsearch
+        HS = settings.HAYSTACK_CONNECTIONS['archive']
+        options = {
+            'retry_on_timeout': True,
+            'timeout': HS.get('TIMEOUT', 10),
+            'maxsize': 10,
+        }
+        options.update(HS.get('KWARGS', {}))
+        _archive_es = Elasticsearch(HS['URL'], **options)
+    return _archive_es
+
+
 class SubscribedContent(models.Model):
 
     """
@@ -1020,6 +1064,7 @@ class SubscribedContent(models.Model):
     ui_url = models.URLField(max_length=255, null=True, blank=True)
 
     latest_content_hashes = models.TextField(null=True, blank=True)
+    latest_field_hashes = models.TextField(null=True, blank=True)
     # deprecated due to usage of ES for archived content
     # latest_content = models.TextField(null=True, blank=True)
     title = models.CharField(max_length=255, default="")
@@ -1031,116 +1076,179 @@ class SubscribedContent(models.Model):
 
     def get_content(self):
         """
-        Executes a request to ES for this subscription's search URL
+        Runs this subscription's search (in process, cf.
+        offenesparlament.views.search.search_url)
 
-        Returns the textual response (json in string)
+        Returns the list of results
         """
-
-        c = Client()
+        from offenesparlament.views.search import search_url
 
         try:
-            response = c.get(self.url)
-            content = json.loads(response.content)['result']
-            return content
+            return search_url(self.url)
         except Exception, e:
             logger.error(
-                "Couldn't get or deserialize SubscribedContent ES response for url {} ({}): {}".format(
-                    self.url, response.content if 'response' in locals() else '-', e
+                "Couldn't get SubscribedContent ES results for url {}: {}".format(
+                    self.url, e
                     )
                 )
         return None
 
 
-    def generate_content_hashes(self, content=None):
+    def generate_hashes(self, content=None):
         """
-        Generate a dictionary which maps parl_ids to their respective hashes
+        Generate two dictionaries, as JSON: one maps parl_ids to their
+        respective hashes, the other one to the hashes of their fields
 
         Used for speedy comparison of changes
         """
-        if not content:
+        if content is None:
             content = self.get_content()
 
         content_hashes = {}
+        field_hashes = {}
         if content:
             for res in content:
-                content_hashes[res['parl_id']] = self._hash_content(res)
-        return json.dumps(content_hashes)
+                fields = self._hash_fields(res)
+                field_hashes[res['parl_id']] = fields
+                content_hashes[res['parl_id']] = self._hash_content(res, fields)
+        return json.dumps(content_hashes), json.dumps(field_hashes)
 
-    def _hash_content(self, content):
-        # To avoid deleting other SubscribedContent's archived latest_content,
-        # we MUST salt the hash with this SC's URL (which is unique)
-        hash_string = "{} +++ {}".format(self.url, json.dumps(content))
+    def generate_content_hashes(self, content=None):
+        return self.generate_hashes(content)[0]
+
+    def _hash_fields(self, content):
+        return dict(
+            (key, xxhash.xxh64(json.dumps(value, sort_keys=True)).hexdigest())
+            for key, value in content.items())
+
+    def _hash_content(self, content, field_hashes=None):
+        # The archive is content-addressed: identical results of different
+        # SubscribedContents share one archived document (cf. clean_archive).
+        # A result's hash is derived from its fields' ones.
+        if field_hashes is None:
+            field_hashes = self._hash_fields(content)
+        hash_string = json.dumps(field_hashes, sort_keys=True)
         hashed = xxhash.xxh64(hash_string).hexdigest()
         return hashed
 
     def store_latest_content(self, content):
-        HS = settings.HAYSTACK_CONNECTIONS['archive']
-        INDEX = HS.get('INDEX_NAME', 'archive')
-        from elasticsearch import Elasticsearch
-        es = Elasticsearch(HS['URL'], retry_on_timeout=True)
-
         if content:
-            for content_item in content:
-                content_id_hash = self._hash_content(content_item)
-                es.index(index=INDEX, doc_type='modelresult', id=content_id_hash, body=content_item)
-
-    def retrieve_latest_content(self):
-        HS = settings.HAYSTACK_CONNECTIONS['archive']
-        INDEX = HS.get('INDEX_NAME', 'archive')
-        from elasticsearch import Elasticsearch
-        es = Elasticsearch(HS['URL'], retry_on_timeout=True)
+            archived_at = int(time.time())
+            helpers.bulk(
+                archive_es(),
+                ({
+                    '_index': archive_index_name(),
+                    '_type': 'modelresult',
+                    '_id': self._hash_content(content_item),
+                    '_source': dict(content_item, **{ARCHIVED_AT: archived_at}),
+                } for content_item in content),
+                chunk_size=ARCHIVE_CHUNK_SIZE)
+
+    def retrieve_latest_content(self, parl_ids=None, fields=None):
+        """
+        Fetches the archived results, or only the ones with the given
+        parl_ids; if fields are given, the results only contain these
+        (and their parl_id)
+        """
+        es = archive_es()
 
         content = []
         hashes = []
+        params = {}
+        if fields is not None:
+            params['_source_include'] = sorted(set(fields) | set(['parl_id']))
 
         try:
-            hashes = json.loads(self.latest_content_hashes).values()
+            hashes = json.loads(self.latest_content_hashes)
+            if parl_ids is None:
+                hashes = hashes.values()
+            else:
+                hashes = [hashes[parl_id] for parl_id in parl_ids
+                          if parl_id in hashes]
         except:
             # something went wrong with the latest content hashes saved in the
             # db. ignore & fail gracefully, b/c they will be regenerated the next time reset_content_hashes
             # is called
             pass
 
-        for content_id_hash in hashes:
+        for start in range(0, len(hashes), ARCHIVE_CHUNK_SIZE):
             try:
-                res = es.get(index="archive", doc_type="modelresult", id=content_id_hash)
-                content.append(res['_source'])
+                res = es.mget(
+                    index=archive_index_name(), doc_type='modelresult',
+                    body={'ids': hashes[start:start + ARCHIVE_CHUNK_SIZE]},
+                    **params)
+                for doc in res['docs']:
+                    if doc.get('found'):
+                        doc['_source'].pop(ARCHIVED_AT, None)
+                        content.append(doc['_source'])
             except Exception, e:
                 #from raven.contrib.django.raven_compat.models import client
                 #client.captureException()
                 pass
         return content
 
-    def clear_latest_content(self, depth=0):
-        if not self.latest_content_hashes:
-            return
+    def reset_content_hashes(self, content=None, store=True):
+        """
+        Resets content's hashes after an email-sending; content are the
+        current results, if they're at hand already, and store=False skips
+        archiving them if that's done already
+        """
+        if content is None:
+            content = self.get_content()
+        self.latest_content_hashes, self.latest_field_hashes = \
+            self.generate_hashes(content)
+        if store:
+            self.store_latest_content(content)
+        self.save()
 
-        from elasticsearch import Elasticsearch
+    @classmethod
+    def clean_archive(cls, depth=0):
+        """
+        Deletes the archived results no SubscribedContent refers to anymore,
+        returns their number. Results archived within ARCHIVE_GRACE_SECS are
+        kept, their hashes may not be saved yet (cf. reset_content_hashes),
+        and results archived anew during the cleanup aren't deleted (the
+        deletes are versioned).
+        """
         import elasticsearch
+        referenced = set()
+        for hashes in cls.objects.values_list(
+                'latest_content_hashes', flat=True):
+            try:
+                referenced.update(json.loads(hashes).values())
+            except:
+                # no (valid) hashes, nothing archived
+                pass
+
+        es = archive_es()
+        archived_before = time.time() - ARCHIVE_GRACE_SECS
         try:
-            HS = settings.HAYSTACK_CONNECTIONS['archive']
-            es = Elasticsearch(HS['URL'], retry_on_timeout=True)
-            hashes = json.loads(self.latest_content_hashes).values()
-            INDEX = HS.get('INDEX_NAME', 'archive')
-            for content_id_hash in hashes:
-                if es.exists(index=INDEX, doc_type="modelresult", id=content_id_hash):
-                    es.delete(index=INDEX, doc_type="modelresult", id=content_id_hash)
+            stale = [
+                (hit['_id'], hit['_version']) for hit in helpers.scan(
+                    es, index=archive_index_name(), doc_type='modelresult',
+                    query={'query': {'match_all': {}}},
+                    _source_include=[ARCHIVED_AT], version=True)
+                if hit['_id'] not in referenced and
+                hit.get('_source', {}).get(ARCHIVED_AT, 0) < archived_before]
+            helpers.bulk(
+                es,
+                ({
+                    '_op_type': 'delete',
+                    '_index': archive_index_name(),
+                    '_type': 'modelresult',
+                    '_id': content_id_hash,
+                    '_version': version,
+                } for content_id_hash, version in stale),
+                chunk_size=ARCHIVE_CHUNK_SIZE,
+                raise_on_error=False)
         except elasticsearch.exceptions.TransportError, e:
             if depth<4:
-                import time
                 time.sleep(0.5 + 0 if depth==0 else 4**depth)
-                self.clear_latest_content(depth=depth+1)
+                return cls.clean_archive(depth=depth+1)
             else:
                 raise e
-
-    def reset_content_hashes(self):
-        """
-        Resets content's hashes after an email-sending
-        """
-        self.clear_latest_content()
-        self.latest_content_hashes = self.generate_content_hashes()
-        self.store_latest_content(self.get_content())
-        self.save()
+        logger.info(u"Deleted {} stale archived results".format(len(stale)))
+        return len(stale)
 
     def __unicode__(self):
         return u'<SubscribedContent: pk={}>'.format(self.pk)
@@ -1376,24 +1484,6 @@ class Debate(models.Model):
 
         return self._slug
 
-    @property
-    def statements_full_text(self):
-        return [
-            [
-                st.index,
-                st.doc_section,
-                st.text_type,
-                st.time_start,
-                st.time_end,
-                st.person.parl_id if st.person else None,
-                st.speaker_role,
-                st.speaker_name,
-                st.full_text
-            ]
-            for st
-            in self.debate_statements.order_by('index').all()
-        ]
-
     @property
     def is_protocol_available(self):
         return not ("VorlaeufigesSten.Protokoll" in self.protocol_url)
@@ -1605,3 +1695,34 @@ class ComitteeAgendaTopic(models.Model):
     # Relationships
     meeting = models.ForeignKey(ComitteeMeeting, related_name='agenda_topics')
     law = models.ForeignKey(Law, related_name='agenda_topics', null=True)
+
+
+class DirtyObject(models.Model):
+
+    """
+    An object whose search index document is out of date; collected by the
+    spiders and worked off by the index queue (cf. op_scraper.index_queue)
+    """
+    # label of the indexed model, e.g. 'op_scraper.law'
+    model = models.CharField(max_length=100)
+    object_pk = models.CharField(max_length=30)
+    marked = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ("model", "object_pk")
+
+    def __unicode__(self):
+        return u'{}.{}'.format(self.model, self.object_pk)
+
+
+class IndexGeneration(models.Model):
+
+    """
+    Counts the updates of the search index; cached search responses of
+    older generations are stale (cf. op_scraper.index_queue)
+    """
+    generation = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __unicode__(self):
+        return u'{}'.format(self.generation)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+# Persistent http cache for the parlament.gv.at spiders
+#
+# Responses are stored on disk (keyed by the request fingerprint, i.e. the
+# url) together with their headers, so that ETag and Last-Modified can be
+# used to revalidate them with conditional requests (RFC2616Policy).
+# Detail pages that come back unchanged - either as a fresh cache hit, a
+# 304 or a byte-identical 200 - are dropped before they reach the spider's
+# extractors, unless the spider was started with ignore_timestamp or the
+# spider's database doesn't have the object yet (see BaseSpider.is_stored).
+# Revalidating an entry doesn't renew it: it still expires after
+# HTTPCACHE_EXPIRATION_SECS, so every page gets fully re-scraped now and
+# then.
+#
+# See: http://doc.scrapy.org/en/latest/topics/downloader-middleware.html
+
+import os
+import shutil
+import logging
+from time import time
+
+from scrapy.exceptions import IgnoreRequest
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.extensions.httpcache import FilesystemCacheStorage
+
+logger = logging.getLogger(__name__)
+
+
+class ParlamentCacheStorage(FilesystemCacheStorage):
+
+    """
+    Filesystem storage with per-spider expiration times and eviction of
+    old entries and by total cache size when a spider closes.
+
+    Relevant settings:
+        HTTPCACHE_EXPIRATION_SECS         default expiration time
+        HTTPCACHE_SPIDER_EXPIRATION_SECS  dict, spider name -> expiration
+        HTTPCACHE_MAX_AGE_SECS            entries older than this are removed
+        HTTPCACHE_MAX_SIZE                total cache size in bytes
+    """
+
+    def __init__(self, settings):
+        super(ParlamentCacheStorage, self).__init__(settings)
+        self.default_expiration_secs = self.expiration_secs
+        self.spider_expiration_secs = settings.getdict(
+            'HTTPCACHE_SPIDER_EXPIRATION_SECS')
+        self.max_age_secs = settings.getint('HTTPCACHE_MAX_AGE_SECS')
+        self.max_size = settings.getint('HTTPCACHE_MAX_SIZE')
+
+    def open_spider(self, spider):
+        super(ParlamentCacheStorage, self).open_spider(spider)
+        self.expiration_secs = int(self.spider_expiration_secs.get(
+            spider.name, self.default_expiration_secs))
+
+    def close_spider(self, spider):
+        super(ParlamentCacheStorage, self).close_spider(spider)
+        self.evict()
+
+    def _entries(self):
+        """
+        Returns (mtime, size, path) for all cached responses
+        """
+        entries = []
+        if not os.path.isdir(self.cachedir):
+            return entries
+        for spider_name in os.listdir(self.cachedir):
+            spider_dir = os.path.join(self.cachedir, spider_name)
+            if not os.path.isdir(spider_dir):
+                continue
+            for prefix in os.listdir(spider_dir):
+                prefix_dir = os.path.join(spider_dir, prefix)
+                if not os.path.isdir(prefix_dir):
+                    continue
+                for key in os.listdir(prefix_dir):
+                    rpath = os.path.join(prefix_dir, key)
+                    metapath = os.path.join(rpath, 'pickled_meta')
+                    try:
+                        mtime = os.stat(metapath).st_mtime
+                        size = sum(
+                            os.path.getsize(os.path.join(rpath, f))
+                            for f in os.listdir(rpath))
+                    except OSError:
+                        mtime, size = 0, 0
+                    entries.append((mtime, size, rpath))
+        return entries
+
+    def evict(self):
+        """
+        Removes entries older than HTTPCACHE_MAX_AGE_SECS, then the oldest
+        entries until the cache fits into HTTPCACHE_MAX_SIZE
+        """
+        if not self.max_age_secs and not self.max_size:
+            return
+        entries = sorted(self._entries())
+        now = time()
+        total_size = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, rpath in entries:
+            too_old = self.max_age_secs and now - mtime > self.max_age_secs
+            too_big = self.max_size and total_size > self.max_size
+            if not (too_old or too_big):
+                break
+            shutil.rmtree(rpath, ignore_errors=True)
+            total_size -= size
+            removed += 1
+        if removed:
+            logger.info(u"Evicted {} cached responses, {} bytes left".format(
+                removed, total_size))
+
+
+class ParlamentHttpCacheMiddleware(HttpCacheMiddleware):
+
+    """
+    HttpCacheMiddleware that drops unchanged responses for requests
+    flagged with meta['skip_unchanged'] instead of passing them on to the
+    spider, as long as the spider confirms the page's object is stored
+    (spider.is_stored(request)); otherwise the cached copy may never have
+    made it into the database, e.g. after a failed parse or a reset.
+    """
+
+    def process_request(self, request, spider):
+        response = super(ParlamentHttpCacheMiddleware, self).process_request(
+            request, spider)
+        if response is not None:
+            self._skip_unchanged(request, spider)
+        return response
+
+    def process_response(self, request, response, spider):
+        cachedresponse = request.meta.get('cached_response')
+        result = super(ParlamentHttpCacheMiddleware, self).process_response(
+            request, response, spider)
+        if cachedresponse is None or 'cached' in response.flags:
+            return result
+
+        if result is cachedresponse:
+            # 304 Not Modified
+            self._skip_unchanged(request, spider)
+        elif response.body == cachedresponse.body:
+            # no validators, but the same page as before
+            self.stats.inc_value('httpcache/unchanged_body', spider=spider)
+            self._skip_unchanged(request, spider)
+        return result
+
+    def _skip_unchanged(self, request, spider):
+        if not request.meta.get('skip_unchanged', False):
+            return
+        if getattr(spider, 'IGNORE_TIMESTAMP', False):
+            return
+        is_stored = getattr(spider, 'is_stored', None)
+        if is_stored is None or not is_stored(request):
+            self.stats.inc_value('httpcache/unchanged_not_stored', spider=spider)
+            return
+        self.stats.inc_value('httpcache/skipped_unchanged', spider=spider)
+        raise IgnoreRequest(u"Unchanged: {}".format(request.url))
@@ -12,3 +12,16 @@ class ParlamentItem(scrapy.Item):
     # define the fields for your item here like:
     # name = scrapy.Field()
     pass
+
+
+class DebateStatementsItem(scrapy.Item):
+
+    """
+    All sections of a debate protocol, stored at once by the
+    DebateStatementPipeline. Either the sections or the raw protocol html
+    (to be parsed by the pipeline) are set.
+    """
+    debate = scrapy.Field()
+    sections = scrapy.Field()
+    protocol = scrapy.Field()
+    source_link = scrapy.Field()
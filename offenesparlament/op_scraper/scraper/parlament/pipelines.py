@@ -5,8 +5,244 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: http://doc.scrapy.org/en/latest/topics/item-pipeline.html
 
+import traceback
+import multiprocessing
+
+from django.db import transaction
+from twisted.internet import defer, reactor
+from ansicolor import green, red
+
+from parlament.items import DebateStatementsItem
+from parlament.resources.extractors.statement import DOCSECTIONS
+
+from op_scraper.models import DebateStatement, Person
+
 
 class ParlamentPipeline(object):
 
     def process_item(self, item, spider):
         return item
+
+
+def parse_protocol(html):
+    """
+    Runs in the worker processes of the DebateStatementPipeline: returns
+    (True, sections) without the paragraph objects, which aren't stored,
+    or (False, traceback) if the protocol couldn't be parsed
+    """
+    try:
+        sections = DOCSECTIONS.xt_stream(html)
+    except Exception:
+        return False, traceback.format_exc()
+    for sect in sections:
+        sect.pop('paragraphs', None)
+    return True, sections
+
+
+class DebateStatementPipeline(object):
+
+    """
+    Stores the sections of a debate protocol as DebateStatements.
+
+    Existing statements of the debate and all speakers are loaded with one
+    query each; new statements are bulk-inserted and existing ones only
+    saved if one of their fields changed, all in one transaction.
+
+    Items that carry the raw protocol instead of its sections (spider
+    started with parse_workers) are parsed in a pool of spider.PARSE_WORKERS
+    processes, so the reactor keeps downloading in the meantime. If the
+    pool can't be started, a worker fails or its result doesn't arrive
+    within spider.PARSE_TIMEOUT seconds (a worker died, the result couldn't
+    be pickled), the protocol is parsed in-process instead.
+    """
+
+    FIELDS = dict(
+        (field.name, field)
+        for field in DebateStatement._meta.concrete_fields
+        if not field.primary_key)
+
+    def __init__(self):
+        self.pool = None
+
+    def open_spider(self, spider):
+        workers = getattr(spider, 'PARSE_WORKERS', 0)
+        if not workers:
+            return
+        try:
+            # the workers only parse html and never touch the database
+            self.pool = multiprocessing.Pool(workers)
+        except OSError, e:
+            spider.logger.warning(red(
+                u"Couldn't start {} protocol parsers, parsing in-process: {}"
+                .format(workers, e)))
+            return
+        spider.logger.info(green(
+            u"Parsing protocols in {} processes".format(workers)))
+        self.raise_active_size(spider, workers)
+
+    def raise_active_size(self, spider, workers):
+        """
+        Scrapy stops downloading while the responses of unfinished items
+        exceed its scraper slot's max_active_size (5 MB, two or three
+        protocols); make room for spider.PARSE_ACTIVE_SIZE bytes per worker
+        so all of them are kept busy
+        """
+        crawler = getattr(spider, 'crawler', None)
+        engine = getattr(crawler, 'engine', None)
+        slot = getattr(getattr(engine, 'scraper', None), 'slot', None)
+        if slot is None:
+            return
+        active_size = workers * getattr(
+            spider, 'PARSE_ACTIVE_SIZE', slot.max_active_size)
+        slot.max_active_size = max(slot.max_active_size, active_size)
+
+    def close_spider(self, spider):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def process_item(self, item, spider):
+        if not isinstance(item, DebateStatementsItem):
+            return item
+
+        if item.get('sections') is not None:
+            return self.save_item(item, spider)
+
+        d = self.parse(item['protocol'], item['source_link'], spider)
+        d.addCallback(self.parsed, item, spider)
+        return d
+
+    def parse(self, html, source_link, spider):
+        """
+        Returns a Deferred that fires with the sections of the protocol
+        """
+        if self.pool is None:
+            return defer.maybeDeferred(self.parse_in_process, html)
+
+        d = defer.Deferred()
+
+        def fire(result):
+            if not d.called:
+                timeout.cancel()
+                d.callback(result)
+
+        def callback(result):
+            # called in the pool's result handler thread
+            reactor.callFromThread(fire, result)
+
+        def timed_out():
+            # Python 2's Pool has no error callback: a task whose worker
+            # died or whose result couldn't be pickled never calls back
+            d.callback((False, u"No result after {}s".format(parse_timeout)))
+
+        try:
+            self.pool.apply_async(parse_protocol, (html,), callback=callback)
+        except Exception, e:
+            spider.logger.warning(red(
+                u"Couldn't queue {} for parsing: {}".format(source_link, e)))
+            return defer.maybeDeferred(self.parse_in_process, html)
+        # includes the time the protocol waits for a free worker
+        parse_timeout = getattr(spider, 'PARSE_TIMEOUT', 600)
+        timeout = reactor.callLater(parse_timeout, timed_out)
+        return d
+
+    def parse_in_process(self, html):
+        return True, DOCSECTIONS.xt_stream(html)
+
+    def parsed(self, result, item, spider):
+        success, sections = result
+        if not success:
+            spider.logger.warning(red(
+                u"Parsing {} in a worker failed, retrying in-process:\n{}"
+                .format(item['source_link'], sections)))
+            sections = DOCSECTIONS.xt_stream(item['protocol'])
+
+        item['sections'] = spider.prepare_sections(item['debate'], sections)
+        # don't keep the protocol around until the item is dropped
+        del item['protocol']
+        return self.save_item(item, spider)
+
+    def save_item(self, item, spider):
+        with transaction.atomic():
+            created, updated = self.store_statements(
+                item['debate'], item['sections'], spider)
+
+        spider.logger.info(
+            green(u"Saved {} sections from {}: {} new, {} updated".format(
+                len(item['sections']), item['source_link'],
+                created, updated)))
+        return item
+
+    def store_statements(self, debate, sections, spider):
+        """
+        Upsert all sections of a debate, returns the number of created and
+        updated statements
+        """
+        statements = dict(
+            (statement.doc_section, statement)
+            for statement in DebateStatement.objects.filter(debate=debate))
+
+        speaker_ids = set(
+            sect['speaker_id'] for sect in sections
+            if sect.get('speaker_id') is not None)
+        speakers = set(Person.objects.filter(
+            parl_id__in=speaker_ids).values_list('parl_id', flat=True))
+
+        new_statements = []
+        updated = 0
+        for sect in sections:
+            data = dict(sect)
+            data['debate'] = debate
+            if data.get('speaker_id') is None:
+                data['person'] = None
+            elif data['speaker_id'] in speakers:
+                data['person'] = data['speaker_id']
+            else:
+                spider.logger.warning(
+                    red(u"Person '{}' not found".format(data['speaker_id'])))
+
+            statement = statements.get(data['doc_section'])
+            if statement is None:
+                statement = DebateStatement()
+                self.update_fields(statement, data)
+                statements[data['doc_section']] = statement
+                new_statements.append(statement)
+            else:
+                previous_person_id = statement.person_id
+                changed = self.update_fields(statement, data)
+                if changed and statement.pk is not None:
+                    statement.save(update_fields=changed)
+                    updated += 1
+                    spider.mark_dirty(statement)
+                    if 'person' in changed and previous_person_id:
+                        spider.mark_dirty(Person(pk=previous_person_id))
+
+        DebateStatement.objects.bulk_create(new_statements)
+        if new_statements:
+            # bulk_create doesn't set the primary keys, the debate queues
+            # all of its statements; the speakers are queued by their pks
+            spider.mark_dirty(debate, *[
+                Person(pk=person_id) for person_id in set(
+                    statement.person_id for statement in new_statements
+                    if statement.person_id is not None)])
+        return len(new_statements), updated
+
+    def update_fields(self, statement, data):
+        """
+        Sets all model fields contained in data, returns the names of the
+        fields that changed
+        """
+        changed = []
+        for key, value in data.items():
+            field = self.FIELDS.get(key)
+            if field is None:
+                continue
+            if field.is_relation:
+                value = getattr(value, 'pk', value)
+            elif value is not None:
+                value = field.get_prep_value(value)
+            if getattr(statement, field.attname) != value:
+                setattr(statement, field.attname, value)
+                changed.append(field.name)
+        return changed
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+
+# Record and replay crawls
+#
+# With REPLAY_MODE = 'record', every response a spider receives is written
+# to a directory store (REPLAY_DIR), keyed by the request fingerprint.
+# With REPLAY_MODE = 'replay', all requests are answered from that store
+# and nothing is fetched from the network; requests that weren't recorded
+# are dropped. This makes complete crawls reproducible on an isolated
+# machine, e.g. for profiling the spiders and pipelines or comparing their
+# throughput, which the ReplayStats extension reports when a spider closes.
+#
+# Store layout (one directory per response):
+#
+#     <REPLAY_DIR>/<fingerprint[:2]>/<fingerprint>/meta.json
+#     <REPLAY_DIR>/<fingerprint[:2]>/<fingerprint>/body
+#
+# See: http://doc.scrapy.org/en/latest/topics/downloader-middleware.html
+
+import os
+import json
+import logging
+from time import time
+
+from scrapy import signals
+from scrapy.http import Headers
+from scrapy.exceptions import IgnoreRequest
+from scrapy.exceptions import NotConfigured
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.request import request_fingerprint
+
+logger = logging.getLogger(__name__)
+
+MODES = ('record', 'replay')
+
+
+class ReplayStore(object):
+
+    """
+    Directory store of recorded responses
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _path(self, request):
+        key = request_fingerprint(request)
+        return os.path.join(self.path, key[:2], key)
+
+    def retrieve(self, request):
+        """
+        Returns the recorded response for request, or None
+        """
+        rpath = self._path(request)
+        try:
+            with open(os.path.join(rpath, 'meta.json'), 'rb') as f:
+                meta = json.load(f)
+            with open(os.path.join(rpath, 'body'), 'rb') as f:
+                body = f.read()
+        except IOError:
+            return None
+        url = str(meta['response_url'])
+        headers = Headers(
+            [(str(k), [str(v) for v in vs]) for k, vs in meta['headers']])
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, status=meta['status'], headers=headers,
+                       body=body, flags=['replayed'])
+
+    def store(self, request, response):
+        rpath = self._path(request)
+        if not os.path.exists(rpath):
+            os.makedirs(rpath)
+        meta = {
+            'url': request.url,
+            'method': request.method,
+            'response_url': response.url,
+            'status': response.status,
+            'headers': [(k, vs) for k, vs in response.headers.iteritems()],
+            'recorded': time(),
+        }
+        with open(os.path.join(rpath, 'body'), 'wb') as f:
+            f.write(response.body)
+        # meta.json is written last, so incomplete entries aren't replayed
+        with open(os.path.join(rpath, 'meta.json'), 'wb') as f:
+            json.dump(meta, f, indent=1)
+
+    def __len__(self):
+        if not os.path.isdir(self.path):
+            return 0
+        return sum(len(os.listdir(os.path.join(self.path, prefix)))
+                   for prefix in os.listdir(self.path))
+
+
+class ReplayMiddleware(object):
+
+    """
+    Records responses into or serves them from a ReplayStore, depending on
+    REPLAY_MODE.
+
+    Relevant settings:
+        REPLAY_MODE  'record', 'replay' or empty (disabled)
+        REPLAY_DIR   location of the store
+    """
+
+    def __init__(self, mode, store, stats):
+        self.mode = mode
+        self.store = store
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        mode = crawler.settings.get('REPLAY_MODE')
+        if mode not in MODES:
+            raise NotConfigured
+        store = ReplayStore(crawler.settings.get('REPLAY_DIR'))
+        middleware = cls(mode, store, crawler.stats)
+        crawler.signals.connect(
+            middleware.spider_opened, signal=signals.spider_opened)
+        return middleware
+
+    def spider_opened(self, spider):
+        logger.info(u"{}: {} responses in {}".format(
+            self.mode.capitalize(), len(self.store), self.store.path))
+
+    def process_request(self, request, spider):
+        if self.mode != 'replay':
+            return None
+        response = self.store.retrieve(request)
+        if response is None:
+            self.stats.inc_value('replay/missing', spider=spider)
+            raise IgnoreRequest(u"Not recorded: {}".format(request.url))
+        self.stats.inc_value('replay/hit', spider=spider)
+        return response
+
+    def process_response(self, request, response, spider):
+        if self.mode == 'record' and 'replayed' not in response.flags:
+            self.store.store(request, response)
+            self.stats.inc_value('replay/recorded', spider=spider)
+        return response
+
+
+class ReplayStats(object):
+
+    """
+    Logs the throughput of a crawl when the spider closes: responses and
+    items per second and database queries per response and item. Enabled
+    together with the ReplayMiddleware, or with REPLAY_STATS = True.
+
+    Queries are counted on all Django connections; the counts are taken
+    (and the query logs cleared) whenever a response or item passes by.
+    """
+
+    def __init__(self):
+        self.started = None
+        self.responses = 0
+        self.items = 0
+        self.queries = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not (crawler.settings.get('REPLAY_MODE') in MODES or
+                crawler.settings.getbool('REPLAY_STATS')):
+            raise NotConfigured
+        extension = cls()
+        crawler.signals.connect(
+            extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(
+            extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(
+            extension.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(
+            extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def _count_queries(self):
+        from django.db import connections
+        for connection in connections.all():
+            self.queries += len(connection.queries_log)
+            connection.queries_log.clear()
+
+    def spider_opened(self, spider):
+        from django.db import connections
+        for connection in connections.all():
+            connection.force_debug_cursor = True
+            connection.queries_log.clear()
+        self.started = time()
+
+    def response_received(self, response, request, spider):
+        self.responses += 1
+        self._count_queries()
+
+    def item_scraped(self, item, response, spider):
+        self.items += 1
+        self._count_queries()
+
+    def spider_closed(self, spider, reason):
+        from django.db import connections
+        self._count_queries()
+        for connection in connections.all():
+            connection.force_debug_cursor = False
+        elapsed = max(time() - self.started, 0.001)
+        logger.info(
+            u"{}: {} responses ({:.1f}/s), {} items ({:.1f}/s), "
+            u"{} queries in {:.1f}s ({:.1f}/response, {:.1f}/item)".format(
+                spider.name,
+                self.responses, self.responses / elapsed,
+                self.items, self.items / elapsed,
+                self.queries, elapsed,
+                float(self.queries) / max(self.responses, 1),
+                float(self.queries) / max(self.items, 1)))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Spider-scoped in-memory caches of database state
+"""
+import pytz
+
+from django.db.models import Q
+
+
+def _key_value(value):
+    """
+    Model instances are stored by primary key
+    """
+    return getattr(value, 'pk', value)
+
+
+class TimestampMap(object):
+
+    """
+    Maps the identifying fields of all scraped objects of a model to their
+    last known timestamp. Loaded once per crawl, so has_changes can be
+    answered without hitting the database. It isn't updated as objects are
+    saved; the dupefilter keeps a crawl from visiting a page twice anyway.
+    """
+
+    def __init__(self, model, fields, llps=None):
+        self.model = model
+        self.fields = tuple(fields)
+        self.llps = llps
+        self.timestamps = {}
+        self.by_source_link = {}
+
+    def load(self):
+        qs = self.model.objects.all()
+        if self.llps and 'legislative_period' in self.fields:
+            qs = qs.filter(
+                Q(legislative_period__number__in=self.llps) |
+                Q(legislative_period__isnull=True))
+        for row in qs.values_list(*(self.fields + ('ts',))).iterator():
+            self.timestamps[row[:-1]] = row[-1]
+            if 'source_link' in self.fields:
+                source_link = row[self.fields.index('source_link')]
+                self.by_source_link[source_link] = max(
+                    row[-1], self.by_source_link.get(source_link, row[-1]))
+        return self
+
+    def _key(self, key):
+        return tuple(_key_value(value) for value in key)
+
+    def has_changes(self, key, ts):
+        """
+        Returns True unless an object with the given key exists with the
+        given (naive, utc) timestamp
+        """
+        if ts is None:
+            return True
+        key = self._key(key)
+        if key not in self.timestamps:
+            return True
+        return self.timestamps[key] != ts.replace(tzinfo=pytz.utc)
+
+    def is_current(self, source_link, date):
+        """
+        Returns True if the object at source_link was scraped with a
+        timestamp on or after the given (utc) date, e.g. an rss entry's
+        publishing date
+        """
+        ts = self.by_source_link.get(source_link)
+        if ts is None or date is None:
+            return False
+        return ts.date() >= date.date()
+
+    def __len__(self):
+        return len(self.timestamps)
+
+
+class LookupCache(object):
+
+    """
+    Preloaded get_or_create for small, almost static lookup tables
+    (Keyword, Category, Phase, ...). Objects are indexed by the set of
+    fields they are looked up with; misses go through to the database and
+    the result is added to the cache.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.objects = None
+        self.indexes = {}
+
+    def all(self):
+        if self.objects is None:
+            self.objects = list(self.model.objects.all())
+        return self.objects
+
+    def _index(self, fields):
+        if fields not in self.indexes:
+            index = {}
+            for obj in self.all():
+                index.setdefault(
+                    tuple(getattr(obj, field) for field in fields), obj)
+            self.indexes[fields] = index
+        return self.indexes[fields]
+
+    def _add(self, obj):
+        self.all().append(obj)
+        for fields, index in self.indexes.items():
+            index.setdefault(
+                tuple(getattr(obj, field) for field in fields), obj)
+
+    def first(self, **kwargs):
+        """
+        Returns the first object with the given field values or None
+        """
+        fields = tuple(sorted(kwargs))
+        return self._index(fields).get(
+            tuple(_key_value(kwargs[field]) for field in fields))
+
+    def find(self, func):
+        """
+        Returns the first object for which func returns True or None
+        """
+        for obj in self.all():
+            if func(obj):
+                return obj
+        return None
+
+    def get_or_create(self, defaults=None, **kwargs):
+        obj = self.first(**kwargs)
+        if obj is not None:
+            return obj, False
+        obj, created = self.model.objects.get_or_create(
+            defaults=defaults, **kwargs)
+        self._add(obj)
+        return obj, created
@@ -1,6 +1,137 @@
 # Base Classes
+import copy
 from datetime import datetime
 
+from lxml import etree
+from scrapy import Selector
+from scrapy.selector import SelectorList
+
+
+class XPathRegistry(object):
+
+    """
+    Compiled XPath expressions, keyed by expression. Every expression is
+    compiled into an lxml.etree.XPath once per process and then evaluated
+    directly against the parsed document.
+    """
+
+    def __init__(self):
+        self.expressions = {}
+
+    def __getitem__(self, expr):
+        try:
+            return self.expressions[expr]
+        except KeyError:
+            compiled = etree.XPath(expr, smart_strings=False)
+            self.expressions[expr] = compiled
+            return compiled
+
+    def __len__(self):
+        return len(self.expressions)
+
+
+XPATHS = XPathRegistry()
+
+
+def _root(response):
+    """
+    Returns the lxml element behind a response, selector or element
+    """
+    root = getattr(response, 'selector', response)
+    return getattr(root, 'root', root)
+
+
+def _extract(value, method='html'):
+    """
+    Serializes an xpath result the way Selector.extract() does
+    """
+    if isinstance(value, etree._Element):
+        return etree.tostring(
+            value, method=method, encoding='unicode', with_tail=False)
+    if value is True:
+        return u'1'
+    if value is False:
+        return u'0'
+    # lxml returns plain str for ascii-only text
+    return unicode(value)
+
+
+def _evaluate(response, expr):
+    """
+    Evaluates the compiled expression against the lxml element behind a
+    response, selector or element; returns the results and the document
+    type ('html' or 'xml')
+    """
+    root = _root(response)
+    if not isinstance(root, (etree._Element, etree._ElementTree)):
+        # text and attribute results can't be queried any further
+        return [], None
+    selector = getattr(response, 'selector', response)
+    doc_type = 'xml' if getattr(selector, 'type', None) == 'xml' else 'html'
+    result = XPATHS[expr](root)
+    if not isinstance(result, list):
+        result = [result]
+    return result, doc_type
+
+
+def xpath(response, expr):
+    """
+    Evaluates the (compiled) expression against a response, selector,
+    selector list or element and returns the extracted strings, the same
+    as response.xpath(expr).extract()
+    """
+    if isinstance(response, list):
+        return [value for item in response for value in xpath(item, expr)]
+    result, doc_type = _evaluate(response, expr)
+    return [_extract(value, doc_type) for value in result]
+
+
+def select(response, expr):
+    """
+    Evaluates the (compiled) expression like xpath(), but returns the
+    matching nodes as selectors, the same as response.xpath(expr)
+    """
+    if isinstance(response, list):
+        return SelectorList(
+            node for item in response for node in select(item, expr))
+    result, doc_type = _evaluate(response, expr)
+    return SelectorList(
+        Selector(root=value, type=doc_type) for value in result)
+
+
+def _merge_text_nodes(element):
+    """
+    Merges adjacent text nodes, e.g. the ones etree.strip_tags leaves
+    behind: lxml's .text and .tail join them when read, but xpath's text()
+    still returns them one by one. Assigning the joined strings replaces
+    them with a single node.
+    """
+    for el in element.iter():
+        if el.text is not None:
+            el.text = el.text
+        if el.tail is not None:
+            el.tail = el.tail
+
+
+def fragment(selector, strip_tags=()):
+    """
+    Returns a selector on a copy of the selected element, wrapped in
+    html/body like Selector(text=selector.extract()) would do, without
+    serializing and re-parsing it. Absolute expressions ('//td[1]') only
+    match inside the fragment.
+
+    Tags in strip_tags are removed from the copy (keeping their content),
+    like Selector(text=remove_tags(selector.extract(), ...)).
+    """
+    element = copy.deepcopy(_root(selector))
+    element.tail = None
+    if strip_tags:
+        etree.strip_tags(element, *strip_tags)
+        _merge_text_nodes(element)
+    html = etree.Element('html')
+    etree.SubElement(html, 'body').append(element)
+    return Selector(root=html, type='html')
+
 
 class BaseExtractor:
 
@@ -12,8 +143,7 @@ class BaseExtractor:
         """
         Extract based on the classes XPATH expression
         """
-        value = response.xpath(cls.XPATH).extract()
-        return value
+        return xpath(response, cls.XPATH)
 
 
 class SingleExtractor(BaseExtractor):
@@ -54,8 +184,8 @@ class GENERIC:
     class TIMESTAMP(SingleExtractor):
         @classmethod
         def xt(cls, response):
-            tstring = response.xpath(
-                '//*[@id="utilities"]/div/span/text()').extract()[0]
+            tstring = xpath(
+                response, '//*[@id="utilities"]/div/span/text()')[0]
             tstring = tstring.replace(u'LETZTES UPDATE: ', '')
             try:
                 ts = datetime.strptime(tstring, '%d.%m.%Y; %H:%M')
@@ -71,8 +201,7 @@ class GENERIC:
         """
         @classmethod
         def xt(cls, response):
-            tstring = response.xpath(
-                '//*[@id="stand"]/text()').extract()[0]
+            tstring = xpath(response, '//*[@id="stand"]/text()')[0]
             tstring = tstring.replace(u'Stand: ', '')
             try:
                 ts = datetime.strptime(tstring, '%d.%m.%Y')
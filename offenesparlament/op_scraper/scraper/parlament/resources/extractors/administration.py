@@ -1,8 +1,9 @@
 import datetime
-from django.utils.html import remove_tags
-from scrapy import Selector
 
 from parlament.resources.extractors import SingleExtractor
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
 from parlament.resources.util import _clean
 
 # import the logging library
@@ -18,10 +19,9 @@ class ADMINISTRATION:
         XPATH = '//*[@id="filterListeFW_016"]//table//tr'
 
         @classmethod
-        def xt_admin_date(cls, raw_person):
+        def xt_admin_date(cls, person):
             # Extract administration
-            admin_datestring = Selector(text=raw_person).xpath(
-                '//td[1]/span/@title').extract()[0]
+            admin_datestring = xpath(person, '//td[1]/span/@title')[0]
             if ';' in admin_datestring:
                 admin_datestring = admin_datestring.split(";")[0]
 
@@ -53,24 +53,21 @@ class ADMINISTRATION:
         @classmethod
         def xt(cls, response):
             persons = []
-            raw_persons = response.xpath(cls.XPATH).extract()
+            raw_persons = select(response, cls.XPATH)
             for raw_person in raw_persons:
-                person = Selector(text=raw_person)
-                if person.xpath('//th'):
+                person = fragment(raw_person)
+                if xpath(person, '//th'):
                     continue
-                source_link = person.xpath(
-                    '//td//a/@href').extract()[0]
-                reversed_name = _clean(
-                    Selector(
-                        text=remove_tags(raw_person, 'img')
-                    ).xpath('//td//a/text()').extract()[0])
+                source_link = xpath(person, '//td//a/@href')[0]
+                reversed_name = _clean(xpath(
+                    fragment(raw_person, strip_tags=('img',)),
+                    '//td//a/text()')[0])
                 if ' siehe ' in reversed_name:
                     reversed_name = reversed_name.split(' siehe ')[1]
-                admin_title = person.xpath(
-                    '//td[1]/span/text()').extract()
+                admin_title = xpath(person, '//td[1]/span/text()')
 
                 (admin_start_date, admin_end_date) = cls.xt_admin_date(
-                    raw_person)
+                    person)
 
                 administration = {
                     'title': admin_title,
@@ -80,15 +77,15 @@ class ADMINISTRATION:
                 # TODO EXTRACT DATE(S) FROM BUNDESMINISTERIUM td
                 # TODO ADD EITHER DATE(S) TO FUNCTION
                 try:
-                    if person.xpath('//tr//td[3]/span/text()'):
-                        function_short = person.xpath(
-                            '//td[3]/span/text()').extract()[0]
-                        function_title = person.xpath(
-                            '//td[3]/span/@title').extract()[0]
-
-                    elif person.xpath('//tr//td[3]/text()'):
-                        function_short = _clean(person.xpath(
-                            '//td[3]/text()').extract()[0])
+                    if xpath(person, '//tr//td[3]/span/text()'):
+                        function_short = xpath(
+                            person, '//td[3]/span/text()')[0]
+                        function_title = xpath(
+                            person, '//td[3]/span/@title')[0]
+
+                    elif xpath(person, '//tr//td[3]/text()'):
+                        function_short = _clean(xpath(
+                            person, '//td[3]/text()')[0])
                         function_title = ''
                 except:
                     import ipdb
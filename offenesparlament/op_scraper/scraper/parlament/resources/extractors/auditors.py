@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 import datetime
-from django.utils.html import remove_tags
-from scrapy import Selector
 
 from parlament.resources.extractors import SingleExtractor
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
 from parlament.resources.util import _clean
 
 # import the logging library
@@ -19,10 +20,9 @@ class AUDITORS:
         XPATH = '//*[@id="filterListeFW_009"]//table//tr'
 
         @classmethod
-        def xt_pres_date(cls, raw_person):
+        def xt_pres_date(cls, person):
             # Extract administration
-            admin_datestring = Selector(text=raw_person).xpath(
-                '//td[2]/text()').extract()[0]
+            admin_datestring = xpath(person, '//td[2]/text()')[0]
             try:
                 if " - " in admin_datestring:
                     start_date = _clean(admin_datestring.split(' - ')[0])
@@ -48,20 +48,18 @@ class AUDITORS:
         @classmethod
         def xt(cls, response):
             persons = []
-            raw_persons = response.xpath(cls.XPATH).extract()
+            raw_persons = select(response, cls.XPATH)
             for raw_person in raw_persons:
-                person = Selector(text=raw_person)
-                if person.xpath('//th'):
+                person = fragment(raw_person)
+                if xpath(person, '//th'):
                     continue
-                source_link = person.xpath(
-                    '//td//a/@href').extract()[0]
-                reversed_name = _clean(
-                    Selector(
-                        text=remove_tags(raw_person, 'img')
-                    ).xpath('//td//a/text()').extract()[0])
+                source_link = xpath(person, '//td//a/@href')[0]
+                reversed_name = _clean(xpath(
+                    fragment(raw_person, strip_tags=('img',)),
+                    '//td//a/text()')[0])
 
                 (pres_start_date, pres_end_date) = cls.xt_pres_date(
-                    raw_person)
+                    person)
 
                 mandate = {
                     'title': u'RechnungshofpräsidentIn',
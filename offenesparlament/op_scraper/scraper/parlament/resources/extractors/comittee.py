@@ -2,9 +2,11 @@ import datetime
 import roman
 
 from django.utils.html import remove_tags
-from scrapy import Selector
 
 from parlament.resources.extractors import SingleExtractor
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
 from parlament.resources.util import _clean
 
 from parlament.settings import BASE_HOST
@@ -44,7 +46,7 @@ class COMITTEE:
 
         @classmethod
         def xt(cls, response):
-            raw_llp = response.xpath(cls.XPATH).extract()
+            raw_llp = cls._xt(response)
 
             if len(raw_llp) > 0 and u'Nationalrat' in raw_llp[0]:
                 llp_list = raw_llp[0].split("-")
@@ -62,8 +64,8 @@ class COMITTEE:
 
         @classmethod
         def xt(cls, response):
-            title = response.xpath(cls.XPATH_TITLE).extract()[0]
-            name = response.xpath(cls.XPATH).extract()[0]
+            title = xpath(response, cls.XPATH_TITLE)[0]
+            name = cls._xt(response)[0]
 
             if title == name:
                 return name
@@ -78,7 +80,7 @@ class COMITTEE:
 
         @classmethod
         def xt(cls, response):
-            raw = response.xpath(cls.XPATH).extract()
+            raw = cls._xt(response)
             if len(raw) > 0:
                 html_desc = raw[0][3:-4]
                 return html_desc
@@ -94,13 +96,13 @@ class COMITTEE:
 
         @classmethod
         def xt(cls, response):
-            raw_meetings = response.xpath(cls.XPATH)
+            raw_meetings = select(response, cls.XPATH)
 
             meetings = []
 
             for raw_meeting in raw_meetings:
-                raw_header_row = raw_meeting.xpath('tr[@class="historyHeader"]')
-                raw_date = raw_header_row.xpath('td[1]/text()').extract()
+                raw_header_row = select(raw_meeting, 'tr[@class="historyHeader"]')
+                raw_date = xpath(raw_header_row, 'td[1]/text()')
 
                 if len(raw_date) > 0:
                     raw_date = _clean(raw_date[0])
@@ -112,13 +114,13 @@ class COMITTEE:
                 else:
                     meeting_date = None
 
-                raw_number = raw_header_row.xpath('td[2]/em/a/text()').extract()
+                raw_number = xpath(raw_header_row, 'td[2]/em/a/text()')
                 if len(raw_number) > 0 and u'Sitzung' in raw_number[0]:
                     meeting_number = raw_number[0].split()[0][:-1]
                 else:
                     continue  # not a meeting
 
-                raw_document_urls = raw_header_row.xpath('td[2]/a/@href').extract()
+                raw_document_urls = xpath(raw_header_row, 'td[2]/a/@href')
 
                 html_link, pdf_link = u"", u""
                 for url in raw_document_urls:
@@ -142,12 +144,12 @@ class COMITTEE:
                 else:
                     meeting_document = None
 
-                raw_rows = raw_header_row.xpath('following-sibling::tr')
+                raw_rows = select(raw_header_row, 'following-sibling::tr')
 
                 meeting_topics = []
 
                 for raw_row in raw_rows:
-                    raw_topic_number = raw_row.xpath('td[1]/text()').extract()
+                    raw_topic_number = xpath(raw_row, 'td[1]/text()')
 
                     if len(raw_topic_number) > 0:
                         topic_number_list = _clean(raw_topic_number[0]).split()
@@ -158,7 +160,7 @@ class COMITTEE:
                     else:
                         topic_number = 0
 
-                    raw_topic_text = raw_row.xpath('td[2]/text()').extract()
+                    raw_topic_text = xpath(raw_row, 'td[2]/text()')
 
                     if len(raw_topic_text) > 0:
                         topic_text = _clean(raw_topic_text[0])
@@ -174,7 +176,7 @@ class COMITTEE:
                     else:
                         topic_comment = u''
 
-                    raw_topic_law_text = raw_row.xpath('td[2]/a/text()').extract()
+                    raw_topic_law_text = xpath(raw_row, 'td[2]/a/text()')
 
                     if len(raw_topic_law_text) > 0:
                         topic_law_text = u'({})'.format(raw_topic_law_text[0])
@@ -183,7 +185,7 @@ class COMITTEE:
 
                     topic_text = u'{} {}'.format(topic_text,topic_law_text)
 
-                    raw_topic_law_link = raw_row.xpath('td[2]/a/@href').extract()
+                    raw_topic_law_link = xpath(raw_row, 'td[2]/a/@href')
 
                     if len(raw_topic_law_link) > 0:
                         topic_law_llp, topic_law_id = COMITTEE.url_to_parlid(raw_topic_law_link[0])
@@ -227,22 +229,22 @@ class COMITTEE:
 
         @classmethod
         def xt(cls, response):
-            raw_laws = response.xpath(cls.XPATH_LAWS)
-            raw_reports = response.xpath(cls.XPATH_REPORTS)
+            raw_laws = select(response, cls.XPATH_LAWS)
+            raw_reports = select(response, cls.XPATH_REPORTS)
 
             raw_laws = raw_laws + raw_reports
 
             laws = []
 
             for raw_law in raw_laws:
-                raw_title = raw_law.xpath('text()').extract()
+                raw_title = xpath(raw_law, 'text()')
 
                 if len(raw_title) > 0:
                     law_title = _clean(raw_title[0])
                 else:
                     law_title = u''
 
-                raw_link = raw_law.xpath('@href').extract()
+                raw_link = xpath(raw_law, '@href')
 
                 if len(raw_link) > 0:
                     law_link = raw_link[0]
@@ -270,10 +272,10 @@ class COMITTEE:
 
         @classmethod
         def xt(cls, response):
-            rows = response.xpath(cls.XPATH)
+            rows = select(response, cls.XPATH)
 
             for row in rows:
-                raw_active = row.xpath('td[2]/text()').extract()
+                raw_active = xpath(row, 'td[2]/text()')
                 if len(raw_active) > 0:
                     active = _clean(raw_active[0])
                     if active == u'Aufl\xf6sung':
@@ -287,12 +289,12 @@ class COMITTEE:
 
         @classmethod
         def xt(cls, response):
-            raw_memberships = response.xpath(cls.XPATH)
+            raw_memberships = select(response, cls.XPATH)
 
             memberships = []
 
             for raw_membership in raw_memberships:
-                raw_llp = raw_membership.xpath('a[1]/text()').extract()[1]
+                raw_llp = xpath(raw_membership, 'a[1]/text()')[1]
                 nrbr = u'Nationalrat'
                 comittee_llp = None
                 if nrbr in raw_llp:
@@ -300,13 +302,13 @@ class COMITTEE:
                 else:
                     nrbr = u'Bundesrat'
 
-                tablerows = raw_membership.xpath('following-sibling::div[1]/table[1]/tbody/tr').extract()
+                tablerows = select(raw_membership, 'following-sibling::div[1]/table[1]/tbody/tr')
 
                 last_function = u''
                 for row in tablerows:
-                    row_sel = Selector(text=row)
+                    row_sel = fragment(row)
 
-                    raw_function = row_sel.xpath('//td[@class="biogr_am_funktext"]/text()').extract()
+                    raw_function = xpath(row_sel, '//td[@class="biogr_am_funktext"]/text()')
                     if len(raw_function) > 0:
                         function = _clean(raw_function[0])
                         # TODO: standardization of functions should be done on model level
@@ -314,7 +316,7 @@ class COMITTEE:
                     else:
                         function = last_function
 
-                    raw_comittee_link = row_sel.xpath('//td[@class="biogr_am_ausschuss"]/a/@href').extract()
+                    raw_comittee_link = xpath(row_sel, '//td[@class="biogr_am_ausschuss"]/a/@href')
                     if raw_comittee_link:
                         comittee_link = raw_comittee_link[0]
                         comittee_link = "{}{}".format(BASE_HOST, comittee_link)
@@ -323,17 +325,17 @@ class COMITTEE:
 
                     _,comittee_parl_id = COMITTEE.url_to_parlid(comittee_link)
 
-                    raw_comitee_name = row_sel.xpath('//td[@class="biogr_am_ausschuss"]/a/text()').extract()
+                    raw_comitee_name = xpath(row_sel, '//td[@class="biogr_am_ausschuss"]/a/text()')
                     if len(raw_comitee_name) > 0:
                         comittee_name = _clean(raw_comitee_name[0])
                     else:
-                        raw_comitee_name = row_sel.xpath('//td[@class="biogr_am_ausschuss"]/text()').extract()
+                        raw_comitee_name = xpath(row_sel, '//td[@class="biogr_am_ausschuss"]/text()')
                         if len(raw_comitee_name) > 0:
                             comittee_name = _clean(raw_comitee_name[0])
                         else:
                             comittee_name = u''
 
-                    raw_dates = row_sel.xpath('//td[@class="biogr_am_vonbis"]/text()').extract()[0]
+                    raw_dates = xpath(row_sel, '//td[@class="biogr_am_vonbis"]/text()')[0]
                     if raw_dates:
                         raw_dates = _clean(raw_dates)
                         # \u2013 == - (dash)
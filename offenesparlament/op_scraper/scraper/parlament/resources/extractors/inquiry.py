@@ -1,10 +1,12 @@
 import datetime
 from django.utils.html import remove_tags
-from scrapy import Selector
 import re
 
 from parlament.resources.extractors import SingleExtractor
 from parlament.resources.extractors import MultiExtractor
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
 from parlament.resources.util import _clean
 from parlament.settings import BASE_HOST
 
@@ -29,17 +31,16 @@ class INQUIRY:
         @classmethod
         def xt(cls, response):
             docs = []
-            raw_docs = response.xpath(cls.LI_XPATH)
+            raw_docs = select(response, cls.LI_XPATH)
             for raw_doc in raw_docs:
                 html_url, pdf_url = "", ""
-                urls = raw_doc.css('a').xpath('@href').extract()
+                urls = xpath(raw_doc, 'descendant-or-self::a/@href')
                 for url in urls:
                     if url.endswith('.pdf'):
                         pdf_url = url
                     elif url.endswith('.html'):
                         html_url = url
-                title = Selector(text=raw_doc.extract()).xpath(
-                    '//a[1]/text()').extract()[0]
+                title = xpath(fragment(raw_doc), '//a[1]/text()')[0]
                 title = title[:title.index('/')].strip()
                 docs.append({
                     'title': title,
@@ -54,17 +55,16 @@ class INQUIRY:
         @classmethod
         def xt(cls, response):
             docs = []
-            raw_docs = response.xpath(cls.LI_XPATH)
+            raw_docs = select(response, cls.LI_XPATH)
             for raw_doc in raw_docs:
                 html_url, pdf_url = "", ""
-                urls = raw_doc.css('a').xpath('@href').extract()
+                urls = xpath(raw_doc, 'descendant-or-self::a/@href')
                 for url in urls:
                     if url.endswith('.pdf'):
                         pdf_url = url
                     elif url.endswith('.html'):
                         html_url = url
-                title = Selector(text=raw_doc.extract()).xpath(
-                    '//a[1]/text()').extract()[0]
+                title = xpath(fragment(raw_doc), '//a[1]/text()')[0]
                 if '/' in title: # xpath also matches schlagworte sometimes
                     title = title[:title.index('/')].strip()
                     docs.append({
@@ -88,7 +88,7 @@ class INQUIRY:
 
         @classmethod
         def xt(cls, response):
-            description = response.xpath(cls.XPATH).extract()
+            description = cls._xt(response)
             if description:
                 description = description[0]
             else:
@@ -101,7 +101,7 @@ class INQUIRY:
 
         @classmethod
         def xt(cls, response):
-            sender_links = response.xpath(cls.XPATH).extract()
+            sender_links = cls._xt(response)
             return [sender_link.split('/')[-2] for sender_link in sender_links]
 
     class RECEIVER(SingleExtractor):
@@ -109,7 +109,7 @@ class INQUIRY:
 
         @classmethod
         def xt(cls, response):
-            receiver_link = response.xpath(cls.XPATH).extract()
+            receiver_link = cls._xt(response)
             return receiver_link[0].split('/')[-2]
 
     class PHASES(MultiExtractor):
@@ -119,9 +119,9 @@ class INQUIRY:
         @classmethod
         def xt(cls, response):
             phases = []
-            raw_phases = response.xpath(cls.XPATH)
+            raw_phases = select(response, cls.XPATH)
             for index, raw_phase in enumerate(raw_phases, start=1):
-                raw_phase_selector = Selector(text=raw_phase.extract())
+                raw_phase_selector = fragment(raw_phase)
                 phase_index = str(index).zfill(2)
                 title = INQUIRY.PHASES.TITLE.xt(raw_phase_selector)
                 steps = INQUIRY.PHASES.STEPS.xt(phase_index, raw_phase_selector)
@@ -143,12 +143,12 @@ class INQUIRY:
             @classmethod
             def xt(cls, phase_index, selector):
                 steps = []
-                raw_steps = selector.xpath(cls.XPATH)
+                raw_steps = select(selector, cls.XPATH)
                 for index, raw_step in enumerate(raw_steps, start=1):
                     step_sortkey = "{}#{}".format(
                         phase_index,
                         str(index).zfill(3))
-                    step_selector = Selector(text=raw_step.extract())
+                    step_selector = fragment(raw_step)
 
                     title = INQUIRY.PHASES.STEPS.TITLE.xt(step_selector, request.url)
                     date_str = INQUIRY.PHASES.STEPS.DATE.xt(step_selector)
@@ -183,39 +183,37 @@ class INQUIRY:
                 @classmethod
                 def xt(cls, step_selector):
 
-                    title_selector = step_selector.xpath('//td[2]')[0]
+                    title_selector = select(step_selector, '//td[2]')[0]
 
                     # we have wortmeldungen!
-                    if title_selector.xpath('//table'):
-                        table_selector = title_selector.xpath('//table')[0]
+                    if select(title_selector, '//table'):
+                        table_selector = select(title_selector, '//table')[0]
                         raw_rows = [
-                            Selector(text=raw_row)
+                            fragment(raw_row)
                             for raw_row
-                            in table_selector.xpath('//tbody//tr').extract()]
+                            in select(table_selector, '//tbody//tr')]
                         statements = []
                         # Extract statements data
                         for index, row_selector in enumerate(raw_rows):
-                            if(row_selector.xpath(cls.XP_P_LINK).extract()):
-                                person_source_link = row_selector.xpath(
-                                    cls.XP_P_LINK).extract()[0]
+                            if(xpath(row_selector, cls.XP_P_LINK)):
+                                person_source_link = xpath(
+                                    row_selector, cls.XP_P_LINK)[0]
                             else:
                                 continue
 
-                            person_name = row_selector.xpath(
-                                cls.XP_P_NAME).extract()
-                            if(row_selector.xpath(cls.XP_T_TYPE).extract()):
+                            person_name = xpath(row_selector, cls.XP_P_NAME)
+                            if(xpath(row_selector, cls.XP_T_TYPE)):
                                 statement_type = _clean(
-                                    row_selector.xpath(cls.XP_T_TYPE).extract()[0])
+                                    xpath(row_selector, cls.XP_T_TYPE)[0])
                             else:
                                 continue
-                            protocol_link = row_selector.xpath(
-                                cls.XP_PROT_LINK).extract()
-                            if(row_selector.xpath(
-                                        cls.XP_PROT_TEXT).extract()):
+                            protocol_link = xpath(
+                                row_selector, cls.XP_PROT_LINK)
+                            if(xpath(row_selector, cls.XP_PROT_TEXT)):
                                 protocol_text = _clean(
                                     remove_tags(
-                                        row_selector.xpath(
-                                            cls.XP_PROT_TEXT).extract()[0],
+                                        xpath(row_selector,
+                                              cls.XP_PROT_TEXT)[0],
                                         'td a'))
                             else:
                                 protocol_text = []
@@ -234,8 +232,7 @@ class INQUIRY:
                     else:
                         text = _clean(
                             remove_tags(
-                                step_selector.xpath(
-                                    cls.XPATH).extract()[0],
+                                cls._xt(step_selector)[0],
                                 'td')).replace('<a href="', '<a href="{}'.format(BASE_HOST))
                         title = {'text': text}
                     return title
@@ -249,9 +246,9 @@ class INQUIRY:
         @classmethod
         def xt(cls, response):
             steps = []
-            raw_steps = response.xpath(cls.XPATH)
+            raw_steps = select(response, cls.XPATH)
             for index, step in enumerate(raw_steps, start=1):
-                step_selector = Selector(text=step.extract())
+                step_selector = fragment(step)
                 title = INQUIRY.STEPS.TITLE.xt(step_selector, response.url)
                 date_str = INQUIRY.STEPS.DATE.xt(step_selector).strip()
                 date = datetime.datetime.strptime(
@@ -281,7 +278,7 @@ class INQUIRY:
 
             @classmethod
             def xt(cls, step_selector, base_url):
-                title_selector = step_selector.xpath('//td[2]')[0].extract()
+                title_selector = xpath(step_selector, '//td[2]')[0]
                 #full_title = re.sub('<[^>]*>', '', title_selector).strip()
                 full_title = title_selector.strip()
 
@@ -300,7 +297,7 @@ class INQUIRY:
 
         @classmethod
         def xt(cls, response):
-            response_link = response.xpath(cls.XPATH).extract()
+            response_link = cls._xt(response)
             if not response_link:
                 return 0
             else:
@@ -312,9 +309,9 @@ class INQUIRY:
 
         @classmethod
         def xt(cls, response):
-            responsesender_link = response.xpath(cls.XPATH).extract()
+            responsesender_link = cls._xt(response)
             if not responsesender_link:
-                responsesender_link = response.xpath(cls.XPATH_BACKUP).extract()
+                responsesender_link = xpath(response, cls.XPATH_BACKUP)
             return responsesender_link[0].split('/')[-2]
 
     class RESPONSEDESCRIPTION(SingleExtractor):
@@ -322,7 +319,7 @@ class INQUIRY:
 
         @classmethod
         def xt(cls, response):
-            description = response.xpath(cls.XPATH).extract()
+            description = cls._xt(response)
             if description:
                 description = description[0]
             else:
@@ -1,9 +1,10 @@
 import datetime
 from django.utils.html import remove_tags
-from scrapy import Selector
-
 from parlament.resources.extractors import SingleExtractor
 from parlament.resources.extractors import MultiExtractor
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
 from parlament.resources.util import _clean
 from parlament.settings import BASE_HOST
 
@@ -28,8 +29,8 @@ class LAW:
 
         @classmethod
         def xt(cls, response):
-            raw_section = Selector(text=response.xpath(cls.XPATH).extract()[0])
-            prelaw_id = raw_section.xpath(cls.XPATH_ID).extract()[0]
+            raw_section = fragment(select(response, cls.XPATH)[0])
+            prelaw_id = xpath(raw_section, cls.XPATH_ID)[0]
             return prelaw_id
 
     class KEYWORDS(MultiExtractor):
@@ -41,17 +42,16 @@ class LAW:
         @classmethod
         def xt(cls, response):
             docs = []
-            raw_docs = response.xpath(cls.LI_XPATH)
+            raw_docs = select(response, cls.LI_XPATH)
             for raw_doc in raw_docs:
                 html_url, pdf_url = "", ""
-                urls = raw_doc.css('a').xpath('@href').extract()
+                urls = xpath(raw_doc, 'descendant-or-self::a/@href')
                 for url in urls:
                     if url.endswith('.pdf'):
                         pdf_url = url
                     elif url.endswith('.html'):
                         html_url = url
-                title = Selector(text=raw_doc.extract()).xpath(
-                    '//a[1]/text()').extract()[0]
+                title = xpath(fragment(raw_doc), '//a[1]/text()')[0]
                 title = title[:title.index('/')].strip()
                 docs.append({
                     'title': title,
@@ -65,8 +65,7 @@ class LAW:
 
         @classmethod
         def xt(cls, response):
-            status = remove_tags(
-                response.xpath(cls.XPATH).extract()[0], 'em img p')
+            status = remove_tags(cls._xt(response)[0], 'em img p')
             status = status.replace('Status: ', '')
             return status
 
@@ -78,7 +77,7 @@ class LAW:
 
         @classmethod
         def xt(cls, response):
-            description = response.xpath(cls.XPATH).extract()
+            description = cls._xt(response)
             if description:
                 description = description[0]
             else:
@@ -92,9 +91,9 @@ class LAW:
         @classmethod
         def xt(cls, response):
             phases = []
-            raw_phases = response.xpath(cls.XPATH)
+            raw_phases = select(response, cls.XPATH)
             for index, raw_phase in enumerate(raw_phases, start=1):
-                raw_phase_selector = Selector(text=raw_phase.extract())
+                raw_phase_selector = fragment(raw_phase)
                 phase_index = str(index).zfill(2)
                 title = LAW.PHASES.TITLE.xt(raw_phase_selector)
                 steps = LAW.PHASES.STEPS.xt(phase_index, raw_phase_selector)
@@ -116,12 +115,12 @@ class LAW:
             @classmethod
             def xt(cls, phase_index, selector):
                 steps = []
-                raw_steps = selector.xpath(cls.XPATH)
+                raw_steps = select(selector, cls.XPATH)
                 for index, raw_step in enumerate(raw_steps, start=1):
                     step_sortkey = "{}#{}".format(
                         phase_index,
                         str(index).zfill(3))
-                    step_selector = Selector(text=raw_step.extract())
+                    step_selector = fragment(raw_step)
 
                     title = LAW.PHASES.STEPS.TITLE.xt(step_selector)
                     date_str = LAW.PHASES.STEPS.DATE.xt(step_selector)
@@ -156,31 +155,31 @@ class LAW:
 
                 @classmethod
                 def xt(cls, step_selector):
-                    title_selector = step_selector.xpath('//td[2]')[0]
+                    title_selector = select(step_selector, '//td[2]')[0]
 
                     # we have wortmeldungen!
-                    if title_selector.xpath('//table'):
-                        table_selector = title_selector.xpath('//table')[0]
+                    if select(title_selector, '//table'):
+                        table_selector = select(title_selector, '//table')[0]
                         raw_rows = [
-                            Selector(text=raw_row)
+                            fragment(raw_row)
                             for raw_row
-                            in table_selector.xpath('//tbody//tr').extract()]
+                            in select(table_selector, '//tbody//tr')]
                         statements = []
                         # Extract statements data
                         for index, row_selector in enumerate(raw_rows):
                             try:
-                                person_source_link = row_selector.xpath(
-                                    cls.XP_P_LINK).extract()[0]
-                                person_name = row_selector.xpath(
-                                    cls.XP_P_NAME).extract()
+                                person_source_link = xpath(
+                                    row_selector, cls.XP_P_LINK)[0]
+                                person_name = xpath(
+                                    row_selector, cls.XP_P_NAME)
                                 statement_type = _clean(
-                                    row_selector.xpath(cls.XP_T_TYPE).extract()[0])
-                                protocol_link = row_selector.xpath(
-                                    cls.XP_PROT_LINK).extract()
+                                    xpath(row_selector, cls.XP_T_TYPE)[0])
+                                protocol_link = xpath(
+                                    row_selector, cls.XP_PROT_LINK)
                                 protocol_text = _clean(
                                     remove_tags(
-                                        row_selector.xpath(
-                                            cls.XP_PROT_TEXT).extract()[0],
+                                        xpath(row_selector,
+                                              cls.XP_PROT_TEXT)[0],
                                         'td a'))
                                 statements.append({
                                     'index': index,
@@ -202,8 +201,7 @@ class LAW:
                     else:
                         text = _clean(
                             remove_tags(
-                                step_selector.xpath(
-                                    cls.XPATH).extract()[0],
+                                cls._xt(step_selector)[0],
                                 'td')).replace('<a href="', '<a href="{}'.format(BASE_HOST))
                         title = {'text': text}
                     return title
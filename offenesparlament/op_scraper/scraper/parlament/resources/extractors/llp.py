@@ -1,9 +1,11 @@
 import datetime
 from django.utils.html import remove_tags
-from scrapy import Selector
 
 from parlament.resources.extractors import SingleExtractor
 from parlament.resources.extractors import MultiExtractor
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
 from parlament.resources.util import _clean
 from parlament.settings import BASE_HOST
 
@@ -23,10 +25,9 @@ class LLP(SingleExtractor):
     @classmethod
     def xt(cls, response):
         llps = []
-        raw_llps = [Selector(text=llp.extract())
-                    for llp in response.xpath(cls.XPATH)]
+        raw_llps = [fragment(llp) for llp in select(response, cls.XPATH)]
         for raw_llp in raw_llps:
-            llp_roman = raw_llp.xpath('//option/@value').extract()[0]
+            llp_roman = xpath(raw_llp, '//option/@value')[0]
 
             if llp_roman == u'ALLE':
                 continue
@@ -36,7 +37,7 @@ class LLP(SingleExtractor):
             except:
                 llp_number = -1
 
-            llp_title = raw_llp.xpath('//option/text()').extract()[0]
+            llp_title = xpath(raw_llp, '//option/text()')[0]
             dates = []
             for t_sub in llp_title.split(' '):
                 try:
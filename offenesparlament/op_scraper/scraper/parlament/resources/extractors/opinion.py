@@ -1,9 +1,11 @@
 import datetime
 from django.utils.html import remove_tags
-from scrapy import Selector
 
 from parlament.resources.extractors import SingleExtractor
 from parlament.resources.extractors import MultiExtractor
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
 from parlament.resources.util import _clean
 
 from parlament.resources.extractors.law import LAW
@@ -23,7 +25,7 @@ class OPINION:
 
         @classmethod
         def xt(cls, response):
-            entity_raw = response.xpath(cls.XPATH).extract()
+            entity_raw = xpath(response, cls.XPATH)
             if entity_raw:
                 entity_text = entity_raw[0].replace(
                     u'Stellungnehmende(r):', '')
@@ -44,7 +46,7 @@ class OPINION:
                     entity['title_detail'] = u"{} {}".format(
                         entity['title_detail'], entry)
             entity['title_detail'] = entity['title_detail'].replace("*", ", ")
-            emaiL_raw = response.xpath(cls.XPATH_EMAIL).extract()
+            emaiL_raw = xpath(response, cls.XPATH_EMAIL)
             if emaiL_raw:
                 entity['email'] = emaiL_raw[0].replace(u'mailto:', u'')
 
@@ -56,10 +58,10 @@ class OPINION:
         @classmethod
         def xt(cls, response):
             steps = []
-            raw_table = response.xpath('//table')[0]
-            raw_steps = Selector(text=raw_table.extract()).xpath('//tr')
+            raw_table = select(response, '//table')[0]
+            raw_steps = select(fragment(raw_table), '//tr')
             for index, step in enumerate(raw_steps[1:]):
-                step_selector = Selector(text=step.extract())
+                step_selector = fragment(step)
                 title = LAW.PHASES.STEPS.TITLE.xt(step_selector)
                 date_str = LAW.PHASES.STEPS.DATE.xt(step_selector)
                 try:
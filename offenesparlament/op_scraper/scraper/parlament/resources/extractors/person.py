@@ -8,6 +8,9 @@ from scrapy import Selector
 
 from parlament.resources.extractors import SingleExtractor
 from parlament.resources.extractors import MultiExtractor
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
 from parlament.resources.util import _clean
 
 # import the logging library
@@ -35,15 +38,14 @@ class PERSON:
 
             @classmethod
             def xt(cls, response):
-                mandates_raw = response.xpath(cls.XPATH).extract()
+                mandates_raw = select(response, cls.XPATH)
                 mandates = []
-                for mandate in mandates_raw:
-                    mandate = _clean(remove_tags(mandate, 'li'))
+                for raw_mandate in mandates_raw:
+                    mandate = _clean(remove_tags(raw_mandate.extract(), 'li'))
 
                     if "<div" in mandate and "</div>" in mandate:
                         mandate = _clean(remove_tags(
-                            Selector(text=mandate).xpath("//div").extract()[0],
-                            'div'))
+                            xpath(raw_mandate, ".//div")[0], 'div'))
 
                     function = mandate.split(u'<br>')[0].split(',')[0]
                     party = mandate.split(u'<br>')[0].split(',')[1] if ',' in mandate.split(u'<br />')[0] else ''
@@ -115,7 +117,7 @@ class PERSON:
                     'deathplace': '',
                     'occupation': ''
                 }
-                bio_data = response.xpath(cls.XPATH).extract()
+                bio_data = xpath(response, cls.XPATH)
                 if bio_data:
                     bio_data = bio_data[0]
                 else:
@@ -123,9 +125,9 @@ class PERSON:
 
                 # Birth Data
                 for data in bio_data.split('<br>'):
-                    birth = Selector(text=data)\
-                        .xpath("//em[contains(text(),'Geb.')]/parent::*/text()")\
-                        .extract()
+                    data = Selector(text=data)
+                    birth = xpath(
+                        data, "//em[contains(text(),'Geb.')]/parent::*/text()")
                     if birth:
                         birth = birth[0]
                         bio['birthdate'] = _clean(birth.split(',')[0])
@@ -140,9 +142,8 @@ class PERSON:
                             bio['birthplace'] = birth.split(',')[1].strip()
 
                     # Death Data
-                    death = Selector(text=data)\
-                        .xpath("//em[contains(text(),'Verst.')]/parent::*/text()")\
-                        .extract()
+                    death = xpath(
+                        data, "//em[contains(text(),'Verst.')]/parent::*/text()")
                     if death:
                         death = death[0]
                         bio['deathdate'] = _clean(death.split(',')[0])
@@ -157,9 +158,8 @@ class PERSON:
                             bio['deathplace'] = death.split(',')[1].strip()
 
                     # Occupation
-                    occupation = Selector(text=data)\
-                        .xpath("//em[contains(text(),'Beruf')]/parent::*/text()")\
-                        .extract()
+                    occupation = xpath(
+                        data, "//em[contains(text(),'Beruf')]/parent::*/text()")
                     if occupation:
                         occupation = occupation[0]
                         bio['occupation'] = occupation.split(',')[0].strip()
@@ -181,12 +181,13 @@ class PERSON:
             """
             Extract the elements
             """
-            parties_raw = cls._xt(selector)
+            parties_raw = select(selector, cls.XPATH)
             parties = []
             for party in parties_raw:
                 try:
-                    party_short = PERSON.PARTY.SHORT.xt(Selector(text=party))
-                    party_title = PERSON.PARTY.TITLE.xt(Selector(text=party))
+                    party = fragment(party)
+                    party_short = PERSON.PARTY.SHORT.xt(party)
+                    party_title = PERSON.PARTY.TITLE.xt(party)
                     parties.append([party_short, party_title])
                 except IndexError:
                     pass
@@ -198,28 +199,27 @@ class PERSON:
         @classmethod
         def xt(cls, response):
             persons = []
-            raw_persons = response.xpath(cls.XPATH).extract()
+            raw_persons = select(response, cls.XPATH)
             for raw_person in raw_persons:
-                source_link = Selector(text=raw_person).xpath(
-                    '//td//a/@href').extract()[0]
+                raw_person = fragment(raw_person)
+                source_link = xpath(raw_person, '//td//a/@href')[0]
                 reversed_name = _clean(
-                    Selector(text=raw_person).xpath('//td//a/text()').extract()[0])
+                    xpath(raw_person, '//td//a/text()')[0])
                 if ' siehe ' in reversed_name:
                     reversed_name = reversed_name.split(' siehe ')[1]
 
                 mandates = []
-                party_spans = Selector(text=raw_person).xpath(
-                    '//td[2]//span').extract()
+                party_spans = select(raw_person, '//td[2]//span')
                 for party_span in party_spans:
-                    party_short = Selector(text=party_span).xpath(
-                        '//span/text()').extract()[0]
+                    party_short = xpath(
+                        fragment(party_span), '//span/text()')[0]
                     party_title = '' #disabled because it became huge
                     mandates.append(
                         {'short': party_short, 'title': party_title})
 
                 electoral_state = {
-                    'short': Selector(text=raw_person).xpath('//td[last()]//span/text()').extract(),
-                    'long': Selector(text=raw_person).xpath('//td[last()]//span/@title').extract()}
+                    'short': xpath(raw_person, '//td[last()]//span/text()'),
+                    'long': xpath(raw_person, '//td[last()]//span/@title')}
                 electoral_state['short'] = electoral_state['short'][0] if len(electoral_state['short'])>0 else ''
                 electoral_state['long'] = electoral_state['long'][0] if len(electoral_state['long'])>0 else ''
 
@@ -1,8 +1,10 @@
 import datetime
 from django.utils.html import remove_tags
-from scrapy import Selector
 
 from parlament.resources.extractors import MultiExtractor
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
 from parlament.resources.util import _clean
 
 import re
@@ -24,7 +26,7 @@ class PETITION:
 
         @classmethod
         def xt(cls, response):
-            raw_signature_count=response.xpath(cls.XPATH).extract()
+            raw_signature_count=cls._xt(response)
             if len(raw_signature_count) > 0:
                 # sometimes there can be signatures also in the next llp, find all numbers in text
                 raw_count = re.findall(r'\d+', raw_signature_count[0])
@@ -46,25 +48,25 @@ class PETITION:
 
             creators = []
 
-            raw_creators_list = response.xpath(XPATH_PET_creator).extract()
+            raw_creators_list = select(response, XPATH_PET_creator)
             if len(raw_creators_list) > 0:
                 # PET started by members of parliament
                 for raw_creator in raw_creators_list:
-                    creator_sel = Selector(text=raw_creator)
-                    raw_parl_id_url = creator_sel.xpath("//a/@href").extract()
+                    creator_sel = fragment(raw_creator)
+                    raw_parl_id_url = xpath(creator_sel, "//a/@href")
                     name = u''
                     parl_id = u''
                     if len(raw_parl_id_url) > 0:
                         raw_parl_id = raw_parl_id_url[0].split("/")
                         if len(raw_parl_id) > 1:
                             parl_id = raw_parl_id[2]
-                    raw_name = creator_sel.xpath("//a/text()").extract()
+                    raw_name = xpath(creator_sel, "//a/text()")
                     if len(raw_name) > 0:
                         name = raw_name[0]
                     if parl_id != u'' and name != u'':
                         creators.append((parl_id, name))
             else:
-                raw_creators_list = response.xpath(XPATH_BI_creator).extract()
+                raw_creators_list = xpath(response, XPATH_BI_creator)
                 if len(raw_creators_list) > 0:
                     # BI first signed by a person
                     name = _clean(raw_creators_list[0].split("\t")[1])
@@ -79,13 +81,13 @@ class PETITION:
 
         @classmethod
         def xt(cls, response):
-            raw_url_list = response.xpath(cls.XPATH).extract()
+            raw_url_list = select(response, cls.XPATH)
             if len(raw_url_list) > 0:
                 raw_url = raw_url_list[0]
-                url_sel = Selector(text=raw_url)
-                text = url_sel.xpath('//text()').extract()
+                url_sel = fragment(raw_url)
+                text = xpath(url_sel, '//text()')
                 if text[0] == u'Hier k\xf6nnen Sie zustimmen':
-                    signing_url = url_sel.xpath('//@href').extract()
+                    signing_url = xpath(url_sel, '//@href')
                     return signing_url, True
             return '', False
 
@@ -96,16 +98,16 @@ class PETITION:
         @classmethod
         def xt(cls, response):
             ops = []
-            raw_ops = response.xpath(cls.XPATH).extract()
+            raw_ops = select(response, cls.XPATH)
             for raw_op in raw_ops:
-                op_sel = Selector(text=raw_op)
+                op_sel = fragment(raw_op)
 
-                raw_url = op_sel.xpath('//a/@href').extract()
+                raw_url = xpath(op_sel, '//a/@href')
                 if len(raw_url) > 0:
                     url = raw_url[0]
                 else:
                     url = u''
-                raw_parl_id = op_sel.xpath('//span/text()').extract()
+                raw_parl_id = xpath(op_sel, '//span/text()')
                 if len(raw_parl_id) > 0:
                     parl_id = raw_parl_id[0]
                 else:
@@ -118,7 +120,7 @@ class PETITION:
                 # else:
                 #    title = None
 
-                email = op_sel.xpath('//a[@class="mail"]/@href').extract()
+                email = xpath(op_sel, '//a[@class="mail"]/@href')
                 if email:
                     email = email[0].replace('mailto:', '')
                     # title = op_sel.xpath('//td[3]/a/text()').extract()[0]
@@ -140,7 +142,7 @@ class PETITION:
 
         @classmethod
         def xt(cls, response):
-            raw_reference = response.xpath(cls.XPATH).extract()
+            raw_reference = cls._xt(response)
             if len(raw_reference) > 0:
                 ref_url = raw_reference[0]
                 ref_url = ref_url.replace('/pls/portal/hi.link?pfad=','')
@@ -165,12 +167,12 @@ class PETITION:
 
         @classmethod
         def xt(cls, response):
-            raw_signatures = response.xpath(cls.XPATH).extract()
+            raw_signatures = select(response, cls.XPATH)
 
             signatures = []
             for raw_signature in raw_signatures:
-                sig_sel = Selector(text=raw_signature)
-                signature_list = sig_sel.xpath('//td/text()').extract()
+                sig_sel = fragment(raw_signature)
+                signature_list = xpath(sig_sel, '//td/text()')
                 if len(signature_list) > 0:
                     full_name = _clean(signature_list[0])
 
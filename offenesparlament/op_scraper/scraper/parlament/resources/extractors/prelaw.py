@@ -1,10 +1,12 @@
 import datetime
 from django.utils.html import remove_tags
-from scrapy import Selector
 
 
 from parlament.resources.extractors import SingleExtractor
 from parlament.resources.extractors import MultiExtractor
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
 from parlament.resources.extractors.law import LAW
 from parlament.resources.util import _clean
 
@@ -23,7 +25,7 @@ class PRELAW:
         @classmethod
         def xt(cls, response):
             try:
-                description = response.xpath(cls.XPATH)[0].extract()[0]
+                description = select(response, cls.XPATH)[0].extract()[0]
             except:
                 import ipdb
                 ipdb.set_trace()
@@ -35,10 +37,10 @@ class PRELAW:
         @classmethod
         def xt(cls, response):
             steps = []
-            raw_table = response.xpath(cls.XPATH)[0]
-            raw_steps = Selector(text=raw_table.extract()).xpath('//tr')[1:] # ignore header
+            raw_table = select(response, cls.XPATH)[0]
+            raw_steps = select(fragment(raw_table), '//tr')[1:] # ignore header
             for index, step in enumerate(raw_steps, start=1):
-                step_selector = Selector(text=step.extract())
+                step_selector = fragment(step)
                 title = LAW.PHASES.STEPS.TITLE.xt(step_selector)
                 date_str = LAW.PHASES.STEPS.DATE.xt(step_selector)
                 date = datetime.datetime.strptime(
@@ -58,17 +60,17 @@ class PRELAW:
         @classmethod
         def xt(cls, response):
             ops = []
-            raw_ops = response.xpath(cls.XPATH).extract()
+            raw_ops = select(response, cls.XPATH)
             for raw_op in raw_ops[1:]:
-                op_sel = Selector(text=raw_op)
+                op_sel = fragment(raw_op)
 
-                date = op_sel.xpath('//td[1]').xpath("normalize-space()").extract()[0]
+                date = xpath(select(op_sel, '//td[1]'), "normalize-space()")[0]
 
-                url = op_sel.xpath('//td[2]/a/@href').extract()[0]
+                url = xpath(op_sel, '//td[2]/a/@href')[0]
                 parl_id = u"({})".format(
-                    op_sel.xpath('//td[3]/a').xpath('normalize-space()').extract()[0])
+                    xpath(select(op_sel, '//td[3]/a'), 'normalize-space()')[0])
 
-                title = op_sel.xpath('//td[2]').xpath('normalize-space()').extract()[0]
+                title = xpath(select(op_sel, '//td[2]'), 'normalize-space()')[0]
                 if title:
                     title = _clean(title).replace("*", ", ")
                 else:
@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
 import datetime
 import re
-from xml.dom import minidom
+from io import BytesIO
+from lxml import etree
 from scrapy import Selector
 from django.utils.html import remove_tags
 from django.utils.dateparse import parse_datetime
 
 from parlament.resources.extractors import SingleExtractor
 from parlament.resources.extractors import MultiExtractor
+from parlament.resources.extractors import select
 
 import dateparser
 
@@ -21,11 +23,75 @@ class ST():
     @classmethod
     def strip_tags(cls, txt):
         try:
-            return ''.join(cls.regexStripTags.split(txt))
+            return cls.regexStripTags.sub('', txt)
         except TypeError:
             print("Cannot strip tags from {}".format(txt))
             return ''
 
+
+def _element(el):
+    """
+    The lxml element of a scrapy selector (or the element itself)
+    """
+    return getattr(el, 'root', el)
+
+
+def _html(el):
+    """
+    Serialize an element the same way Selector.extract() does
+    """
+    return etree.tostring(
+        el, method='html', encoding='unicode', with_tail=False)
+
+
+def _attr(el, name):
+    value = el.get(name)
+    return unicode(value) if value is not None else None
+
+
+def _replace_all(html, replacements):
+    """
+    Replace all (extract, replacement) pairs, building the result in one
+    pass over html instead of one copy per replacement.
+    Falls back to replacing them one after the other if extracts overlap,
+    since the order matters then.
+    """
+    if not replacements:
+        return html
+    lookup = {}
+    for extract, repl in replacements:
+        lookup.setdefault(extract, repl)
+
+    matches = []
+    for extract, repl in lookup.items():
+        start = html.find(extract)
+        while start >= 0:
+            matches.append((start, start + len(extract), repl))
+            start = html.find(extract, start + len(extract))
+    matches.sort()
+
+    parts = []
+    pos = 0
+    for start, end, repl in matches:
+        if start < pos:
+            # overlapping (nested) extracts
+            for extract, repl in replacements:
+                html = html.replace(extract, repl)
+            return html
+        parts.append(html[pos:start])
+        parts.append(repl)
+        pos = end
+    parts.append(html[pos:])
+    return u''.join(parts)
+
+
+def _escape(data):
+    """
+    Escape text and attribute values the way minidom's toxml() does
+    """
+    return data.replace(u"&", u"&amp;").replace(u"<", u"&lt;")\
+        .replace(u"\"", u"&quot;").replace(u">", u"&gt;")
+
 regexRSSTimestamp = re.compile('([0-9]{1,2} [A-Za-z]{3} [0-9]{4})')
 regexTimestamp = re.compile('(\d{1,2})\.(\d{2})\.?(\d{2})?')
 regexFindPage = re.compile('Seite_([0-9]*)\.html')
@@ -39,6 +105,14 @@ regexSpeakerPart = re.compile('.*?\s?'  # name, title etc. up until link
     ':\s?',  # colon plus optional space , delimiter to actual text
     re.U | re.S)
 regexAnnotation = re.compile('\[\[(?:link|com)\d+\]\]', re.U | re.S)
+regexMetaCharset = re.compile('<meta[^>]*charset[^>]*>', re.I)
+
+xpathSections = etree.XPath('//div[contains(@class, \'Section\')]')
+xpathParagraphs = etree.XPath('p')
+xpathComments = etree.XPath('.//i')
+xpathLinks = etree.XPath('.//a[@href]')
+xpathClasses = etree.XPath('.//@class')
+xpathNamedAnchors = etree.XPath('.//a[@name]')
 regexDuration = re.compile('.*?'
     '(\d{1,2})\.(\d{2}).{1,3}(\d{1,2})\.(\d{2}).?Uhr', re.U | re.S)
 
@@ -55,6 +129,11 @@ class Paragraph():
         """ Get class attribute """
         XPATH = '@class'
 
+        @classmethod
+        def xt(cls, el):
+            value = _attr(_element(el), 'class')
+            return [value.strip()] if value is not None else []
+
     def __init__(self):
         self.src = ''
         self.plain = ''
@@ -80,7 +159,7 @@ class Paragraph():
 
     @classmethod
     def createFromString(cls, p):
-        return cls.createFromSelector(Selector(text=p).xpath('.//p')[0])
+        return cls.createFromSelector(select(Selector(text=p), './/p')[0])
 
     @classmethod
     def createFromSelector(cls, p):
@@ -88,18 +167,21 @@ class Paragraph():
         Pre-process a paragraph and replace comments and links with
         placeholders. Return resulting plain text, along with the
         replaced comments and links. Comments and links are each a list of
-        tuples: (replace_text:str, replaced_element:Selector) .
+        tuples: (replace_text:str, replaced_element:lxml element) .
+        Accepts selectors as well as lxml elements.
 
         TODO: this method replaces I/comments first (before the links)
             that however means there might be a link inside a comment.
             this would have to be dealt with, e.g. by looking for markup in
             the replaced comments
         """
-        html = p.extract()
+        p = _element(p)
+        html = _html(p)
         res = Paragraph()
         res.cssclasses = cls.CLASSINFO.xt(p)
-        for i, com in enumerate(p.xpath('.//i')):
-            com_extract = com.extract()
+        replacements = []
+        for com in xpathComments(p):
+            com_extract = _html(com)
             com_plain  = ST.strip_tags(com_extract).strip()
             if com_plain.startswith('('):
                 repl = '[[com{}]]'.format(cls.replace_id)
@@ -110,15 +192,19 @@ class Paragraph():
                     # TODO : should remove it from inner-text of comment/<i>
                     # TODO : can happen with other characters as well
                     repl += ':'
-                html = html.replace(com_extract, repl)
+                replacements.append((com_extract, repl))
                 res.comments.append((repl, com))
                 cls.replace_id += 1
-        for i, a in enumerate(p.xpath('.//a[@href]')):
-            a_extract = a.extract()
+        html = _replace_all(html, replacements)
+
+        replacements = []
+        for a in xpathLinks(p):
             repl = '[[link{}]]'.format(cls.replace_id)
-            html = html.replace(a_extract, repl)
+            replacements.append((_html(a), repl))
             res.links.append((repl, a))
             cls.replace_id += 1
+        html = _replace_all(html, replacements)
+
         res.plain = res.src = ST.strip_tags(html).strip()
         return res
 
@@ -175,7 +261,7 @@ class RSS_DEBATES_SIMPLE(MultiExtractor):
     def xt(cls, response):
         return [
             cls.RSS_DEBATES_ITEM.xt(item)
-            for item in response.xpath(cls.XPATH)
+            for item in select(response, cls.XPATH)
         ]
 
 
@@ -251,7 +337,7 @@ class RSS_DEBATES(MultiExtractor):
     def xt(cls, response):
         return [
                 cls.RSS_DEBATES_ITEM.xt(item)
-                for item in response.xpath(cls.XPATH)
+                for item in select(response, cls.XPATH)
                 ]
 
 class HTML_DEBATE_DETAIL(SingleExtractor):
@@ -283,14 +369,78 @@ class DOCSECTIONS(MultiExtractor):
     @classmethod
     def xt(cls, response):
         """
-        Extract sections (statements) from document (protocol)
+        Extract sections (statements) from document (protocol), given as
+        a response or selector
+        """
+        root = _element(getattr(response, 'selector', response))
+        return cls.xt_sections(xpathSections(root))
 
+    @classmethod
+    def xt_stream(cls, source, encoding='utf-8'):
+        """
+        Extract sections from a protocol given as html text (or bytes in
+        the given encoding). The document is parsed incrementally and every
+        section is discarded after it was extracted, so the whole DOM is
+        never held in memory.
+        """
+        return cls.xt_sections(cls.iter_sections(source, encoding))
+
+    @classmethod
+    def iter_sections(cls, source, encoding='utf-8'):
+        """
+        Yield the section divs of a protocol in document order while
+        parsing it with iterparse
+        """
+        if isinstance(source, unicode):
+            # same normalization Selector(text=...) applies
+            source = source.strip().replace(u'\x00', u'').encode('utf-8')
+            encoding = 'utf-8'
+
+        # The incremental parser switches to the charset declared in a
+        # meta tag when it reaches a new chunk, ignoring the encoding we
+        # pass - so remove these declarations from the document head.
+        head_end = source.lower().find('<body')
+        if head_end > 0:
+            source = regexMetaCharset.sub(
+                '', source[:head_end]) + source[head_end:]
+
+        for _, el in etree.iterparse(
+                BytesIO(source), events=('end',), tag='div', html=True,
+                encoding=encoding):
+            if not cls._is_section(el):
+                continue
+            # Nested sections are yielded along with their outermost
+            # section, which comes first in document order
+            parent = el.getparent()
+            while parent is not None and not cls._is_section(parent):
+                parent = parent.getparent()
+            if parent is not None:
+                continue
+
+            yield el
+            for nested in el.iterdescendants('div'):
+                if cls._is_section(nested):
+                    yield nested
+
+            # Free everything parsed so far
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+
+    @classmethod
+    def _is_section(cls, el):
+        return 'Section' in (el.get('class') or '')
+
+    @classmethod
+    def xt_sections(cls, items):
+        """
+        Extract the sections from section elements
         """
         sections = []
         current_maxpage = None
         current_timestamp = None
 
-        for item_index, item in enumerate(response.xpath(cls.XPATH)):
+        for item_index, item in enumerate(items):
             res = SECTION.xt(item)
             pages = res['pages']
             timestamps = res['timestamps']
@@ -347,20 +497,33 @@ class SECTION(SingleExtractor):
     class ALL_TEXT(SingleExtractor):
         @classmethod
         def xt(cls, el):
-            return ST.strip_tags(el.extract())
+            return ST.strip_tags(_html(_element(el)))
 
     class CLASSINFO(MultiExtractor):
         """ Get class attribute """
         XPATH = '@class'
 
+        @classmethod
+        def xt(cls, el):
+            value = _attr(_element(el), 'class')
+            return [value.strip()] if value is not None else []
+
     class HREF(SingleExtractor):
         """ Get href attribute """
         XPATH = '@href'
 
+        @classmethod
+        def xt(cls, el):
+            return (_attr(_element(el), 'href') or u'').strip()
+
     class NAME(SingleExtractor):
         """ Get name attribute """
         XPATH = '@name'
 
+        @classmethod
+        def xt(cls, el):
+            return (_attr(_element(el), 'name') or u'').strip()
+
     class RAWCONTENT(SingleExtractor):
         """
         Get raw content of all paragraphs (mainly for comparison to see if
@@ -368,9 +531,7 @@ class SECTION(SingleExtractor):
         """
         @classmethod
         def xt(cls, response):
-            textparts = []
-            for txt in response.xpath('p'):
-                textparts.append(txt.extract())
+            textparts = [_html(p) for p in xpathParagraphs(_element(response))]
             return '\n\n'.join([' '.join(p.splitlines()) for p in textparts])
 
     class PARAGRAPHS(SingleExtractor):
@@ -401,7 +562,7 @@ class SECTION(SingleExtractor):
         def _is_text(cls, response):
             pclass = None
             try:
-                pclass = response.xpath('.//@class').extract().pop().strip()
+                pclass = unicode(xpathClasses(response).pop()).strip()
             except:
                 pass
             if pclass in cls.PARAGRAPH_CLASSES or pclass is None:
@@ -412,7 +573,8 @@ class SECTION(SingleExtractor):
             """
             Paragraphs by classname that indicates content of a statement.
             """
-            return [t for t in response.xpath('p') if cls._is_text(t)]
+            return [t for t in xpathParagraphs(_element(response))
+                    if cls._is_text(t)]
 
     @classmethod
     def get_p(cls, p):
@@ -533,21 +695,13 @@ class SECTION(SingleExtractor):
         Build the final annotated (html) representation of a paragraph.
         """
         for key, content in comments:
-            textel = minidom.Text()
-            textel.data = cls.ALL_TEXT.xt(content)
-            el = minidom.Element('i')
-            el.setAttribute('class', 'comment')
-            el.appendChild(textel)
-            p = p.replace(key, el.toxml())
+            p = p.replace(key, u'<i class="comment">{}</i>'.format(
+                _escape(cls.ALL_TEXT.xt(content))))
 
         for key, content in links:
-            el = minidom.Element('a')
-            el.setAttribute('class', 'ref')
-            el.setAttribute('href', linkPrefix + cls.HREF.xt(content))
-            textel = minidom.Text()
-            textel.data = cls.ALL_TEXT.xt(content)
-            el.appendChild(textel)
-            p = p.replace(key, el.toxml())
+            p = p.replace(key, u'<a class="ref" href="{}">{}</a>'.format(
+                _escape(linkPrefix + cls.HREF.xt(content)),
+                _escape(cls.ALL_TEXT.xt(content))))
 
         return p
 
@@ -573,6 +727,7 @@ class SECTION(SingleExtractor):
 
     @classmethod
     def xt(cls, item):
+        item = _element(item)
         pages = []
         timestamps = []
 
@@ -608,7 +763,7 @@ class SECTION(SingleExtractor):
         annotated_pars = cls.merge_split_paragraphs(annotated_pars)
 
         # Look for page-number
-        for a in item.xpath('.//a[@name]'):
+        for a in xpathNamedAnchors(item):
             name = cls.NAME.xt(a)
             nms = regexFindPage.findall(name)
             if len(nms):
@@ -30,11 +30,46 @@ STATS_ENABLED = False
 
 AUTOTHROTTLE_ENABLED = False
 
-# Cache requests:
-# DOWNLOADER_MIDDLEWARES = {
-#     'scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware': 900,
-# }
-# HTTPCACHE_POLICY = 'scrapy.extensions.httpcache.DummyPolicy'
-# HTTPCACHE_STORAGE = 'scrapy.extensions.httpcache.FilesystemCacheStorage'
-# HTTPCACHE_ENABLED = True
-# HTTPCACHE_DIR = '/tmp/scrapy-cache'
+# Cache requests: pages are stored on disk and revalidated with conditional
+# requests (ETag/Last-Modified); unchanged detail pages never reach the
+# spiders. Set SCRAPY_HTTPCACHE=0 to disable the cache.
+DOWNLOADER_MIDDLEWARES = {
+    'scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware': None,
+    'parlament.replay.ReplayMiddleware': 850,
+    'parlament.httpcache.ParlamentHttpCacheMiddleware': 900,
+}
+EXTENSIONS = {
+    'parlament.replay.ReplayStats': 500,
+}
+
+# Record and replay crawls: SCRAPY_REPLAY=record stores every response in
+# SCRAPY_REPLAY_DIR, SCRAPY_REPLAY=replay serves all requests from there
+# without touching the network (the http cache is off in both modes)
+REPLAY_MODE = os.getenv('SCRAPY_REPLAY', '')
+REPLAY_DIR = os.getenv('SCRAPY_REPLAY_DIR', 'replay')
+REPLAY_STATS = os.getenv('SCRAPY_REPLAY_STATS', '0') == '1'
+
+HTTPCACHE_ENABLED = (os.getenv('SCRAPY_HTTPCACHE', '1') == '1' and
+                     not REPLAY_MODE)
+HTTPCACHE_DIR = os.getenv('SCRAPY_HTTPCACHE_DIR', 'httpcache')
+HTTPCACHE_POLICY = 'scrapy.extensions.httpcache.RFC2616Policy'
+HTTPCACHE_STORAGE = 'parlament.httpcache.ParlamentCacheStorage'
+HTTPCACHE_GZIP = True
+# Also store pages without validators; unchanged ones are then recognized
+# by comparing the response body
+HTTPCACHE_ALWAYS_STORE = True
+
+# Cached pages older than this are downloaded (and scraped) again in full
+HTTPCACHE_EXPIRATION_SECS = 7 * 24 * 3600
+HTTPCACHE_SPIDER_EXPIRATION_SECS = {
+    'llp': 24 * 3600,
+    'persons': 3 * 24 * 3600,
+    'administrations': 3 * 24 * 3600,
+    'auditors': 3 * 24 * 3600,
+    'statement': 30 * 24 * 3600,
+}
+
+# Eviction, checked whenever a spider closes
+HTTPCACHE_MAX_AGE_SECS = 60 * 24 * 3600
+HTTPCACHE_MAX_SIZE = int(os.getenv(
+    'SCRAPY_HTTPCACHE_MAX_SIZE', 4 * 1024 * 1024 * 1024))
@@ -1,6 +1,9 @@
 from logging.config import dictConfig
 from django.conf import settings
+import time
+import datetime
 import scrapy
+from scrapy import signals
 from scrapy.utils.project import get_project_settings
 
 
@@ -12,6 +15,9 @@ from ansicolor import cyan
 from ansicolor import green
 from ansicolor import blue
 from parlament.settings import BASE_HOST
+from parlament.resources.cache import TimestampMap
+from parlament.resources.cache import LookupCache
+from op_scraper import index_queue
 
 
 class BaseSpider(scrapy.Spider):
@@ -33,6 +39,23 @@ class BaseSpider(scrapy.Spider):
 
     IGNORE_TIMESTAMP = False
 
+    # Fetch all rss feeds synchronously before the crawl starts (the old
+    # behaviour, mainly useful to compare startup times)
+    BLOCKING_FEEDS = False
+
+    # Skip feed entries whose rss date is not newer than the timestamp
+    # of the already scraped object
+    TRUST_FEED_DATES = False
+
+    # Model and identifying fields for the timestamps used in has_changes
+    TIMESTAMP_MODEL = None
+    TIMESTAMP_FIELDS = ('parl_id', 'legislative_period', 'source_link')
+
+    # Record touched objects for incremental index updates (cf.
+    # op_scraper.index_queue); they're written to the queue in batches
+    MARK_DIRTY = True
+    DIRTY_FLUSH_SIZE = 500
+
     SCRAPED_COUNTER = 0
     TOTAL_COUNTER = 0
 
@@ -42,6 +65,16 @@ class BaseSpider(scrapy.Spider):
         if 'ignore_timestamp' in kw:
             self.IGNORE_TIMESTAMP = True
 
+        if 'blocking_feeds' in kw:
+            self.BLOCKING_FEEDS = True
+
+        if 'trust_feed_dates' in kw:
+            self.TRUST_FEED_DATES = True
+
+        self.timestamps = None
+        self.lookups = {}
+        self.dirty = set()
+
         scrapy_settings = get_project_settings()
 
         # shut off annoying debug level core api messages
@@ -49,6 +82,71 @@ class BaseSpider(scrapy.Spider):
         scrapy.core.engine.logger.setLevel(scrapy_settings.get('LOG_LEVEL','WARNING'))
         self.logger.logger.setLevel(scrapy_settings.get('LOG_LEVEL','WARNING'))
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super(BaseSpider, cls).from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(
+            spider.load_timestamps, signal=signals.spider_opened)
+        crawler.signals.connect(
+            spider.flush_dirty, signal=signals.spider_closed)
+        return spider
+
+    def load_timestamps(self, spider=None):
+        """
+        Loads the timestamps of all already scraped objects of the
+        spider's LLPs into memory
+        """
+        if self.TIMESTAMP_MODEL is None or self.IGNORE_TIMESTAMP:
+            return
+        started = time.time()
+        self.timestamps = TimestampMap(
+            self.TIMESTAMP_MODEL, self.TIMESTAMP_FIELDS, self.LLP).load()
+        self.logger.info(u"Loaded {} timestamps in {:.2f}s".format(
+            len(self.timestamps), time.time() - started))
+
+    def lookup(self, model):
+        """
+        Returns the spider's LookupCache for a (small) lookup model, e.g.
+        self.lookup(Keyword).get_or_create(title=keyword)
+        """
+        if model not in self.lookups:
+            self.lookups[model] = LookupCache(model)
+        return self.lookups[model]
+
+    def mark_dirty(self, *objs):
+        """
+        Records that objs were created or updated, so the search index
+        documents depending on them get updated
+        """
+        if not self.MARK_DIRTY:
+            return
+        for obj in objs:
+            self.dirty.update(index_queue.index_targets(obj))
+        if len(self.dirty) >= self.DIRTY_FLUSH_SIZE:
+            self.flush_dirty()
+
+    def flush_dirty(self, spider=None):
+        """
+        Writes the recorded objects to the index queue
+        """
+        if self.dirty:
+            index_queue.mark_dirty(self.dirty)
+            self.logger.info(
+                u"Queued {} objects for reindexing".format(len(self.dirty)))
+            self.dirty = set()
+
+    def has_changes(self, parl_id, legislative_period, source_link, ts):
+        """
+        Returns True if the object wasn't scraped yet or its timestamp
+        differs from the given one
+        """
+        if self.timestamps is None:
+            self.load_timestamps()
+        if self.timestamps is None:
+            return True
+        return self.timestamps.has_changes(
+            (parl_id, legislative_period, source_link), ts)
+
     def print_debug(self):
         """
         Collects and prints a structured debug message
@@ -73,36 +171,130 @@ class BaseSpider(scrapy.Spider):
         )
         self.logger.info(message)
 
-    def get_urls(self):
+    def start_requests(self):
         """
-        Returns a list of URLs to scrape
+        Spiders that set start_urls are crawled as usual; all others discover
+        their detail pages through the rss feeds returned by get_feed_urls.
         """
+        if self.start_urls:
+            return super(BaseSpider, self).start_requests()
+        if self.BLOCKING_FEEDS:
+            return (scrapy.Request(url, dont_filter=True)
+                    for url in self.get_urls())
+        return self.feed_requests()
 
-        def unmangle_url(url):
-            from scrapy import Selector
-            if not '<a' in url:
-                u = url
-            else:
-                u = Selector(text=url).xpath('//a/@href').extract()[0]
-            if not '//' in u:
-                u='{}{}'.format(BASE_HOST,u)
-            return u
-
-        urls = []
-        if self.LLP:
+    def get_feed_urls(self):
+        """
+        Returns a list of rss feed URLs, one per LLP
+        """
+        feed_urls = []
+        if self.LLP and self.BASE_URL:
             for i in self.LLP:
-                roman_numeral = roman.toRoman(i)
                 options = self.URLOPTIONS.copy()
-                options['GP'] = roman_numeral
-                url_options = urlencode(options)
-                url_llp = "{}?{}".format(self.BASE_URL, url_options)
-                rss = feedparser.parse(url_llp)
+                options['GP'] = roman.toRoman(i)
+                feed_urls.append(
+                    "{}?{}".format(self.BASE_URL, urlencode(options)))
+        return feed_urls
+
+    def unmangle_url(self, url):
+        """
+        Rss links sometimes come as html anchors or without host
+        """
+        if not '<a' in url:
+            u = url
+        else:
+            u = scrapy.Selector(text=url).xpath('//a/@href').extract()[0]
+        if not '//' in u:
+            u = '{}{}'.format(BASE_HOST, u)
+        return u
+
+    def feed_requests(self):
+        """
+        Yields one request per rss feed; all feeds are fetched concurrently
+        by the scrapy downloader and each feed schedules its detail pages
+        as soon as it arrives.
+        """
+        feed_urls = self.get_feed_urls()
+        self.feeds_pending = len(feed_urls)
+        self.feeds_started = time.time()
+        self.first_detail_request = None
+        for url in feed_urls:
+            yield scrapy.Request(
+                url, callback=self.parse_feed, dont_filter=True)
+
+    def parse_feed(self, response):
+        """
+        Parses an rss feed and yields requests for all its entries
+        """
+        rss = feedparser.parse(response.body)
+        entries = rss['entries']
+        self.TOTAL_COUNTER += len(entries)
+        self.feeds_pending -= 1
+        self.logger.info(u"Feed {}: {} entries".format(
+            response.url, len(entries)))
+
+        if entries and self.first_detail_request is None:
+            self.first_detail_request = time.time() - self.feeds_started
+            self.logger.info(
+                u"First detail request after {:.2f}s".format(
+                    self.first_detail_request))
+        if not self.feeds_pending:
+            self.logger.info(
+                u"Feed discovery finished after {:.2f}s, {} entries".format(
+                    time.time() - self.feeds_started, self.TOTAL_COUNTER))
+
+        for entry in entries:
+            if self.is_current(entry):
+                continue
+            yield scrapy.Request(
+                self.unmangle_url(entry['link']), callback=self.parse,
+                meta={'skip_unchanged': True})
+
+    def is_current(self, entry):
+        """
+        Returns True if the object behind an rss entry was already scraped
+        on or after the entry's date, so its detail page can be skipped
+        """
+        if not self.TRUST_FEED_DATES or self.IGNORE_TIMESTAMP:
+            return False
+        if self.timestamps is None:
+            self.load_timestamps()
+        date = entry.get('updated_parsed') or entry.get('published_parsed')
+        if self.timestamps is None or date is None:
+            return False
+        return self.timestamps.is_current(
+            self.unmangle_url(entry['link']),
+            datetime.datetime(*date[:6]))
+
+    def is_stored(self, request):
+        """
+        Returns True if the object behind a detail page request was
+        already scraped, so an unchanged response may be dropped by the
+        http cache (cf. parlament.httpcache)
+        """
+        if self.timestamps is None:
+            self.load_timestamps()
+        if self.timestamps is None:
+            return False
+        return self.timestamps.by_source_link.get(request.url) is not None
+
+    def get_urls(self):
+        """
+        Returns a list of URLs to scrape, fetching all rss feeds one
+        after the other before returning
+        """
+        started = time.time()
+        urls = []
+        for url_llp in self.get_feed_urls():
+            rss = feedparser.parse(url_llp)
 
-                self.logger.info("GP {}: {} laws".format(
-                    roman_numeral, len(rss['entries']))
-                )
-                urls = urls + [unmangle_url(entry['link'])
-                               for entry in rss['entries']]
+            self.logger.info(u"Feed {}: {} entries".format(
+                url_llp, len(rss['entries'])))
+            urls = urls + [self.unmangle_url(entry['link'])
+                           for entry in rss['entries']]
 
         self.TOTAL_COUNTER = len(urls)
+        self.logger.info(
+            u"Blocking feed discovery finished after {:.2f}s, {} entries".format(
+                time.time() - started, self.TOTAL_COUNTER))
         return urls
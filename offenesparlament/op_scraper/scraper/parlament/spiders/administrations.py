@@ -100,7 +100,7 @@ class AdministrationsSpider(PersonsSpider):
             mandate = p['mandate']
             administration_item = self.get_administration_item(mandate)
 
-            function_item, f_created = Function.objects.get_or_create(
+            function_item, f_created = self.lookup(Function).get_or_create(
                 short=mandate['short'],
                 title=mandate['title'])
 
@@ -148,6 +148,7 @@ class AdministrationsSpider(PersonsSpider):
                 ipdb.set_trace()
 
             person_item.save()
+            self.mark_dirty(person_item)
 
             # First time we encounter a person, we scan her detail page too
             if not parl_id in self.persons_scraped:
@@ -77,7 +77,7 @@ class AuditorsSpider(AdministrationsSpider):
 
             mandate = p['mandate']
 
-            function_item, f_created = Function.objects.get_or_create(
+            function_item, f_created = self.lookup(Function).get_or_create(
                 short=mandate['short'],
                 title=mandate['title'])
 
@@ -99,6 +99,7 @@ class AuditorsSpider(AdministrationsSpider):
                 ipdb.set_trace()
 
             person_item.save()
+            self.mark_dirty(person_item)
 
             # First time we encounter a person, we scan her detail page too
             if not parl_id in self.persons_scraped:
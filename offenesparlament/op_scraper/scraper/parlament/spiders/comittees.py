@@ -7,7 +7,6 @@ from ansicolor import green
 from ansicolor import blue
 from ansicolor import magenta
 
-import feedparser
 import roman
 from urllib import urlencode
 
@@ -51,6 +50,10 @@ class ComitteesSpider(BaseSpider):
     name = "comittees"
     title = "Comittees Spider"
 
+    TIMESTAMP_MODEL = Comittee
+    TIMESTAMP_FIELDS = (
+        'parl_id', 'legislative_period', 'nrbr', 'source_link')
+
     def __init__(self, **kw):
         super(ComitteesSpider, self).__init__(**kw)
 
@@ -60,17 +63,14 @@ class ComitteesSpider(BaseSpider):
             except:
                 pass
 
-        # add at least a default URL for testing
-        self.start_urls = self.get_urls()
-
         self.cookies_seen = set()
         self.idlist = {}
 
-    def get_urls(self):
+    def get_feed_urls(self):
         """
-        Returns a list of URLs to scrape
+        Returns a list of rss feed URLs
         """
-        urls = []
+        feed_urls = []
         # NR comittees are LLP based
         if self.LLP:
             for i in self.LLP:
@@ -79,27 +79,16 @@ class ComitteesSpider(BaseSpider):
                 options['GP'] = roman_numeral
                 options['NRBR'] = 'NR'
                 url_options = urlencode(options)
-                url_llp = "{}?{}".format(self.BASE_URL, url_options)
-                rss = feedparser.parse(url_llp)
-
-
-                self.logger.debug("GP {}: NR: {} Comittees".format(
-                    roman_numeral, len(rss['entries'])))
-                urls = urls + [entry['link'] for entry in rss['entries']]
+                feed_urls.append("{}?{}".format(self.BASE_URL, url_options))
 
         # AKT = aktiv, AUF = aufgeloest
         #for aktauf in ['AKT', 'AUF']:
         #    options['NRBR'] = 'BR'
         #    options['R_AKTAUF'] = aktauf
         #    url_options = urlencode(options)
-        #    url_br = "{}?{}".format(self.BASE_URL, url_options)
-        #    rss = feedparser.parse(url_br)
-
-        #    print "BR {}: {} Comittees".format(
-        #        aktauf, len(rss['entries']))
-        #    urls = urls + [entry['link'] for entry in rss['entries']]
+        #    feed_urls.append("{}?{}".format(self.BASE_URL, url_options))
 
-        return urls
+        return feed_urls
 
     def parse(self, response):
         # Parse
@@ -244,24 +233,15 @@ class ComitteesSpider(BaseSpider):
 
         comittee_item.laws.add(*comittee_laws)
         comittee_item.save()
+        self.mark_dirty(comittee_item)
 
     def has_changes(self, parl_id, legislative_period, nrbr, source_link, ts):
-        if not Comittee.objects.filter(
-            parl_id=parl_id,
-            legislative_period=legislative_period,
-            source_link=source_link,
-            nrbr=nrbr
-        ).exists():
-            return True
-
-        ts = ts.replace(tzinfo=pytz.utc)
-        if Comittee.objects.get(
-                parl_id=parl_id,
-                legislative_period=legislative_period,
-                source_link=source_link,
-                nrbr=nrbr).ts != ts:
+        if self.timestamps is None:
+            self.load_timestamps()
+        if self.timestamps is None:
             return True
-        return False
+        return self.timestamps.has_changes(
+            (parl_id, legislative_period, nrbr, source_link), ts)
 
     def parse_law(self, law_dict):
         try:
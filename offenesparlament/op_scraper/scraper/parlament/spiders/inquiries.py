@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 import sys
 import scrapy
-import feedparser
 import roman
 from urllib import urlencode
 from scrapy import log
@@ -57,6 +56,8 @@ class InquiriesSpider(BaseSpider):
     }
 
     name = "inquiries"
+
+    TIMESTAMP_MODEL = Inquiry
     inquiries_scraped = []
 
     def __init__(self, **kw):
@@ -71,19 +72,20 @@ class InquiriesSpider(BaseSpider):
         self.cookies_seen = set()
         self.idlist = {}
         self.url_override = kw.get('url', None)
+        if self.url_override:
+            self.start_urls = [self.url_override]
 
-    def start_requests(self):
+    def get_feed_urls(self):
         """
-        Returns a list of URLs to scrape
+        Returns a list of rss feed URLs
         """
         # This predefined list of URLs is chosen to include all types of
         # inquiries possible in the Austrian parliament in order to provide a
         # suitable testing surface for new functions.
         # urls = ["https://www.parlament.gv.at/PAKT/VHG/XXV/JPR/JPR_00019/index.shtml", "https://www.parlament.gv.at/PAKT/VHG/XXV/JPR/JPR_00016/index.shtml", "https://www.parlament.gv.at/PAKT/VHG/XXV/J/J_06954/index.shtml", "https://www.parlament.gv.at/PAKT/VHG/XXV/M/M_00178/index.shtml", "https://www.parlament.gv.at/PAKT/VHG/XXV/JEU/JEU_00003/index.shtml", "https://www.parlament.gv.at/PAKT/VHG/XXV/J/J_06758/index.shtml", "https://www.parlament.gv.at/PAKT/VHG/BR/J-BR/J-BR_03089/index.shtml",
         #         "https://www.parlament.gv.at/PAKT/VHG/BR/J-BR/J-BR_03091/index.shtml", "http://www.parlament.gv.at/PAKT/VHG/BR/J-BR/J-BR_01155/index.shtml", "http://www.parlament.gv.at/PAKT/VHG/XX/J/J_06110/index.shtml", "http://www.parlament.gv.at/PAKT/VHG/XX/J/J_06651/index.shtml", "http://www.parlament.gv.at/PAKT/VHG/XX/J/J_04024/index.shtml", "http://www.parlament.gv.at/PAKT/VHG/XX/J/J_04025/index.shtml", "https://www.parlament.gv.at/PAKT/VHG/XX/M/M_00178/index.shtml"]
-        urls = [] if not self.url_override else [self.url_override]
-
-        if self.LLP and not self.url_override:
+        feed_urls = []
+        if self.LLP:
             for i in self.LLP:
                 for nrbr in ['NR', 'BR']:
                     roman_numeral = roman.toRoman(i)
@@ -91,16 +93,9 @@ class InquiriesSpider(BaseSpider):
                     options['GP'] = roman_numeral
                     options['NRBR'] = nrbr
                     url_options = urlencode(options)
-                    url_llp = "{}?{}".format(self.BASE_URL, url_options)
-                    rss = feedparser.parse(url_llp)
-
-                    self.logger.info("GP {}: {} inquiries from {}".format(
-                        roman_numeral, len(rss['entries']), nrbr)
-                    )
-                    urls = urls + [entry['link'] for entry in rss['entries']]
-        self.TOTAL_COUNTER = len(urls)
-        for url in urls:
-            yield self.make_requests_from_url(url)
+                    feed_urls.append(
+                        "{}?{}".format(self.BASE_URL, url_options))
+        return feed_urls
 
     def parse(self, response):
         self.SCRAPED_COUNTER += 1
@@ -132,7 +127,7 @@ class InquiriesSpider(BaseSpider):
 
         # Get or create Category object for the inquiry and log to screen if new
         # category is created.
-        cat, created = Category.objects.get_or_create(title=category)
+        cat, created = self.lookup(Category).get_or_create(title=category)
         if created:
             log.debug(u"Created category {}".format(
                 green(u'[{}]'.format(category))))
@@ -198,6 +193,7 @@ class InquiriesSpider(BaseSpider):
 
         # Save Inquiry item and log to terminal if created or updated.
         inquiry_item.save()
+        self.mark_dirty(inquiry_item)
 
         if inquiry_created:
             logtext = u"[{} of {}] Created Inquiry {} with ID {}, LLP {} @ {}"
@@ -220,29 +216,13 @@ class InquiriesSpider(BaseSpider):
 
         return callback_requests
 
-    def has_changes(self, parl_id, legislative_period, source_link, ts):
-        if not Inquiry.objects.filter(
-            parl_id=parl_id,
-            legislative_period=legislative_period,
-            source_link=source_link
-        ).exists():
-            return True
-
-        ts = ts.replace(tzinfo=pytz.utc)
-        if Inquiry.objects.get(
-                parl_id=parl_id,
-                legislative_period=legislative_period,
-                source_link=source_link).ts != ts:
-            return True
-        return False
-
     def parse_keywords(self, response):
         keywords = INQUIRY.KEYWORDS.xt(response)
 
         # Create all keywords we don't yet have in the DB
         keyword_items = []
         for keyword in keywords:
-            kw, created = Keyword.objects.get_or_create(title=keyword)
+            kw, created = self.lookup(Keyword).get_or_create(title=keyword)
             if created:
                 log.msg(u"Created keyword {}".format(
                     green(u'[{}]'.format(keyword))),level=log.DEBUG)
@@ -291,7 +271,7 @@ class InquiriesSpider(BaseSpider):
 
         # Get or created a default-phase for inquiries, because there are no phases in
         # simple inquiries.
-        phase_item, created = Phase.objects.get_or_create(
+        phase_item, created = self.lookup(Phase).get_or_create(
             title='default_inqu')
         if created:
             log.msg(u"Created Phase {}".format(
@@ -330,7 +310,7 @@ class InquiriesSpider(BaseSpider):
 
         for phase in phases:
             # Create phase if we don't have it yet
-            phase_item, created = Phase.objects.get_or_create(
+            phase_item, created = self.lookup(Phase).get_or_create(
                 title=phase['title'])
             if created:
                 log.msg(u"Created Phase {}".format(
@@ -369,6 +349,7 @@ class InquiriesSpider(BaseSpider):
                                 person=person_item,
                                 step=step_item,
                                 defaults=st_data)
+                            self.mark_dirty(st_item)
                             if st_created:
                                 log.msg(u"Created Statement by {} on {}".format(
                                     green(
@@ -409,7 +390,7 @@ class InquiriesSpider(BaseSpider):
 
         # Get or create Category object for the inquiry and log to screen if new
         # category is created.
-        cat, created = Category.objects.get_or_create(title=category)
+        cat, created = self.lookup(Category).get_or_create(title=category)
         if created:
             log.msg(u"Created category {}".format(
                 green(u'[{}]'.format(category))),level=log.DEBUG)
@@ -463,5 +444,6 @@ class InquiriesSpider(BaseSpider):
         inquiry_item.response = inquiryresponse_item
         inquiry_item.status = 'response_received'
         inquiry_item.save()
+        self.mark_dirty(inquiry_item, inquiryresponse_item)
 
         return
@@ -52,6 +52,8 @@ class LawsInitiativesSpider(BaseSpider):
     name = "laws_initiatives"
     title = "Laws & Initiatives Spider"
 
+    TIMESTAMP_MODEL = Law
+
     def __init__(self, **kw):
         super(LawsInitiativesSpider, self).__init__(**kw)
 
@@ -61,9 +63,6 @@ class LawsInitiativesSpider(BaseSpider):
             except:
                 pass
 
-        # add at least a default URL for testing
-        self.start_urls = self.get_urls()
-
         self.cookies_seen = set()
         #self.print_debug()
 
@@ -92,7 +91,7 @@ class LawsInitiativesSpider(BaseSpider):
         description = LAW.DESCRIPTION.xt(response)
 
         # Create category if we don't have it yet
-        cat, created = Category.objects.get_or_create(title=category)
+        cat, created = self.lookup(Category).get_or_create(title=category)
         if created:
             self.logger.debug(u"Created category {}".format(
                 green(u'[{}]'.format(category))))
@@ -116,6 +115,7 @@ class LawsInitiativesSpider(BaseSpider):
         law_item.documents = self.parse_docs(response)
 
         law_item.save()
+        self.mark_dirty(law_item)
 
         # Log our progress
         if law_created:
@@ -142,22 +142,6 @@ class LawsInitiativesSpider(BaseSpider):
         if response.xpath('//h2[@id="tab-VorparlamentarischesVerfahren"]'):
             self.parse_pre_parliament_steps(response)
 
-    def has_changes(self, parl_id, legislative_period, source_link, ts):
-        if not Law.objects.filter(
-            parl_id=parl_id,
-            legislative_period=legislative_period,
-            source_link=source_link
-        ).exists():
-            return True
-
-        ts = ts.replace(tzinfo=pytz.utc)
-        if Law.objects.get(
-                parl_id=parl_id,
-                legislative_period=legislative_period,
-                source_link=source_link).ts != ts:
-            return True
-        return False
-
     def parse_keywords(self, response):
 
         keywords = LAW.KEYWORDS.xt(response)
@@ -165,7 +149,7 @@ class LawsInitiativesSpider(BaseSpider):
         # Create all keywords we don't yet have in the DB
         keyword_items = []
         for keyword in keywords:
-            kw, created = Keyword.objects.get_or_create(title=keyword)
+            kw, created = self.lookup(Keyword).get_or_create(title=keyword)
             if created:
                 self.logger.debug(u"Created keyword {}".format(
                     green(u'[{}]'.format(keyword))))
@@ -214,7 +198,7 @@ class LawsInitiativesSpider(BaseSpider):
 
         for phase in phases:
             # Create phase if we don't have it yet
-            phase_item, created = Phase.objects.get_or_create(
+            phase_item, created = self.lookup(Phase).get_or_create(
                 title=phase['title'])
             if created:
                 self.logger.debug(u"Created Phase {}".format(
@@ -252,6 +236,7 @@ class LawsInitiativesSpider(BaseSpider):
                                 person=person_item,
                                 step=step_item,
                                 defaults=st_data)
+                            self.mark_dirty(st_item)
                             # if st_created:
                             #     log.msg(u"Created Statement by {} on {}".format(
                             #         green(
@@ -183,7 +183,7 @@ class PersonsSpider(BaseSpider):
         # function string
         function = opts['NRBR']
         function_str = self.RSS_TO_FUNCTION[function]
-        function_item, f_created = Function.objects.get_or_create(
+        function_item, f_created = self.lookup(Function).get_or_create(
             title=function_str)
 
         logger.info(
@@ -218,6 +218,7 @@ class PersonsSpider(BaseSpider):
                 logger.debug(u"Updated Person {}".format(
                     green(u"[{}]".format(p['reversed_name']))
                 ))
+            self.mark_dirty(person_item)
             for mandate in p['mandates']:
                 party_item = self.get_party_item(mandate)
                 state_item = self.get_state_item(p['electoral_state'])
@@ -254,7 +255,8 @@ class PersonsSpider(BaseSpider):
             if not parl_id in self.persons_scraped:
                 # Create Detail Page request
                 req = scrapy.Request(p['source_link'],
-                                     callback=self.parse_person_detail)
+                                     callback=self.parse_person_detail,
+                                     meta={'skip_unchanged': True})
                 req.meta['person'] = {
                     'reversed_name': p['reversed_name'],
                     'source_link': p['source_link'],
@@ -266,7 +268,7 @@ class PersonsSpider(BaseSpider):
 
     def get_party_item(self, mandate):
         # Do we have this party already?
-        party_item, created = Party.objects.update_or_create(
+        party_item, created = self.lookup(Party).get_or_create(
             short=mandate['short'])
         titles = party_item.titles
         if not titles:
@@ -284,7 +286,7 @@ class PersonsSpider(BaseSpider):
 
     def get_state_item(self, state):
         # Do we have this state already?
-        state_item, created = State.objects.update_or_create(
+        state_item, created = self.lookup(State).get_or_create(
             name=state['short'],
             title=state['long'])
 
@@ -297,6 +299,13 @@ class PersonsSpider(BaseSpider):
 
         return state_item
 
+    def is_stored(self, request):
+        """
+        Person detail pages set the person's timestamp once scraped
+        """
+        return Person.objects.filter(
+            source_link=request.url, ts__isnull=False).exists()
+
     def has_changes(self, parl_id, source_link, ts):
         if ts is None:
             return True
@@ -366,13 +375,11 @@ class PersonsSpider(BaseSpider):
             for mandate in mandates_detail:
                 party = None
                 if mandate['party']:
-                    if Party.objects.filter(short=mandate['party']):
-                        party = Party.objects.filter(
-                            short=mandate['party']).first()
-                    elif Party.objects.filter(titles__contains=[mandate['party']]):
-                        party = Party.objects.filter(
-                            titles__contains=[mandate['party']]).first()
-                    else:
+                    party = self.lookup(Party).first(short=mandate['party'])
+                    if party is None:
+                        party = self.lookup(Party).find(
+                            lambda p: mandate['party'] in (p.titles or []))
+                    if party is None:
                         logger.warning(u"{}: Can't find party {} for mandate".format(
                             person_data['full_name'], yellow(u"[{}]".format(mandate['party']))
                         ))
@@ -383,7 +390,7 @@ class PersonsSpider(BaseSpider):
                     roman_numeral=mandate['llp_roman']) if mandate['llp_roman'] else None
                 del mandate['llp']
                 del mandate['llp_roman']
-                mandate['function'],_ = Function.objects.update_or_create(title=mandate['function'].strip())
+                mandate['function'],_ = self.lookup(Function).get_or_create(title=mandate['function'].strip())
 
                 def uocparse(mandat, defaults=None):
                     r = {'defaults': {} if not defaults else defaults}
@@ -434,6 +441,8 @@ class PersonsSpider(BaseSpider):
             person_item.save()
             # Instatiate slug
             person_item.slug
+            # mandates and comittee memberships are part of the person
+            self.mark_dirty(person_item)
 
         except Exception as error:
             logger.exception(
@@ -474,7 +483,7 @@ class PersonsSpider(BaseSpider):
                             'short': m['function']
                         }
 
-                        function_item, created_function = Function.objects.get_or_create(
+                        function_item, created_function = self.lookup(Function).get_or_create(
                             **function_data)
                         if created_function:
                             logger.debug(u"Created function {}".format(
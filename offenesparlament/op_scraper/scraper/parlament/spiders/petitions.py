@@ -7,7 +7,6 @@ from ansicolor import green
 from ansicolor import blue
 from ansicolor import magenta
 
-import feedparser
 import roman
 from urllib import urlencode
 
@@ -58,6 +57,8 @@ class PetitionsSpider(BaseSpider):
     name = "petitions"
     title = "Petitions Spider"
 
+    TIMESTAMP_MODEL = Petition
+
     def __init__(self, **kw):
         super(PetitionsSpider, self).__init__(**kw)
 
@@ -67,18 +68,15 @@ class PetitionsSpider(BaseSpider):
             except:
                 pass
 
-        # add at least a default URL for testing
-        self.start_urls = self.get_urls()
-
         self.cookies_seen = set()
         self.idlist = {}
         self.print_debug()
 
-    def get_urls(self):
+    def get_feed_urls(self):
         """
-        Returns a list of URLs to scrape
+        Returns a list of rss feed URLs
         """
-        urls = []
+        feed_urls = []
         if self.LLP:
             for i in self.LLP:
                 for nrbr in ['NR', 'BR']:
@@ -89,16 +87,9 @@ class PetitionsSpider(BaseSpider):
                         options['NRBR'] = nrbr
                         options['BBET'] = bbet
                         url_options = urlencode(options)
-                        url_llp = "{}?{}".format(self.BASE_URL, url_options)
-                        rss = feedparser.parse(url_llp)
-
-                        print "GP {}: {}: {} {}".format(
-                            roman_numeral, nrbr, len(rss['entries']), bbet)
-                        urls = urls + [entry['link']
-                                       for entry in rss['entries']]
-
-        self.TOTAL_COUNTER = len(urls)
-        return urls
+                        feed_urls.append(
+                            "{}?{}".format(self.BASE_URL, url_options))
+        return feed_urls
 
     def parse(self, response):
         self.SCRAPED_COUNTER += 1
@@ -181,6 +172,7 @@ class PetitionsSpider(BaseSpider):
         petition_item.documents = self.parse_docs(response)
 
         petition_item.save()
+        self.mark_dirty(petition_item)
 
         # Parse creators
         petition_creators = self.parse_creators(response)
@@ -237,22 +229,6 @@ class PetitionsSpider(BaseSpider):
 
         return callback_requests
 
-    def has_changes(self, parl_id, legislative_period, source_link, ts):
-        if not Petition.objects.filter(
-            parl_id=parl_id,
-            legislative_period=legislative_period,
-            source_link=source_link
-        ).exists():
-            return True
-
-        ts = ts.replace(tzinfo=pytz.utc)
-        if Petition.objects.get(
-                parl_id=parl_id,
-                legislative_period=legislative_period,
-                source_link=source_link).ts != ts:
-            return True
-        return False
-
     def parse_keywords(self, response):
         """
         Parse this pre-law's keywords
@@ -263,7 +239,7 @@ class PetitionsSpider(BaseSpider):
         # Create all keywords we don't yet have in the DB
         keyword_items = []
         for keyword in keywords:
-            kw, created = Keyword.objects.get_or_create(title=keyword)
+            kw, created = self.lookup(Keyword).get_or_create(title=keyword)
             if created:
                 self.logger.debug(u"Created keyword {}".format(
                     green(u'[{}]'.format(keyword))))
@@ -294,7 +270,7 @@ class PetitionsSpider(BaseSpider):
         category = LAW.CATEGORY.xt(response)
 
         # Create category if we don't have it yet
-        cat, created = Category.objects.get_or_create(title=category)
+        cat, created = self.lookup(Category).get_or_create(title=category)
         if created:
             self.logger.debug(u"Created category {}".format(
                 green(u'[{}]'.format(category))))
@@ -318,7 +294,7 @@ class PetitionsSpider(BaseSpider):
         entity['title_detail'] = entity['title_detail']
         entity['email'] = entity['email'] or op_data['email']
 
-        entity_item, created = Entity.objects.get_or_create(
+        entity_item, created = self.lookup(Entity).get_or_create(
             title=entity['title'],
             title_detail=entity['title_detail']
         )
@@ -342,6 +318,7 @@ class PetitionsSpider(BaseSpider):
         # Foreign Keys
         opinion_item.documents = docs
         opinion_item.keywords = keywords
+        self.mark_dirty(opinion_item)
 
         response.meta['opinion'] = opinion_item
         step_num = self.parse_op_steps(response)
@@ -372,7 +349,7 @@ class PetitionsSpider(BaseSpider):
         num_created, num_updated, num_skipped = (0, 0, 0)
         for phase in phases:
             # Create phase if we don't have it yet
-            phase_item, created = Phase.objects.get_or_create(
+            phase_item, created = self.lookup(Phase).get_or_create(
                 title=phase['title'])
             if created:
                 self.logger.debug(u"Created Phase {}".format(
@@ -406,6 +383,7 @@ class PetitionsSpider(BaseSpider):
                                 person=person_item,
                                 step=step_item,
                                 defaults=st_data)
+                            self.mark_dirty(st_item)
                             if st_created:
                                 num_created += 1
                                 # log.msg(u"Created Statement by {} on {}".format(
@@ -448,7 +426,7 @@ class PetitionsSpider(BaseSpider):
         opinion = response.meta['opinion']
 
         # Create phase if we don't have it yet
-        phase_item, created = Phase.objects.get_or_create(
+        phase_item, created = self.lookup(Phase).get_or_create(
             title='default_op')
         if created:
             self.logger.debug(u"Created Phase {}".format(
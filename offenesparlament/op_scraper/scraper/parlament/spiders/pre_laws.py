@@ -61,9 +61,6 @@ class PreLawsSpider(LawsInitiativesSpider):
             except:
                 pass
 
-        # add at least a default URL for testing
-        self.start_urls = self.get_urls()
-
         self.cookies_seen = set()
         self.idlist = {}
 
@@ -127,6 +124,7 @@ class PreLawsSpider(LawsInitiativesSpider):
         law_item.documents = self.parse_docs(response)
 
         law_item.save()
+        self.mark_dirty(law_item)
 
         # Parse opinions
         opinions = PRELAW.OPINIONS.xt(response)
@@ -167,7 +165,7 @@ class PreLawsSpider(LawsInitiativesSpider):
         # Create all keywords we don't yet have in the DB
         keyword_items = []
         for keyword in keywords:
-            kw, created = Keyword.objects.get_or_create(title=keyword)
+            kw, created = self.lookup(Keyword).get_or_create(title=keyword)
             if created:
                 logger.debug(u"Created keyword {}".format(
                     green(u'[{}]'.format(keyword))))
@@ -198,7 +196,7 @@ class PreLawsSpider(LawsInitiativesSpider):
         category = LAW.CATEGORY.xt(response)
 
         # Create category if we don't have it yet
-        cat, created = Category.objects.get_or_create(title=category)
+        cat, created = self.lookup(Category).get_or_create(title=category)
         if created:
             logger.debug(u"Created category {}".format(
                 green(u'[{}]'.format(category))))
@@ -222,7 +220,7 @@ class PreLawsSpider(LawsInitiativesSpider):
         entity['title_detail'] = entity['title_detail']
         entity['email'] = entity['email'] or op_data['email']
 
-        entity_item, created = Entity.objects.get_or_create(
+        entity_item, created = self.lookup(Entity).get_or_create(
             title=entity['title'],
             title_detail=entity['title_detail']
         )
@@ -247,6 +245,7 @@ class PreLawsSpider(LawsInitiativesSpider):
         # Foreign Keys
         opinion_item.documents = docs
         opinion_item.keywords = keywords
+        self.mark_dirty(opinion_item)
 
         response.meta['opinion'] = opinion_item
         step_num = self.parse_op_steps(response)
@@ -268,7 +267,7 @@ class PreLawsSpider(LawsInitiativesSpider):
         Parse the Pre-Law's steps
         """
         # Create phase if we don't have it yet
-        phase_item, created = Phase.objects.get_or_create(
+        phase_item, created = self.lookup(Phase).get_or_create(
             title='')
         if created:
             logger.debug(u"Created Phase {}".format(
@@ -300,7 +299,7 @@ class PreLawsSpider(LawsInitiativesSpider):
         opinion = response.meta['opinion']
 
         # Create phase if we don't have it yet
-        phase_item, created = Phase.objects.get_or_create(
+        phase_item, created = self.lookup(Phase).get_or_create(
             title='default_op')
         if created:
             logger.debug(u"Created Phase {}".format(
@@ -15,10 +15,13 @@ from parlament.resources.extractors.statement import (
     DOCSECTIONS
 )
 
-from op_scraper.models import DebateStatement, Debate
-from op_scraper.models import Person, LegislativePeriod
+from parlament.items import DebateStatementsItem
+
+from op_scraper.models import Debate
+from op_scraper.models import LegislativePeriod
 
 import datetime
+import multiprocessing
 
 import json
 
@@ -85,6 +88,12 @@ class StatementSpider(BaseSpider):
         ./manage.py scrape crawl statement -a llp=24 -a type=NR\
         -a snr=171
 
+    Protocols are parsed in the spider by default, which blocks the
+    downloads while a protocol is parsed. Use `parse_workers` to parse
+    them in a pool of processes instead (`auto`: one per cpu)::
+
+        ./manage.py scrape crawl statement -a llp=all -a parse_workers=auto
+
     """
 
 
@@ -94,6 +103,22 @@ class StatementSpider(BaseSpider):
 
     name = "statement"
 
+    # Number of processes parsing the protocols in the
+    # DebateStatementPipeline, 0 to parse them in the spider
+    PARSE_WORKERS = 0
+    # Seconds to wait for a protocol's sections from the parsers (including
+    # the time waiting for a free one) before parsing it in the spider
+    PARSE_TIMEOUT = 600
+    # Bytes of downloaded protocols per parser that may wait for the pool;
+    # scrapy stops downloading beyond that (cf. DebateStatementPipeline)
+    PARSE_ACTIVE_SIZE = 5000000
+
+    custom_settings = {
+        'ITEM_PIPELINES': {
+            'parlament.pipelines.DebateStatementPipeline': 300,
+        },
+    }
+
     def __init__(self, **kw):
         super(StatementSpider, self).__init__(**kw)
 
@@ -110,6 +135,12 @@ class StatementSpider(BaseSpider):
         # Sitzungsnummer (further filtering down to just one 'sitzung')
         self.SNR = kw['snr'] if 'snr' in kw else None
 
+        if 'parse_workers' in kw:
+            if kw['parse_workers'] == 'auto':
+                self.PARSE_WORKERS = multiprocessing.cpu_count()
+            else:
+                self.PARSE_WORKERS = max(0, int(kw['parse_workers']))
+
         # The start url is actually not parsed at all, but we need some
         # url to get the scraping started.
         self.start_urls = [self.BASE_URL]
@@ -198,27 +229,46 @@ class StatementSpider(BaseSpider):
         yield scrapy.Request(
             debate['protocol_url'],
             callback=self.parse_debate,
-            meta={'debate': debate_item})
+            meta={'debate': debate_item, 'skip_unchanged': True})
+
+    def is_stored(self, request):
+        """
+        A protocol counts as scraped once its debate has statements
+        """
+        debate = request.meta.get('debate')
+        return debate is not None and debate.debate_statements.exists()
 
     def parse_debate(self, response):
         """
         Debate-transcript ("Stenografisches Protokoll") parser.
 
-        Parses the actual debate content.
+        Parses the actual debate content; the sections are stored by the
+        DebateStatementPipeline. With parse_workers, the protocol is passed
+        on to the pipeline's process pool unparsed.
         """
-        i = 0
-        for i, sect in enumerate(DOCSECTIONS.xt(response)):
-            # Lookup + add references to the section data
-            sect['debate'] = response.meta['debate']
-            if 'speaker_id' in sect and sect['speaker_id'] is not None:
-                try:
-                    sect['person'] = Person.objects.get(
-                        parl_id=sect['speaker_id'])
-                except Person.DoesNotExist:
-                    self.logger.warning(
-                        red(u"Person '{}' not found".format(sect['speaker_id'])))
-            else:
-                sect['person'] = None
+        debate = response.meta['debate']
+        if self.PARSE_WORKERS:
+            yield DebateStatementsItem(
+                debate=debate,
+                protocol=response.text,
+                source_link=response.url)
+            return
+
+        yield DebateStatementsItem(
+            debate=debate,
+            sections=self.prepare_sections(
+                debate, DOCSECTIONS.xt_stream(response.text)),
+            source_link=response.url)
+
+    def prepare_sections(self, debate, sections):
+        """
+        Add the debate reference, index and full timestamps to the
+        section data
+        """
+        sections = list(sections)
+        for i, sect in enumerate(sections):
+            sect['debate'] = debate
+            sect['index'] = i
 
             # Select best timestamps for start and end and make datetime
             start_ts = sect['time_start'] or sect['ref_timestamp']
@@ -230,11 +280,7 @@ class StatementSpider(BaseSpider):
                 debate_date = datetime.datetime(2057, 1, 1)
             sect['date'] = self._apply_ts(debate_date, start_ts)
             sect['date_end'] = self._apply_ts(debate_date, end_ts)
-
-            self.store_statement(sect, i)
-
-        self.logger.info(
-            green(u"Saved {} sections from {}".format(i, response.url)))
+        return sections
 
     def store_debate(self, data):
         """
@@ -247,26 +293,10 @@ class StatementSpider(BaseSpider):
         for (key, value) in data.items():
             setattr(debate, key, value)
         debate.save()
+        self.mark_dirty(debate)
         self.logger.info(green(u"Debate metadata saved {}".format(debate)))
         return debate
 
-    def store_statement(self, data, index=-1):
-        """
-        Save (update or insert) debate_statement to ORM
-        """
-        data['index'] = int(index)
-        self.logger.info(data)
-        try:
-            debate_statement = DebateStatement.objects.get(
-                debate=data['debate'], doc_section=data['doc_section'])
-        except DebateStatement.DoesNotExist:
-            debate_statement = DebateStatement()
-        keys = set(data.keys()) &\
-            set([v.name for v in DebateStatement._meta.get_fields()])
-        for key in keys:
-            setattr(debate_statement, key, data[key])
-        debate_statement.save()
-
     def _apply_ts(self, date, timeparts):
         """
         Apply hour, minutes and possibly secconds to a date.
@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+"""
+Offline benchmark suite for the extractors, based on a versioned corpus of
+recorded parlament.gv.at pages (cf. test/corpus/manifest.json).
+
+Record the pages of the current corpus version once (needs network access;
+existing pages are kept unless --force is given). The pages are fetched
+from the manifest's snapshot in the Internet Archive, so every recording of
+a corpus version gets the same pages; pinned checksums are verified:
+
+    python -m test.bench_suite record
+
+Pin the checksums of the recorded pages in the manifest (commit it after):
+
+    python -m test.bench_suite pin
+
+Run all extractor families (LAW, PERSON, INQUIRY, PETITION, COMITTEE,
+DOCSECTIONS, RSS) on the recorded pages and write timing and allocation
+statistics as JSON; with --xpaths, extractors with an XPATH are also timed
+evaluating it through a selector and as a compiled expression:
+
+    python -m test.bench_suite run -n 20 -o before.json
+
+Compare two runs, reporting extractors that got slower by more than the
+threshold (exits with 1 if there are any):
+
+    python -m test.bench_suite compare before.json after.json
+
+Every extractor runs in its own process, so the reported memory (growth
+of the max RSS during the first call) isn't influenced by the others; it is
+terminated if it doesn't report back within --timeout seconds.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import hashlib
+import Queue
+import argparse
+import datetime
+import collections
+import resource
+import urllib2
+import multiprocessing
+
+import lxml.etree
+import feedparser
+from scrapy import Selector
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+
+from parlament.resources.extractors import xpath
+from parlament.resources.extractors.law import LAW
+from parlament.resources.extractors.person import PERSON
+from parlament.resources.extractors.inquiry import INQUIRY
+from parlament.resources.extractors.petition import PETITION
+from parlament.resources.extractors.comittee import COMITTEE
+from parlament.resources.extractors.statement import DOCSECTIONS
+from parlament.resources.extractors.statement import RSS_DEBATES_SIMPLE
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'corpus')
+MANIFEST = os.path.join(CORPUS, 'manifest.json')
+
+# the original page as archived at (or closest to) the snapshot time
+SNAPSHOT_URL = 'https://web.archive.org/web/{snapshot}id_/{url}'
+
+# seconds an extractor's process may take to report back
+TIMEOUT = 600
+
+
+def _xt(extractor):
+    func = lambda response: extractor.xt(response)
+    func.extractor = extractor
+    return func
+
+
+def _xpath_variants(name, func):
+    """
+    For extractors with an XPATH: evaluating it through a selector and as
+    a compiled expression from the registry
+    """
+    extractor = getattr(func, 'extractor', None)
+    if extractor is None or not hasattr(extractor, 'XPATH'):
+        return []
+    return [
+        (name + ' [selector]',
+         lambda response: response.xpath(extractor.XPATH).extract()),
+        (name + ' [xpath]',
+         lambda response: xpath(response, extractor.XPATH)),
+    ]
+
+
+# Extractors per family, by name; pages can restrict them with 'extractors'
+FAMILIES = {
+    'LAW': [
+        ('LAW.TITLE', _xt(LAW.TITLE)),
+        ('LAW.PARL_ID', _xt(LAW.PARL_ID)),
+        ('LAW.PRELAW_ID', _xt(LAW.PRELAW_ID)),
+        ('LAW.KEYWORDS', _xt(LAW.KEYWORDS)),
+        ('LAW.DOCS', _xt(LAW.DOCS)),
+        ('LAW.STATUS', _xt(LAW.STATUS)),
+        ('LAW.CATEGORY', _xt(LAW.CATEGORY)),
+        ('LAW.DESCRIPTION', _xt(LAW.DESCRIPTION)),
+        ('LAW.PHASES', _xt(LAW.PHASES)),
+    ],
+    'PERSON': [
+        ('PERSON.DETAIL.FULL_NAME', _xt(PERSON.DETAIL.FULL_NAME)),
+        ('PERSON.DETAIL.PHOTO_URL', _xt(PERSON.DETAIL.PHOTO_URL)),
+        ('PERSON.DETAIL.PHOTO_COPYRIGHT',
+         _xt(PERSON.DETAIL.PHOTO_COPYRIGHT)),
+        ('PERSON.DETAIL.MANDATES', _xt(PERSON.DETAIL.MANDATES)),
+        ('PERSON.DETAIL.BIO', _xt(PERSON.DETAIL.BIO)),
+        ('COMITTEE.MEMBERSHIP', _xt(COMITTEE.MEMBERSHIP)),
+    ],
+    'INQUIRY': [
+        ('INQUIRY.TITLE', _xt(INQUIRY.TITLE)),
+        ('INQUIRY.PARL_ID', _xt(INQUIRY.PARL_ID)),
+        ('INQUIRY.KEYWORDS', _xt(INQUIRY.KEYWORDS)),
+        ('INQUIRY.DOCS', _xt(INQUIRY.DOCS)),
+        ('INQUIRY.CATEGORY', _xt(INQUIRY.CATEGORY)),
+        ('INQUIRY.DESCRIPTION', _xt(INQUIRY.DESCRIPTION)),
+        ('INQUIRY.SENDER', _xt(INQUIRY.SENDER)),
+        ('INQUIRY.RECEIVER', _xt(INQUIRY.RECEIVER)),
+        ('INQUIRY.STEPS', _xt(INQUIRY.STEPS)),
+        ('INQUIRY.RESPONSE_LINK', _xt(INQUIRY.RESPONSE_LINK)),
+    ],
+    'PETITION': [
+        ('PETITION.SIGNATURE_COUNT', _xt(PETITION.SIGNATURE_COUNT)),
+        ('PETITION.CREATORS', _xt(PETITION.CREATORS)),
+        ('PETITION.SIGNING', _xt(PETITION.SIGNING)),
+        ('PETITION.OPINIONS', _xt(PETITION.OPINIONS)),
+        ('PETITION.REFERENCE', _xt(PETITION.REFERENCE)),
+        ('PETITION.SIGNATURES', _xt(PETITION.SIGNATURES)),
+        ('LAW.PHASES', _xt(LAW.PHASES)),
+    ],
+    'COMITTEE': [
+        ('COMITTEE.LLP', _xt(COMITTEE.LLP)),
+        ('COMITTEE.NAME', _xt(COMITTEE.NAME)),
+        ('COMITTEE.DESCRIPTION', _xt(COMITTEE.DESCRIPTION)),
+        ('COMITTEE.ACTIVE', _xt(COMITTEE.ACTIVE)),
+        ('COMITTEE.MEETINGS', _xt(COMITTEE.MEETINGS)),
+        ('COMITTEE.LAWS', _xt(COMITTEE.LAWS)),
+    ],
+    'DOCSECTIONS': [
+        # including the parsing, which is only done for the protocol
+        ('DOCSECTIONS.xt',
+         lambda response: DOCSECTIONS.xt(Selector(text=response.text))),
+        ('DOCSECTIONS.xt_stream',
+         lambda response: DOCSECTIONS.xt_stream(response.text)),
+    ],
+    'RSS': [
+        ('feedparser', lambda response: feedparser.parse(response.body)),
+        ('RSS_DEBATES_SIMPLE', _xt(RSS_DEBATES_SIMPLE)),
+    ],
+}
+
+
+def load_manifest():
+    with open(MANIFEST) as f:
+        return json.load(f, object_pairs_hook=collections.OrderedDict)
+
+
+def source_url(manifest, page):
+    """
+    Returns the url to record a page from: its snapshot in the Internet
+    Archive, or the live page if the manifest has no snapshot
+    """
+    snapshot = page.get('snapshot', manifest.get('snapshot'))
+    if not snapshot:
+        return page['url']
+    return SNAPSHOT_URL.format(snapshot=snapshot, url=page['url'])
+
+
+def corpus_dir(manifest):
+    return os.path.join(CORPUS, 'v{}'.format(manifest['version']))
+
+
+def load_recorded(manifest):
+    """
+    Returns the metadata of all recorded pages of the corpus version
+    """
+    path = os.path.join(corpus_dir(manifest), 'pages.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def record(force=False):
+    """
+    Downloads all pages of the manifest that aren't recorded yet
+    """
+    manifest = load_manifest()
+    directory = corpus_dir(manifest)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    recorded = load_recorded(manifest)
+
+    for page in manifest['pages']:
+        if page['name'] in recorded and not force:
+            print "{:<32} kept".format(page['name'])
+            continue
+        response = urllib2.urlopen(source_url(manifest, page))
+        body = response.read()
+        sha1 = hashlib.sha1(body).hexdigest()
+        if page.get('sha1', sha1) != sha1:
+            sys.exit(u"{} doesn't match the pinned checksum ({})".format(
+                page['name'], response.geturl()))
+        with open(os.path.join(directory, page['name']), 'wb') as f:
+            f.write(body)
+        recorded[page['name']] = {
+            'url': page['url'],
+            'source': response.geturl(),
+            'content_type': response.info().get('Content-Type'),
+            'sha1': sha1,
+            'size': len(body),
+            'recorded': datetime.datetime.utcnow().isoformat(),
+        }
+        print "{:<32} {} bytes".format(page['name'], len(body))
+
+    with open(os.path.join(directory, 'pages.json'), 'w') as f:
+        json.dump(recorded, f, indent=4, sort_keys=True)
+
+
+def pin():
+    """
+    Writes the checksums of the recorded pages into the manifest
+    """
+    manifest = load_manifest()
+    recorded = load_recorded(manifest)
+    for page in manifest['pages']:
+        if page['name'] in recorded:
+            page['sha1'] = recorded[page['name']]['sha1']
+    with open(MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=4)
+        f.write('\n')
+
+
+def load_response(manifest, page, meta):
+    """
+    Builds the response for a recorded page the way the downloader would
+    (HtmlResponse, XmlResponse, ... by content type)
+    """
+    with open(os.path.join(corpus_dir(manifest), page['name']), 'rb') as f:
+        body = f.read()
+    sha1 = hashlib.sha1(body).hexdigest()
+    if sha1 != meta['sha1'] or sha1 != page.get('sha1', sha1):
+        raise ValueError(
+            u"{} doesn't match the recorded checksum".format(page['name']))
+    headers = Headers({'Content-Type': meta['content_type'] or ''})
+    cls = responsetypes.from_args(headers=headers, url=page['url'], body=body)
+    return cls(url=page['url'], headers=headers, body=body)
+
+
+def _rss_kb():
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(func, response, repetitions, queue):
+    """
+    Runs in a separate process: times func(response) and reports the
+    memory it needed
+    """
+    try:
+        # parse the document before the baseline is taken
+        getattr(response, 'selector', None)
+        gc.collect()
+        rss_before = _rss_kb()
+
+        # net number of gc-tracked objects a single call leaves behind,
+        # including cyclic garbage
+        gc.disable()
+        objects_before = len(gc.get_objects())
+        result = func(response)
+        objects = len(gc.get_objects()) - objects_before
+        del result
+        gc.enable()
+        rss_first = _rss_kb()
+
+        times = []
+        for _ in range(repetitions):
+            started = time.time()
+            func(response)
+            times.append((time.time() - started) * 1000)
+        times.sort()
+        queue.put({
+            'runs': repetitions,
+            'min_ms': times[0],
+            'median_ms': times[len(times) // 2],
+            'mean_ms': sum(times) / len(times),
+            'max_ms': times[-1],
+            'rss_kb': _rss_kb(),
+            'rss_growth_kb': rss_first - rss_before,
+            'gc_objects': objects,
+            'error': None,
+        })
+    except Exception, e:
+        queue.put({'error': u"{}: {}".format(type(e).__name__, e)})
+
+
+def collect(process, queue, timeout):
+    """
+    Returns the result the measuring process reports, or an error if it
+    dies or doesn't report back within timeout seconds
+    """
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return queue.get(timeout=1)
+        except Queue.Empty:
+            pass
+        if not process.is_alive():
+            try:
+                return queue.get(timeout=1)
+            except Queue.Empty:
+                return {'error': u"Exited with code {}".format(
+                    process.exitcode)}
+        if time.time() > deadline:
+            process.terminate()
+            return {'error': u"No result after {}s".format(timeout)}
+
+
+def run(repetitions=10, output=None, xpaths=False, timeout=TIMEOUT):
+    manifest = load_manifest()
+    recorded = load_recorded(manifest)
+    missing = [page['name'] for page in manifest['pages']
+               if page['name'] not in recorded]
+    if missing:
+        sys.exit(u"Pages not recorded: {} (run 'record' first)".format(
+            u', '.join(missing)))
+
+    results = []
+    print "{:<28} {:<32} {:>10} {:>10} {:>10} {:>10}".format(
+        'page', 'extractor', 'min [ms]', 'med [ms]', 'rss [kB]', 'objects')
+    for page in manifest['pages']:
+        response = load_response(manifest, page, recorded[page['name']])
+        extractors = []
+        for name, func in FAMILIES[page['family']]:
+            if 'extractors' in page and name not in page['extractors']:
+                continue
+            extractors.append((name, func))
+            if xpaths:
+                extractors.extend(_xpath_variants(name, func))
+        for name, func in extractors:
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=measure, args=(func, response, repetitions, queue))
+            process.start()
+            result = collect(process, queue, timeout)
+            process.join()
+
+            result.update({
+                'page': page['name'],
+                'family': page['family'],
+                'extractor': name,
+            })
+            results.append(result)
+            if result['error']:
+                print "{:<28} {:<32} {}".format(
+                    page['name'], name, result['error'])
+            else:
+                print "{:<28} {:<32} {:>10.3f} {:>10.3f} {:>10} {:>10}".format(
+                    page['name'], name, result['min_ms'],
+                    result['median_ms'], result['rss_growth_kb'],
+                    result['gc_objects'])
+
+    report = {
+        'corpus_version': manifest['version'],
+        'created': datetime.datetime.utcnow().isoformat(),
+        'python': sys.version,
+        'lxml': lxml.etree.__version__,
+        'repetitions': repetitions,
+        'xpaths': xpaths,
+        'pages': recorded,
+        'results': results,
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=4, sort_keys=True)
+        print "\nResults written to {}".format(output)
+    return report
+
+
+def compare(base, current, threshold=0.1):
+    """
+    Prints the median time of every extractor in both runs, returns the
+    number of extractors that got slower by more than threshold
+    """
+    with open(base) as f:
+        base = json.load(f)
+    with open(current) as f:
+        current = json.load(f)
+    if base['corpus_version'] != current['corpus_version']:
+        print "Warning: different corpus versions ({} / {})".format(
+            base['corpus_version'], current['corpus_version'])
+
+    before = dict(((r['page'], r['extractor']), r) for r in base['results'])
+    regressions = 0
+    print "{:<28} {:<32} {:>10} {:>10} {:>8}".format(
+        'page', 'extractor', 'base [ms]', 'now [ms]', 'change')
+    for result in current['results']:
+        key = (result['page'], result['extractor'])
+        old = before.get(key)
+        if old is None or old['error'] or result['error']:
+            continue
+        change = result['median_ms'] / old['median_ms'] - 1
+        flag = ''
+        if change > threshold:
+            flag = ' !'
+            regressions += 1
+        print "{:<28} {:<32} {:>10.3f} {:>10.3f} {:>+7.1%}{}".format(
+            key[0], key[1], old['median_ms'], result['median_ms'],
+            change, flag)
+    print "\n{} regressions (> {:.0%})".format(regressions, threshold)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command')
+
+    record_parser = commands.add_parser(
+        'record', help="download the pages of the corpus")
+    record_parser.add_argument(
+        '--force', action='store_true', help="re-download recorded pages")
+
+    commands.add_parser(
+        'pin', help="pin the recorded pages' checksums in the manifest")
+
+    run_parser = commands.add_parser(
+        'run', help="benchmark the extractors on the recorded pages")
+    run_parser.add_argument('-n', '--repetitions', type=int, default=10)
+    run_parser.add_argument('-o', '--output', help="JSON result file")
+    run_parser.add_argument(
+        '--xpaths', action='store_true',
+        help="also time the extractors' XPATHs, by selector and compiled")
+    run_parser.add_argument(
+        '--timeout', type=int, default=TIMEOUT,
+        help="seconds an extractor may take to report back")
+
+    compare_parser = commands.add_parser(
+        'compare', help="compare two JSON result files")
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.force)
+    elif args.command == 'pin':
+        pin()
+    elif args.command == 'run':
+        run(args.repetitions, args.output, args.xpaths, args.timeout)
+    elif args.command == 'compare':
+        sys.exit(1 if compare(args.base, args.current, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import unittest
+from scrapy import Selector
+from django.utils.html import remove_tags
+
+from parlament.resources.extractors import XPATHS
+from parlament.resources.extractors import fragment
+from parlament.resources.extractors import select
+from parlament.resources.extractors import xpath
+
+HTML = u'''<html><head><title>T</title></head><body>
+<table><tbody>
+<tr class="a"><td>01.03.2015</td><td>Schritt &amp; <b>1</b> <a href="/x.html">\xe4</a>
+ tail</td><td><span title="t">3</span></td></tr>
+<tr><td>02.03.2015</td><td><a href="/y.html"><img src="i">Name, <img src="j">Vor</a></td></tr>
+</tbody></table>
+</body></html>'''
+
+EXPRESSIONS = [
+    '//td[1]/text()',
+    '//td[2]',
+    '//td[2]/a/@href',
+    '//span/@title',
+    '/html/body/tbody/tr',
+    'count(//td)',
+    'boolean(//b)',
+    '//td//a/text()',
+]
+
+
+class TestXPath(unittest.TestCase):
+    """
+    The compiled expressions return the same as Selector.xpath().extract()
+    """
+
+    def setUp(self):
+        self.doc = Selector(text=HTML)
+
+    def test_document(self):
+        for expr in EXPRESSIONS:
+            self.assertEquals(xpath(self.doc, expr),
+                              self.doc.xpath(expr).extract())
+
+    def test_selector_list(self):
+        rows = self.doc.xpath('//tr')
+        self.assertEquals(xpath(rows, 'td[1]/text()'),
+                          rows.xpath('td[1]/text()').extract())
+
+    def test_text_result(self):
+        text = self.doc.xpath('//td/text()')[0]
+        self.assertEquals(xpath(text, '//td'), [])
+
+    def test_select(self):
+        for expr in EXPRESSIONS:
+            self.assertEquals(select(self.doc, expr).extract(),
+                              self.doc.xpath(expr).extract())
+
+    def test_select_nested(self):
+        rows = select(self.doc, '//tr')
+        self.assertEquals(
+            [xpath(row, 'td[1]/text()') for row in rows],
+            [row.xpath('td[1]/text()').extract()
+             for row in self.doc.xpath('//tr')])
+        self.assertEquals(select(rows, 'td[1]/text()').extract(),
+                          self.doc.xpath('//tr/td[1]/text()').extract())
+        self.assertEquals(xpath(rows[0], '//td'), xpath(self.doc, '//td'))
+
+    def test_registry(self):
+        xpath(self.doc, '//td')
+        self.assertIs(XPATHS['//td'], XPATHS['//td'])
+
+
+class TestFragment(unittest.TestCase):
+    """
+    Fragments behave like Selector(text=selector.extract())
+    """
+
+    def setUp(self):
+        self.doc = Selector(text=HTML)
+
+    def test_fragment(self):
+        for tag in ('tbody', 'tr', 'td', 'a'):
+            for element in self.doc.xpath('//' + tag):
+                expected = Selector(text=element.extract())
+                actual = fragment(element)
+                for expr in EXPRESSIONS:
+                    self.assertEquals(xpath(actual, expr),
+                                      expected.xpath(expr).extract())
+
+    def test_strip_tags(self):
+        for element in self.doc.xpath('//tr'):
+            expected = Selector(text=remove_tags(element.extract(), 'img'))
+            actual = fragment(element, strip_tags=('img',))
+            for expr in EXPRESSIONS:
+                self.assertEquals(xpath(actual, expr),
+                                  expected.xpath(expr).extract())
+
+    def test_copy(self):
+        element = self.doc.xpath('//tr')[0]
+        fragment(element, strip_tags=('b',))
+        self.assertEquals(self.doc.xpath('//b/text()').extract(), [u'1'])
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import shutil
+import tempfile
+import unittest
+from scrapy import Request
+from scrapy import Spider
+from scrapy.http import HtmlResponse
+from scrapy.exceptions import IgnoreRequest
+from scrapy.utils.test import get_crawler
+
+from parlament.httpcache import ParlamentHttpCacheMiddleware
+
+URL = "https://www.parlament.gv.at/PAKT/VHG/XXV/I/I_00458/index.shtml"
+BODY = '<html><body><h1 id="inhalt">Gesetz</h1></body></html>'
+
+
+class StoredSpider(Spider):
+
+    name = 'test'
+    stored = False
+
+    def is_stored(self, request):
+        return self.stored
+
+
+class TestHttpCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.spider = StoredSpider()
+        crawler = get_crawler(settings_dict={
+            'HTTPCACHE_ENABLED': True,
+            'HTTPCACHE_DIR': self.path,
+            'HTTPCACHE_STORAGE': 'parlament.httpcache.ParlamentCacheStorage',
+        })
+        self.middleware = ParlamentHttpCacheMiddleware.from_crawler(crawler)
+        self.middleware.spider_opened(self.spider)
+        request = Request(URL)
+        self.middleware.process_request(request, self.spider)
+        self.middleware.process_response(
+            request, HtmlResponse(URL, body=BODY), self.spider)
+
+    def tearDown(self):
+        self.middleware.spider_closed(self.spider)
+        shutil.rmtree(self.path)
+
+    def test_skip_stored(self):
+        self.spider.stored = True
+        self.assertRaises(
+            IgnoreRequest, self.middleware.process_request,
+            Request(URL, meta={'skip_unchanged': True}), self.spider)
+
+    def test_keep_not_stored(self):
+        response = self.middleware.process_request(
+            Request(URL, meta={'skip_unchanged': True}), self.spider)
+        self.assertIsInstance(response, HtmlResponse)
+        self.assertEquals(response.body, BODY)
+
+    def test_keep_unflagged(self):
+        self.spider.stored = True
+        response = self.middleware.process_request(Request(URL), self.spider)
+        self.assertIsInstance(response, HtmlResponse)
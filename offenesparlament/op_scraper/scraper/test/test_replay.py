@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import shutil
+import tempfile
+import unittest
+from scrapy import Request
+from scrapy import Spider
+from scrapy.http import HtmlResponse
+from scrapy.exceptions import IgnoreRequest
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.test import get_crawler
+
+from parlament.replay import ReplayMiddleware
+
+URL = "https://www.parlament.gv.at/PAKT/VHG/XXV/I/I_00458/index.shtml"
+BODY = u'<html><body><h1 id="inhalt">Gesetz \xe4</h1></body></html>'
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.spider = Spider('test')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def middleware(self, mode):
+        crawler = get_crawler(settings_dict={
+            'REPLAY_MODE': mode, 'REPLAY_DIR': self.path})
+        return ReplayMiddleware.from_crawler(crawler)
+
+    def test_disabled(self):
+        self.assertRaises(NotConfigured, self.middleware, '')
+
+    def test_record_replay(self):
+        request = Request(URL)
+        response = HtmlResponse(
+            URL, body=BODY.encode('windows-1252'),
+            headers={'Content-Type': 'text/html; charset=windows-1252'})
+        recorder = self.middleware('record')
+        self.assertIsNone(recorder.process_request(request, self.spider))
+        recorder.process_response(request, response, self.spider)
+
+        replayed = self.middleware('replay').process_request(
+            Request(URL), self.spider)
+        self.assertIsInstance(replayed, HtmlResponse)
+        self.assertEquals(replayed.url, URL)
+        self.assertEquals(replayed.status, 200)
+        self.assertEquals(replayed.body, response.body)
+        self.assertEquals(replayed.text, BODY)
+        self.assertIn('replayed', replayed.flags)
+
+    def test_missing(self):
+        self.assertRaises(
+            IgnoreRequest, self.middleware('replay').process_request,
+            Request(URL), self.spider)
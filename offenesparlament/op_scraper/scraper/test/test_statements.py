@@ -27,6 +27,13 @@ def open_or_fetch(fname, debate_url):
             f.write(html)
         return html
 
+def comparable(sections):
+    """
+    Section dicts without the paragraph objects, which don't compare
+    """
+    return [dict((k, v) for k, v in s.items() if k != 'paragraphs')
+            for s in sections]
+
 class TestParseDebateXV53(unittest.TestCase):
     """
     Tests docsections extractor with parsing a complete debate protocol
@@ -36,8 +43,8 @@ class TestParseDebateXV53(unittest.TestCase):
         self.maxDiff = None
         debate_url = "https://www.parlament.gv.at/PAKT/VHG/XXV/NRSITZ/NRSITZ_00053/fnameorig_390290.html"
         fname = os.path.join(os.path.dirname(__file__), 'cache', 'NRSITZ_00053.html')
-        content = open_or_fetch(fname, debate_url)
-        self.doc = Selector(text=content)
+        self.content = open_or_fetch(fname, debate_url)
+        self.doc = Selector(text=self.content)
 
     def test_debate_overview(self):
         sections = DOCSECTIONS.xt(self.doc)
@@ -49,6 +56,10 @@ class TestParseDebateXV53(unittest.TestCase):
         self.assertEquals(len([s for s in sections if s['speaker_role'] == 'min']), 10)
         self.assertEquals(len([s for s in sections if s['speaker_role'] == 'kanz']), 1)
 
+    def test_streaming_parser(self):
+        self.assertEquals(comparable(DOCSECTIONS.xt_stream(self.content)),
+                          comparable(DOCSECTIONS.xt(self.doc)))
+
     def test_speaker_detect(self):
         sections = DOCSECTIONS.xt(self.doc)
         section = sections[39]
@@ -79,8 +90,8 @@ class TestParseDebateXV51(unittest.TestCase):
         self.maxDiff = None
         debate_url = "https://www.parlament.gv.at/PAKT/VHG/XXV/NRSITZ/NRSITZ_00051/fnameorig_385039.html"
         fname = os.path.join(os.path.dirname(__file__), 'cache', 'NRSITZ_00051.html')
-        content = open_or_fetch(fname, debate_url)
-        self.doc = Selector(text=content)
+        self.content = open_or_fetch(fname, debate_url)
+        self.doc = Selector(text=self.content)
 
     def test_document_read_successfully(self):
         self.assertEquals(len(self.doc.xpath('//div')), 489,
@@ -96,6 +107,10 @@ class TestParseDebateXV51(unittest.TestCase):
         self.assertEquals(len([s for s in sections if s['speaker_role'] == 'min']), 45)
         self.assertEquals(len([s for s in sections if s['speaker_role'] == 'kanz']), 0)
 
+    def test_streaming_parser(self):
+        self.assertEquals(comparable(DOCSECTIONS.xt_stream(self.content)),
+                          comparable(DOCSECTIONS.xt(self.doc)))
+
     def test_plaintext_extraction(self):
         unicode_firstp = u"""Für diese Sitzung hat das Bundeskanzleramt über Vertretung von Mitgliedern der Bundesregierung folgende Mitteilungen gemacht:"""
         unicode_secondp = u"""Die Bundesministerin für Familien und Jugend Dr. Sophie Karmasin wird durch die Bundesministerin für Inneres Mag. Johanna Mikl-Leitner vertreten."""
@@ -126,8 +141,8 @@ class TestParseDebateXIII49(unittest.TestCase):
         self.maxDiff = None
         debate_url = "https://www.parlament.gv.at/PAKT/VHG/XXIII/NRSITZ/NRSITZ_00049/fnameorig_115155.html"
         fname = os.path.join(os.path.dirname(__file__), 'cache', 'NRSITZ_00049.html')
-        content = open_or_fetch(fname, debate_url)
-        self.doc = Selector(text=content)
+        self.content = open_or_fetch(fname, debate_url)
+        self.doc = Selector(text=self.content)
 
     def test_document_read_successfully(self):
         self.assertEquals(len(self.doc.xpath('//div')), 104,
@@ -143,6 +158,10 @@ class TestParseDebateXIII49(unittest.TestCase):
         self.assertEquals(len([s for s in sections if s['speaker_role'] == 'min']), 4)
         self.assertEquals(len([s for s in sections if s['speaker_role'] == 'kanz']), 0)
 
+    def test_streaming_parser(self):
+        self.assertEquals(comparable(DOCSECTIONS.xt_stream(self.content)),
+                          comparable(DOCSECTIONS.xt(self.doc)))
+
     def test_plaintext_extraction(self):
         unicode_firstp = u"""Meine sehr verehrten Damen und Herren!  Herr Bundesminister! Wir haben jetzt von Ihnen 28 Antworten auf 28 Fragen  die niemand gestellt hat, erhalten. Die 28 Fra­gen, die Sie nicht beantwortet haben, werden Sie ein zweites Mal beantworten können, und zwar im parlamentarischen Untersuchungsausschuss. """
         unicode_lastp = u"""Deshalb sehe ich den Untersuchungssausschuss als eine der größten politischen Chancen dieser Republik  und hoffe, dass dieses Haus diese Chance nützt. – Danke schön. """
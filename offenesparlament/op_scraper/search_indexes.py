@@ -1,7 +1,11 @@
 from haystack import indexes
 import datetime
 
+from django.db.models import Prefetch
 from op_scraper.models import Person, Law, Debate, Inquiry
+from op_scraper.models import InquiryResponse, Mandate, Statement, Step
+from op_scraper.models import Opinion
+from op_scraper.models import DebateStatement, ComitteeMembership
 import json
 from haystack import connections
 
@@ -169,6 +173,39 @@ class PersonIndex(BaseIndex, indexes.SearchIndex, indexes.Indexable):
     category = indexes.CharField(faceted=True, null=True)
     api_url = indexes.CharField()
 
+    def index_queryset(self, using=None):
+        """
+        Prefetches everything the prepare methods touch, so that a batch of
+        persons is indexed in a constant number of queries
+        """
+        inquiries = Inquiry.objects\
+            .select_related('legislative_period', 'category', 'receiver',
+                            'response')\
+            .prefetch_related('sender', 'keywords')
+        return self.get_model().objects\
+            .select_related('latest_mandate__party')\
+            .prefetch_related(
+                Prefetch('mandate_set', queryset=Mandate.objects.select_related(
+                    'function', 'party', 'legislative_period', 'state',
+                    'administration')),
+                Prefetch('statements', queryset=Statement.objects.select_related(
+                    'step__law__category', 'step__law__legislative_period')),
+                Prefetch('debate_statements',
+                         queryset=DebateStatement.objects
+                         .select_related('debate__llp')
+                         .defer('full_text', 'raw_text', 'annotated_text')),
+                Prefetch('inquiries_sent', queryset=inquiries),
+                Prefetch('inquiries_received', queryset=inquiries),
+                Prefetch('inquiries_answered',
+                         queryset=InquiryResponse.objects
+                         .select_related('legislative_period', 'category',
+                                         'sender')
+                         .prefetch_related('keywords')),
+                Prefetch('comittee_memberships',
+                         queryset=ComitteeMembership.objects.select_related(
+                             'function', 'comittee__legislative_period')),
+            )
+
     def prepare_index_name(self, obj):
         return 'person'
 
@@ -305,6 +342,23 @@ class LawIndex(BaseIndex, indexes.SearchIndex, indexes.Indexable):
     #         .filter(inquiry__isnull=False)\
     #         .filter(inquiryresponse__isnull=False)
 
+    def index_queryset(self, using=None):
+        """
+        Prefetches everything the prepare methods touch, so that a batch of
+        laws is indexed in a constant number of queries
+        """
+        return self.get_model().objects\
+            .select_related('category', 'legislative_period', 'inquiry')\
+            .prefetch_related(
+                'keywords',
+                'documents',
+                Prefetch('steps', queryset=Step.objects.select_related(
+                    'phase')),
+                Prefetch('opinions', queryset=Opinion.objects
+                         .select_related('entity')
+                         .prefetch_related('documents', 'keywords')),
+            )
+
     def prepare_index_name(self, obj):
         return 'law'
 
@@ -331,8 +385,7 @@ class LawIndex(BaseIndex, indexes.SearchIndex, indexes.Indexable):
 
     def prepare_response_id(self, obj):
         if hasattr(obj, 'inquiry'):
-            r = obj.inquiry.response
-            return None if not r else r.pk
+            return obj.inquiry.response_id
         return None
 
     def get_model(self):
@@ -354,7 +407,6 @@ class DebateIndex(BaseIndex, indexes.SearchIndex, indexes.Indexable):
             'detail_url',
             'nr',
             'llp',
-            'statements',
             'internal_link'
         ],
         'list': [
@@ -389,12 +441,14 @@ class DebateIndex(BaseIndex, indexes.SearchIndex, indexes.Indexable):
     # soon
     internal_link = indexes.CharField(model_attr=u'slug')
 
-    # Related, aggregated and Multi - Value Fields
-    statements = indexes.MultiValueField()
-
     # Static items
     category = indexes.CharField(faceted=True, null=True)
 
+    # The statements are indexed separately (DebateStatementIndex), the
+    # debate documents only carry the metadata
+    def index_queryset(self, using=None):
+        return self.get_model().objects.select_related('llp')
+
     def prepare_index_name(self, obj):
         return 'debate'
 
@@ -406,16 +460,89 @@ class DebateIndex(BaseIndex, indexes.SearchIndex, indexes.Indexable):
             pass
         return "Debatte"
 
-    def prepare_statements(self, obj):
-        """
-        Collects the object's statements's as json
-        """
-        return obj.statements_full_text
-
     def get_model(self):
         return Debate
 
 
+class DebateStatementIndex(BaseIndex, indexes.SearchIndex, indexes.Indexable):
+    FIELDSETS = {
+        'all': [
+            'index_name',
+            'text',
+            'debate',
+            'debate_parl_id',
+            'debate_title',
+            'debate_type',
+            'debate_internal_link',
+            'date',
+            'index',
+            'doc_section',
+            'text_type',
+            'speaker_role',
+            'speaker_name',
+            'person',
+            'page_start',
+            'page_end',
+            'llps',
+        ],
+        'list': [
+            'index_name',
+            'debate',
+            'debate_parl_id',
+            'debate_title',
+            'debate_type',
+            'debate_internal_link',
+            'date',
+            'index',
+            'doc_section',
+            'text_type',
+            'speaker_role',
+            'speaker_name',
+            'person',
+            'page_start',
+            'page_end',
+            'llps',
+        ],
+    }
+
+    index_name = indexes.CharField()
+    # speaker and full text of the statement
+    text = indexes.CharField(document=True, use_template=True)
+
+    # Parent debate
+    debate = indexes.IntegerField(model_attr='debate_id')
+    debate_parl_id = indexes.CharField(model_attr='debate__parl_id')
+    debate_title = indexes.CharField(model_attr='debate__title', null=True)
+    debate_type = indexes.CharField(
+        model_attr='debate__debate_type', faceted=True, null=True)
+    debate_internal_link = indexes.CharField(model_attr='debate__slug')
+    llps = indexes.MultiValueField(
+        model_attr='debate__llps_facet', faceted=True)
+    llps_numeric = indexes.MultiValueField(
+        model_attr='debate__llps_facet_numeric', faceted=True)
+
+    date = indexes.DateTimeField(model_attr='date', null=True)
+    index = indexes.IntegerField(model_attr='index')
+    doc_section = indexes.CharField(model_attr='doc_section')
+    text_type = indexes.CharField(model_attr='text_type', null=True)
+    speaker_role = indexes.CharField(model_attr='speaker_role', null=True)
+    speaker_name = indexes.CharField(model_attr='speaker_name', null=True)
+    person = indexes.CharField(model_attr='person_id', null=True)
+    page_start = indexes.IntegerField(model_attr='page_start', null=True)
+    page_end = indexes.IntegerField(model_attr='page_end', null=True)
+
+    def index_queryset(self, using=None):
+        return self.get_model().objects\
+            .filter(debate__isnull=False)\
+            .select_related('debate__llp')
+
+    def prepare_index_name(self, obj):
+        return 'debate_statement'
+
+    def get_model(self):
+        return DebateStatement
+
+
 ## Index duplication for Archive
 class PersonIndexArchive(ArchiveIndexMixin, PersonIndex):
     pass
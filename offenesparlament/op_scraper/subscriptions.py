@@ -1,6 +1,12 @@
 import os
+import time
+import itertools
+import threading
+import collections
+from multiprocessing.pool import ThreadPool
 
 from op_scraper.models import *
+from django.db import connection
 from django.conf import settings
 from django.template import loader, Context
 import json
@@ -8,6 +14,7 @@ import pprint
 from tabulate import tabulate
 
 from offenesparlament.constants import LAW, PERSON, DEBATE, EMAIL, SEARCH
+from offenesparlament.views.search import search_key
 
 current_content = {}
 # import the logging library
@@ -18,23 +25,58 @@ logger = logging.getLogger('op_scraper.subscriptions.diff')
 
 FIELD_BLACKLIST = ['text', 'ts', 'internal_link', 'index_name']
 
+# compiled snippet templates, by file name
+_templates = {}
+
+
+def _get_template(template_file):
+    if template_file not in _templates:
+        _templates[template_file] = loader.get_template(template_file)
+    return _templates[template_file]
+
+
+def _entry_key(entry):
+    """
+    Returns a hashable key for a (json) list entry; entries are equal iff
+    their keys are
+    """
+    if isinstance(entry, dict):
+        return frozenset((k, _entry_key(v)) for k, v in entry.items())
+    if isinstance(entry, list):
+        return tuple(_entry_key(v) for v in entry)
+    return entry
+
+
+def _has_pk(entry):
+    return isinstance(entry, dict) and 'pk' in entry
+
 
 class JsonDiffer(object):
     FIELD_MESSAGES = {}
     def __init__(self, _content=None, old_content=None, cur_content=None,
-                old_hashes=None, cur_hashes=None):
+                old_hashes=None, cur_hashes=None,
+                old_field_hashes=None, cur_field_hashes=None, items=None):
         self.changes = {}
+        # the changed results' objects by parl_id, if they're fetched already
+        self.items = items
         self.current_content = {}
         self.content = _content
-        self.old_content = _content.retrieve_latest_content() if _content else old_content
-        self.cur_content = _content.get_content() if _content else cur_content
-        if cur_content:
-            self.current_content = cur_content
+        # the archived results are fetched once we know what changed
+        self.old_content = [] if _content else old_content
+        if _content:
+            # the current results can be passed in if they're at hand
+            self.cur_content = _content.get_content() if cur_content is None else cur_content
+        else:
+            self.cur_content = cur_content
+            if cur_content:
+                self.current_content = cur_content
         if _content:
             self.parse_content()
         else:
             self.old_hashes = old_hashes
             self.cur_hashes = cur_hashes
+            self.old_field_hashes = old_field_hashes
+            self.cur_field_hashes = cur_field_hashes
 
     def _disp(self,string):
         try:
@@ -45,7 +87,8 @@ class JsonDiffer(object):
 
     def parse_content(self):
         self.old_hashes = self.content.latest_content_hashes
-        self.cur_hashes = self.content.generate_content_hashes(content=self.cur_content)
+        self.cur_hashes, self.cur_field_hashes = self.content.generate_hashes(
+            content=self.cur_content)
 
         # no changes, skip to the next one
         if self.old_hashes == self.cur_hashes:
@@ -71,8 +114,45 @@ class JsonDiffer(object):
             self.has_changes = False
             return
 
+        self.cur_field_hashes = json.loads(self.cur_field_hashes)
+        try:
+            self.old_field_hashes = json.loads(self.content.latest_field_hashes)
+        except Exception:
+            # archived before fields were hashed, diff the results in full
+            self.old_field_hashes = {}
+
+        # only fetch the changed results, and only their changed fields
+        changed_items = self._changed_items()
+        fields = set()
+        for parl_id in changed_items:
+            changed_fields = self._changed_fields(parl_id)
+            if changed_fields is None:
+                fields = None
+                break
+            fields.update(changed_fields)
+        self.old_content = self.content.retrieve_latest_content(
+            parl_ids=changed_items, fields=fields)
+
         self.has_changes = True
 
+    def _changed_items(self):
+        return [
+            parl_id for parl_id in self.old_hashes
+            if parl_id in self.cur_hashes
+            and self.cur_hashes[parl_id] != self.old_hashes[parl_id]]
+
+    def _changed_fields(self, parl_id):
+        """
+        Returns the fields of a result whose hashes changed, or None if
+        there are no field hashes to compare
+        """
+        old = (self.old_field_hashes or {}).get(parl_id)
+        cur = (self.cur_field_hashes or {}).get(parl_id)
+        if old is None or cur is None:
+            return None
+        return set(
+            key for key in set(old) | set(cur) if old.get(key) != cur.get(key))
+
     @classmethod
     def diff_dicts(cls, dict1, dict2):
         # Collect all keys in dict1 that aren't equal to dict2 or are not in dict2 at all
@@ -87,29 +167,36 @@ class JsonDiffer(object):
 
     @classmethod
     def diff_arrays(cls,arr1,arr2):
+        """
+        Diffs two lists of entries: returns the deleted entries (D), the new
+        entries (N) and the changed ones (C), i.e. new entries whose 'pk'
+        matches a deleted entry's. Entries are compared by hashable keys
+        (cf. _entry_key) instead of list membership, so this is linear in
+        the length of the lists.
+        """
+        keys1 = [_entry_key(e) for e in arr1]
+        keys2 = [_entry_key(e) for e in arr2]
+        keys1_set = set(keys1)
+        keys2_set = set(keys2)
+
         # Collect all the array entries from arr1 that aren't in arr2
-        del_entries = [e for e in arr1 if e not in arr2]
+        del_entries = [e for e, key in zip(arr1, keys1) if key not in keys2_set]
         # Collect all the array entries from arr2 that aren't in arr1
-        new_entries = [e for e in arr2 if e not in arr1]
-
-        try:
-            changed_entries = [e for e in new_entries if 'pk' in e and e['pk'] in [e2['pk'] for e2 in del_entries if 'pk' in e2]]
-        except:
-            # no biggie, just not a dict
-            changed_entries = []
-
-        new_entries = [e for e in new_entries if e not in changed_entries]
-
-        for e in del_entries:
-            if e in changed_entries:
-                del_entries.remove(e)
-            try:
-                changed_pks = [e2['pk'] for e2 in changed_entries if 'pk' in e2]
-                if changed_pks and 'pk' in e and e['pk'] in changed_pks:
-                    del_entries.remove(e)
-            except:
-                # no biggie, just not a dict
-                pass
+        new_entries = [e for e, key in zip(arr2, keys2) if key not in keys1_set]
+
+        # New entries with the pk of a deleted entry are changes; entries
+        # without a pk are only ever deleted or new
+        del_pks = set(e['pk'] for e in del_entries if _has_pk(e))
+        changed_entries = [
+            e for e in new_entries if _has_pk(e) and e['pk'] in del_pks]
+        changed_pks = set(e['pk'] for e in changed_entries)
+
+        new_entries = [
+            e for e in new_entries
+            if not (_has_pk(e) and e['pk'] in changed_pks)]
+        del_entries = [
+            e for e in del_entries
+            if not (_has_pk(e) and e['pk'] in changed_pks)]
 
         return {'D': del_entries,
                 'N': new_entries,
@@ -129,7 +216,9 @@ class JsonDiffer(object):
                     old = old_dict[parl_id]
                     new = cur_dict[parl_id]
                     diff_arr = []
-                    diff_keys = self.diff_dicts(old, new)
+                    diff_keys = self._changed_fields(parl_id)
+                    if diff_keys is None:
+                        diff_keys = self.diff_dicts(old, new)
                     for key in diff_keys:
                         diff_arr.append([
                             u"{}".format(key),
@@ -150,10 +239,7 @@ class JsonDiffer(object):
         if self.changes or not self.has_changes:
             return self.changes
 
-        changed_items = [
-            parl_id for parl_id in self.old_hashes
-            if parl_id in self.cur_hashes.keys()
-            and self.cur_hashes[parl_id] != self.old_hashes[parl_id]]
+        changed_items = self._changed_items()
 
         old_dict = dict((item['parl_id'], item) for item in self.old_content) if self.old_content else {}
         cur_dict = dict((item['parl_id'], item) for item in self.cur_content) if self.cur_content else {}
@@ -162,7 +248,10 @@ class JsonDiffer(object):
             old = old_dict.get(parl_id, {})
             new = cur_dict.get(parl_id, {})
 
-            diff_keys = self.diff_dicts(old, new)
+            # only the fields whose hashes changed are decoded and diffed
+            diff_keys = self._changed_fields(parl_id)
+            if diff_keys is None:
+                diff_keys = self.diff_dicts(old, new)
 
             self.current_content[parl_id] = new
 
@@ -216,11 +305,12 @@ class PersonDiffer(JsonDiffer):
     }
     SNIPPET_TEMPLATE_FILE = 'subscription/emails/snippets/person_changes.email'
 
-    def _get_item(self, parl_id):
-        try:
-            return Person.objects.get(parl_id=parl_id)
-        except:
-            return None
+    @classmethod
+    def _get_items(cls, parl_ids):
+        return dict(
+            (person.parl_id, person) for person in Person.objects
+            .select_related('latest_mandate__party')
+            .filter(parl_id__in=parl_ids))
 
     def render_snippets(self):
         # Plausibility
@@ -233,10 +323,14 @@ class PersonDiffer(JsonDiffer):
         if len(self.changes) == 0:
             return None
 
+        persons = self.items
+        if persons is None:
+            persons = self._get_items(self.changes.keys())
+
         snippets = []
         for parl_id, changeset in self.changes.iteritems():
             item_category = self.current_content[parl_id]['category']
-            person = self._get_item(parl_id)
+            person = persons.get(parl_id)
 
             messages = self._build_messages(changeset)
             if not messages:
@@ -256,11 +350,11 @@ class PersonDiffer(JsonDiffer):
                     'category': item_category,
                     'messages': messages,
                     'item': self.current_content[parl_id],
-                    'short_css_class':   person.party.short_css_class if person.party else None
+                    'short_css_class':   person.party.short_css_class if person and person.party else None
                 }
             c = Context(change_item)
             snippets.append(
-                loader.get_template(self.SNIPPET_TEMPLATE_FILE).render(c, None))
+                _get_template(self.SNIPPET_TEMPLATE_FILE).render(c, None))
         if not snippets:
             return None
         return u'\n'.join(snippets)
@@ -275,12 +369,6 @@ class LawDiffer(JsonDiffer):
     }
     SNIPPET_TEMPLATE_FILE = 'subscription/emails/snippets/law_changes.email'
 
-    def _get_item(self, parl_id):
-        try:
-            return Law.objects.get(parl_id=parl_id)
-        except:
-            return None
-
     def render_snippets(self):
         # Plausibility
         if len(self.current_content) != 1:
@@ -295,7 +383,6 @@ class LawDiffer(JsonDiffer):
         snippets = []
         for parl_id, changeset in self.changes.iteritems():
             item_category = self.current_content[parl_id]['category']
-            law = self._get_item(parl_id)
 
             messages = self._build_messages(changeset)
             if not messages:
@@ -318,7 +405,7 @@ class LawDiffer(JsonDiffer):
                 }
             c = Context(change_item)
             snippets.append(
-                loader.get_template(self.SNIPPET_TEMPLATE_FILE).render(c, None))
+                _get_template(self.SNIPPET_TEMPLATE_FILE).render(c, None))
 
         if not snippets:
             return None
@@ -376,9 +463,21 @@ class SearchDiffer(JsonDiffer):
     def render_snippets(self):
         new = self.collect_new()
 
-        new_msg = self.SEARCH_MESSAGES['new'].msg([x for x in self.cur_content if x['parl_id'] in new])
+        new_ids = set(new)
+        new_msg = self.SEARCH_MESSAGES['new'].msg([x for x in self.cur_content if x['parl_id'] in new_ids])
 
+        old_dict = dict((item['parl_id'], item) for item in self.old_content)
         cur_dict = dict((item['parl_id'], item) for item in self.cur_content)
+        old_field_hashes = self.old_field_hashes or {}
+        cur_field_hashes = self.cur_field_hashes or {}
+
+        # the changed persons are fetched at once for all nested differs
+        persons = PersonDiffer._get_items([
+            ck for ck in self.changes.keys()
+            if CATEGORY_DIFFERS.get(cur_dict[ck]['index_name']) is PersonDiffer])
+
+        def _part(d, ck):
+            return {ck: d[ck]} if ck in d else {}
 
         change_sections = []
 
@@ -386,10 +485,13 @@ class SearchDiffer(JsonDiffer):
             index_name = cur_dict[ck]['index_name']
             cd = CATEGORY_DIFFERS.get(index_name)
             cd = cd(
-                    old_content=[v for v in self.old_content if v['parl_id']==ck],
-                    cur_content=[v for v in self.cur_content if v['parl_id']==ck],
-                    old_hashes={k:v for k,v in self.old_hashes.iteritems() if k==ck},
-                    cur_hashes={k:v for k,v in self.cur_hashes.iteritems() if k==ck}
+                    old_content=[old_dict[ck]] if ck in old_dict else [],
+                    cur_content=[cur_dict[ck]],
+                    old_hashes=_part(self.old_hashes, ck),
+                    cur_hashes=_part(self.cur_hashes, ck),
+                    old_field_hashes=_part(old_field_hashes, ck),
+                    cur_field_hashes=_part(cur_field_hashes, ck),
+                    items=persons if cd is PersonDiffer else None
                     ) if cd else None
 
 
@@ -420,7 +522,7 @@ class SearchDiffer(JsonDiffer):
                         )
         ui_url_params = u"&mark_id=".join(['']+mark_ids) # start with &mark_id=
         if not '?' in url:
-            ui_url_params[0] = '?'
+            ui_url_params = '?'+ui_url_params[1:]
 
         if not new_msg and not changed_msg:
             return None
@@ -430,7 +532,7 @@ class SearchDiffer(JsonDiffer):
                     'messages': [x for x in [new_msg,changed_msg] if x!=None],
                 }
         c = Context(changes)
-        snippet = loader.get_template(self.SNIPPET_TEMPLATE_FILE).render(c, None)
+        snippet = _get_template(self.SNIPPET_TEMPLATE_FILE).render(c, None)
 
         if not snippet:
             return None
@@ -447,18 +549,20 @@ CATEGORY_DIFFERS = {
     'search_persons': SearchDiffer,
 }
 
-def check_subscriptions():
-
-    emails_to_changesets = {}
-    change_snippets = {}
-
-    for content in SubscribedContent.objects.all():
-        diff_class = CATEGORY_DIFFERS[content.category]
-        differ = diff_class(content)
-        if not differ.has_changes or not differ.collect_changesets():
-            logger.info(u"No changes for {}".format(content.title))
-            continue
-
+def check_content(content, cur_content=None):
+    """
+    Diffs a SubscribedContent's current results against its archived ones
+    and resets its hashes. Returns the change snippet and category, or None
+    if there are no (tracked) changes.
+
+    If the current results are passed in, they must be archived already.
+    """
+    diff_class = CATEGORY_DIFFERS[content.category]
+    differ = diff_class(content, cur_content=cur_content)
+    result = None
+    if not differ.has_changes or not differ.collect_changesets():
+        logger.info(u"No changes for {}".format(content.title))
+    else:
         if settings.DEBUG_SUBSCRIPTIONS:
             differ.print_changesets()
 
@@ -478,40 +582,137 @@ def check_subscriptions():
         snippet = differ.render_snippets()
         if snippet is None:
             logger.info(u"Only untracked changes for {}".format(content.title))
-            continue
-
-        category = 'search' if 'search' in content.category else content.category
-
-        change_snippets[content.id] = {
-            'snippet': snippet,
-            'category': category
-        }
+        else:
+            result = {
+                'snippet': snippet,
+                'category': 'search' if 'search' in content.category else content.category
+            }
+
+    # Reset the content hashes, reusing the results we just diffed
+    if not settings.DEBUG_SUBSCRIPTIONS:
+        content.reset_content_hashes(
+            differ.cur_content, store=cur_content is None)
+    return result
+
+
+def _search_key(content):
+    try:
+        return search_key(content.url)
+    except Exception:
+        # not a search view's url, can't be normalized
+        return content.url
+
+
+def _check_contents_task(contents):
+    """
+    Runs in a worker thread: checks SubscribedContent items with the same
+    search, which is run and archived once for all of them. Returns the
+    content, the result and the error, if any, for each item.
+    """
+    try:
+        cur_content = contents[0].get_content()
+        if cur_content is None:
+            error = ValueError(u"Search failed: {}".format(contents[0].url))
+            return [(content, None, error) for content in contents]
+        if not settings.DEBUG_SUBSCRIPTIONS:
+            contents[0].store_latest_content(cur_content)
+
+        results = []
+        for content in contents:
+            try:
+                results.append(
+                    (content, check_content(content, cur_content), None))
+            except Exception, e:
+                logger.exception(u"Error checking {}".format(content))
+                results.append((content, None, e))
+        return results
+    except Exception, e:
+        logger.exception(u"Error checking {}".format(contents[0].url))
+        return [(content, None, e) for content in contents]
+    finally:
+        if threading.current_thread().name != 'MainThread':
+            connection.close()
+
+
+def check_subscriptions(workers=1, progress_every=100):
+    """
+    Checks all SubscribedContent items for changes, with up to workers of
+    them (and thus, their searches) at a time, and sends one email per
+    subscriber with all changes of their subscriptions
+    """
+    emails_to_changesets = {}
+    change_snippets = {}
 
-        # Collect all the users we need to contact for this changeset/content
-        emails = [sub.user.email for sub in content.subscriptions.all()]
+    contents = list(SubscribedContent.objects.prefetch_related(
+        'subscriptions__user'))
+    total = len(contents)
 
-        for email in emails:
-            if email not in emails_to_changesets:
-                emails_to_changesets[email] = []
-            emails_to_changesets[email].append(content.id)
+    # identical searches are run once
+    searches = collections.OrderedDict()
+    for content in contents:
+        searches.setdefault(_search_key(content), []).append(content)
+    logger.info(
+        u"Checking {} subscriptions ({} distinct searches) with {} "
+        u"workers".format(total, len(searches), workers))
 
-    # Reset the content hashes for all SubscribedContent items we just
-    # processed
     if settings.DEBUG_SUBSCRIPTIONS:
         print 'skipping content has reset, because settings.DEBUG_SUBSCRIPTIONS'
+
+    pool = ThreadPool(workers) if workers > 1 else None
+    if pool:
+        results = pool.imap_unordered(
+            _check_contents_task, searches.values())
     else:
-        for content in SubscribedContent.objects.all():
-            content.reset_content_hashes()
+        results = itertools.imap(_check_contents_task, searches.values())
+
+    started = time.time()
+    failed = 0
+    try:
+        for done, (content, result, error) in enumerate(
+                itertools.chain.from_iterable(results), 1):
+            if error is not None:
+                failed += 1
+            elif result is not None:
+                change_snippets[content.id] = result
+
+                # Collect all the users we need to contact for this
+                # changeset/content
+                for sub in content.subscriptions.all():
+                    emails_to_changesets.setdefault(
+                        sub.user.email, []).append(content.id)
+
+            if done % progress_every == 0 or done == total:
+                elapsed = time.time() - started
+                logger.info(
+                    u"Checked {} of {} subscriptions ({} changed, {} failed) "
+                    u"in {:.0f}s, {:.1f}/s".format(
+                        done, total, len(change_snippets), failed, elapsed,
+                        done / max(elapsed, 0.001)))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    # archived results are shared, delete the ones no longer referred to
+    if not settings.DEBUG_SUBSCRIPTIONS:
+        SubscribedContent.clean_archive()
 
     process_emails(emails_to_changesets, change_snippets)
 
 def process_emails(emails_to_changesets, change_snippets):
-
+    """
+    Sends the subscribers their emails; subscribers with the same
+    subscriptions' changes get the same email, which is rendered once
+    """
     logger.info(
         u"Preparing to send {} emails".format(len(emails_to_changesets)))
-    for email in emails_to_changesets.keys():
-        logger.info(u"Sending email to {}".format(email))
 
+    groups = collections.OrderedDict()
+    for email, content_ids in emails_to_changesets.items():
+        groups.setdefault(frozenset(content_ids), []).append(email)
+
+    email_groups = []
+    for content_ids, emails in groups.items():
         # changed_content
         changed_items = {
             'person': [],
@@ -520,15 +721,14 @@ def process_emails(emails_to_changesets, change_snippets):
             'inquiry': [],
         }
 
-        for content_id in set(emails_to_changesets[email]):
+        for content_id in sorted(content_ids):
             snippets = change_snippets[content_id]
             snippet = snippets['snippet']
             category = snippets['category']
             changed_items[category].append(snippet)
 
-        template_parameters = {'changes': changed_items}
-        email_sent = EMAIL.SUBSCRIPTION_CHANGES.send(
-            email, template_parameters)
-        if email_sent:
-            logger.info(u"Email sent to {}: {}".format(email, email_sent))
-            # logger.info(u"Email sent to {}".format(email))
+        email_groups.append((emails, {'changes': changed_items}))
+
+    sent = EMAIL.SUBSCRIPTION_CHANGES.send_bulk(email_groups)
+    logger.info(u"Sent {} of {} emails ({} distinct)".format(
+        sent, len(emails_to_changesets), len(email_groups)))
@@ -1,11 +1,14 @@
 from __future__ import absolute_import
 
 from celery import shared_task
+from django.conf import settings
 from django.db import transaction
 from haystack.management.commands import update_index
 from scrapy.crawler import CrawlerProcess
 
-from op_scraper.subscriptions import check_subscriptions
+from op_scraper import subscriptions
+from op_scraper.index_queue import process_index_queue
+from op_scraper.index_queue import bump_index_generation
 
 
 DEFAULT_CRAWLER_OPTIONS = {
@@ -28,11 +31,18 @@ def scrape(spider, **kwargs):
 @shared_task
 def update_elastic():
     update_index.Command().handle()
+    bump_index_generation()
+    return
+
+
+@shared_task
+def update_elastic_queue():
+    process_index_queue()
     return
 
 
 @shared_task
 def check_subscriptions():
     print "Checking subscriptions"
-    check_subscriptions()
+    subscriptions.check_subscriptions(workers=settings.SUBSCRIPTION_WORKERS)
     return
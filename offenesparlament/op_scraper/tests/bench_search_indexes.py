@@ -0,0 +1,174 @@
+# -*- coding: UTF-8 -*-
+"""
+Benchmarks for preparing search index documents, on generated data in the
+test database. Not part of the regular test suite; run explicitly with:
+
+    python manage.py test op_scraper.tests.bench_search_indexes
+"""
+import re
+import json
+import time
+import datetime
+
+from op_scraper.models import *
+from op_scraper.search_indexes import PersonIndex, LawIndex
+
+from django.test import TestCase
+from django.utils import timezone
+
+
+def statements_json_per_statement(person):
+    """
+    The former Person.statements_json, matching debate statements with
+    queries per statement; kept for comparison
+    """
+    statements = []
+    for st in person.statements.all():
+        statement = st._json()
+        if st.protocol_url and person.debate_statements.count():
+            try:
+                page_number = int(
+                    re.match('^.*SEITE_(\d+).*$', st.protocol_url).group(1))
+                dsq = person.debate_statements\
+                    .filter(page_start=page_number)\
+                    .filter(date__year=st.step.date.year)\
+                    .filter(date__month=st.step.date.month)\
+                    .filter(date__day=st.step.date.day)
+                if dsq.count() >= 1:
+                    statement['debate_statement'] = [
+                        ds.id for ds in dsq.all()]
+            except:
+                pass
+        statements.append(statement)
+    return json.dumps(statements)
+
+
+class PersonStatementsBenchmark(TestCase):
+
+    # an active MP: statements on DEBATES sessions, with one debate
+    # statement on every page they spoke on
+    DEBATES = 200
+    STATEMENTS_PER_DEBATE = 10
+
+    def setUp(self):
+        llp = LegislativePeriod.objects.create(
+            number=25, roman_numeral='XXV',
+            start_date=datetime.date(2013, 10, 29))
+        phase = Phase.objects.create(title='Plenarberatung')
+        law = Law.objects.create(
+            title='Bench', parl_id='(I 1)', legislative_period=llp,
+            _slug='/gesetze/XXV/I_1')
+        self.person = Person.objects.create(
+            parl_id='PAD_BENCH', full_name='Bench Person',
+            reversed_name='Person, Bench', _slug='/personen/PAD_BENCH')
+
+        start = datetime.datetime(2014, 1, 1, 9, tzinfo=timezone.utc)
+        debate_statements = []
+        statements = []
+        for nr in range(self.DEBATES):
+            date = start + datetime.timedelta(days=nr)
+            debate = Debate.objects.create(
+                date=date, title='{}. Sitzung'.format(nr), debate_type='NR',
+                nr=nr, llp=llp)
+            step = Step.objects.create(
+                title='{}. Sitzung des Nationalrates'.format(nr),
+                sortkey='{:03}'.format(nr % 1000), date=date.date(),
+                phase=phase, law=law)
+            for page in range(1, self.STATEMENTS_PER_DEBATE + 1):
+                debate_statements.append(DebateStatement(
+                    date=date, debate=debate, person=self.person,
+                    index=page, doc_section='sec', page_start=page * 2,
+                    page_end=page * 2 + 1))
+                statements.append(Statement(
+                    speech_type='Redner', person=self.person, step=step,
+                    index=page,
+                    protocol_url='/PAKT/VHG/XXV/NRSITZ/NRSITZ_{:05}/'
+                                 'SEITE_{:04}.html'.format(nr, page * 2)))
+        DebateStatement.objects.bulk_create(debate_statements)
+        Statement.objects.bulk_create(statements)
+
+    def _time(self, func):
+        started = time.time()
+        result = func()
+        return result, time.time() - started
+
+    def test_statements_json(self):
+        # as prepared during indexing
+        person = PersonIndex().index_queryset().get(pk=self.person.pk)
+        old, old_time = self._time(
+            lambda: statements_json_per_statement(person))
+        new, new_time = self._time(person.statements_json)
+        self.assertEqual(json.loads(new), json.loads(old))
+
+        count = self.DEBATES * self.STATEMENTS_PER_DEBATE
+        print u"\nstatements_json, {} statements: {:.2f}s per statement " \
+            u"queries, {:.2f}s with the page index".format(
+                count, old_time, new_time)
+
+
+class LawIndexBenchmark(TestCase):
+
+    # prelaws with many Stellungnahmen, each with documents and keywords
+    LAWS = 20
+    OPINIONS_PER_LAW = 300
+    STEPS_PER_LAW = 20
+    BATCH_SIZE = 50
+
+    def setUp(self):
+        llp = LegislativePeriod.objects.create(
+            number=25, roman_numeral='XXV',
+            start_date=datetime.date(2013, 10, 29))
+        category = Category.objects.create(title='Ministerialentwurf')
+        phases = [Phase.objects.create(title=title)
+                  for title in ('Begutachtung', 'Ausschuss', 'Plenum')]
+        keywords = [Keyword.objects.create(title='Keyword {}'.format(i))
+                    for i in range(10)]
+        entities = [Entity.objects.create(
+            title='Entity {}'.format(i), title_detail='') for i in range(50)]
+        documents = [Document.objects.create(
+            title='Stellungnahme {}'.format(i),
+            pdf_link='https://www.parlament.gv.at/{}.pdf'.format(i))
+            for i in range(20)]
+
+        for nr in range(self.LAWS):
+            law = Law.objects.create(
+                title='Entwurf {}'.format(nr), parl_id='({}/ME)'.format(nr),
+                legislative_period=llp, category=category,
+                _slug='/gesetze/XXV/ME_{}'.format(nr))
+            law.keywords.add(*keywords[:3])
+            law.documents.add(*documents[:2])
+            Step.objects.bulk_create([
+                Step(title='Schritt {}'.format(i), sortkey='{:03}'.format(i),
+                     date=datetime.date(2014, 1, 1), phase=phases[i % 3],
+                     law=law)
+                for i in range(self.STEPS_PER_LAW)])
+            for i in range(self.OPINIONS_PER_LAW):
+                opinion = Opinion.objects.create(
+                    parl_id='({}/SN-{}/ME)'.format(i, nr),
+                    date=datetime.date(2014, 1, 1), prelaw=law,
+                    entity=entities[i % len(entities)])
+                opinion.documents.add(documents[i % len(documents)])
+                opinion.keywords.add(*keywords[i % 5:i % 5 + 2])
+
+    def _prepare(self, index, queryset):
+        """
+        Prepares all documents in batches, like update_index does
+        """
+        started = time.time()
+        documents = []
+        total = queryset.count()
+        for start in range(0, total, self.BATCH_SIZE):
+            for law in queryset[start:start + self.BATCH_SIZE]:
+                documents.append(index.full_prepare(law))
+        return documents, total / (time.time() - started)
+
+    def test_law_index(self):
+        index = LawIndex()
+        old, old_rate = self._prepare(index, Law.objects.order_by('pk'))
+        new, new_rate = self._prepare(
+            index, index.index_queryset().order_by('pk'))
+        self.assertEqual(new, old)
+
+        print u"\nLawIndex, {} laws with {} opinions each: {:.1f} laws/s " \
+            u"unprefetched, {:.1f} laws/s from index_queryset".format(
+                self.LAWS, self.OPINIONS_PER_LAW, old_rate, new_rate)
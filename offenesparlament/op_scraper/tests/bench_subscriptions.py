@@ -0,0 +1,59 @@
+# -*- coding: UTF-8 -*-
+"""
+Benchmarks for diffing subscription content, on generated data. Not part of
+the regular test suite; run explicitly with:
+
+    python manage.py test op_scraper.tests.bench_subscriptions
+"""
+import time
+
+from op_scraper.subscriptions import JsonDiffer
+from op_scraper.tests.test_subscriptions_differ import \
+    diff_arrays_by_membership
+
+from django.test import SimpleTestCase
+
+
+class DiffArraysBenchmark(SimpleTestCase):
+
+    # debate statements of a long-serving MP, some of them changed, some
+    # deleted and some added since the last check
+    ENTRIES = 3000
+    CHANGED = 100
+    DELETED = 50
+    ADDED = 50
+
+    def _entry(self, pk, title):
+        return {
+            'pk': pk,
+            'id': pk,
+            'text_type': 'reg',
+            'datetime': '2015-03-01T09:{:02}:00'.format(pk % 60),
+            'debate_title': title,
+            'debate_type': 'NR',
+            'debate_llp': 'XXV',
+        }
+
+    def _time(self, func):
+        started = time.time()
+        result = func()
+        return result, time.time() - started
+
+    def test_diff_arrays(self):
+        old = [self._entry(pk, u'{}. Sitzung'.format(pk))
+               for pk in range(self.ENTRIES)]
+        new = [dict(e) for e in old[self.DELETED:]]
+        for e in new[:self.CHANGED]:
+            e['debate_title'] += u' (korrigiert)'
+        new.extend(self._entry(pk, u'neu')
+                   for pk in range(self.ENTRIES, self.ENTRIES + self.ADDED))
+
+        before, before_time = self._time(
+            lambda: diff_arrays_by_membership(old, new))
+        after, after_time = self._time(
+            lambda: JsonDiffer.diff_arrays(old, new))
+        self.assertEqual(after, before)
+        self.assertEqual(len(after['C']), self.CHANGED)
+
+        print u"\ndiff_arrays, {} entries: {:.2f}s with list membership, " \
+            u"{:.3f}s keyed".format(self.ENTRIES, before_time, after_time)
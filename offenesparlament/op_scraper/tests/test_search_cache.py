@@ -0,0 +1,88 @@
+# -*- coding: UTF-8 -*-
+import json
+
+from op_scraper.index_queue import bump_index_generation
+from offenesparlament.views import search
+
+from django.test import TestCase, SimpleTestCase, RequestFactory
+from django.test.utils import override_settings
+
+
+class CountingSearchView(search.PersonSearchView):
+
+    """
+    Counts its searches instead of running them
+    """
+    searches = 0
+
+    def search(self, query_args, with_stats=True):
+        CountingSearchView.searches += 1
+        return {'result': [], 'stats': {}, 'query_args': query_args}
+
+
+class LocalSearchCacheTestCase(SimpleTestCase):
+
+    def test_lru(self):
+        cache = search.LocalSearchCache(2)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 60)
+        self.assertEqual(cache.get('a'), 1)
+        # b is the least recently used entry now
+        cache.set('c', 3, 60)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_timeout(self):
+        cache = search.LocalSearchCache(2)
+        cache.set('a', 1, -1)
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(len(cache), 0)
+
+
+@override_settings(SEARCH_CACHE='local', SEARCH_CACHE_SIZE=10,
+                   SEARCH_CACHE_TIMEOUT=60)
+class SearchCacheTestCase(TestCase):
+
+    def setUp(self):
+        search._search_caches.clear()
+        CountingSearchView.searches = 0
+        self.factory = RequestFactory()
+
+    def _get(self, query_string):
+        request = self.factory.get('/personen/search?' + query_string)
+        return CountingSearchView.as_view()(request)
+
+    def test_cached_responses(self):
+        first = self._get('q=Wien++Bildung&party=SP%C3%96&limit=10')
+        self.assertEqual(first['X-Search-Cache'], 'miss')
+
+        # the same query arguments, differently ordered and spaced
+        second = self._get('limit=10&party=SP%C3%96&q=Wien%20Bildung&x=1')
+        self.assertEqual(second['X-Search-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(CountingSearchView.searches, 1)
+
+        self.assertEqual(self._get('q=Wien&limit=10')['X-Search-Cache'], 'miss')
+        self.assertEqual(CountingSearchView.searches, 2)
+
+        stats = search.get_search_cache().stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_index_update(self):
+        """
+        Responses are cached until the next index update
+        """
+        self._get('q=Wien')
+        bump_index_generation()
+        self.assertEqual(self._get('q=Wien')['X-Search-Cache'], 'miss')
+        self.assertEqual(self._get('q=Wien')['X-Search-Cache'], 'hit')
+        self.assertEqual(CountingSearchView.searches, 2)
+
+    @override_settings(SEARCH_CACHE=None)
+    def test_disabled(self):
+        self._get('q=Wien')
+        response = self._get('q=Wien')
+        self.assertNotIn('X-Search-Cache', response)
+        self.assertEqual(CountingSearchView.searches, 2)
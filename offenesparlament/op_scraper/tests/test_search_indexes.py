@@ -0,0 +1,203 @@
+# -*- coding: UTF-8 -*-
+import logging
+import datetime
+
+from op_scraper.models import *
+from op_scraper.search_indexes import PersonIndex, LawIndex
+from op_scraper import index_queue
+
+from django.test import TestCase
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class PersonIndexTestCase(TestCase):
+
+    fixtures = ['categories', 'llps', 'persons', 'laws', 'debates']
+
+    def setUp(self):
+        self.index = PersonIndex()
+        # generate slugs up front, they're saved on first access
+        for person in Person.objects.all():
+            person.slug
+        for law in Law.objects.all():
+            law.slug
+
+    def test_prefetched_documents(self):
+        """
+        Documents prepared from the prefetching index_queryset equal those
+        prepared from plain Person objects
+        """
+        expected = [self.index.full_prepare(person)
+                    for person in Person.objects.order_by('pk')]
+        prepared = [self.index.full_prepare(person)
+                    for person in self.index.index_queryset().order_by('pk')]
+        self.assertEqual(prepared, expected)
+
+    def test_prefetched_queries(self):
+        """
+        The relations of all persons are fetched in one batch
+        """
+        persons = list(self.index.index_queryset().order_by('pk')[:20])
+        with self.assertNumQueries(0):
+            for person in persons:
+                person.mandates_json()
+                person.debate_statements_json()
+                person.inquiries_sent_json()
+                person.inquiries_received_json()
+                person.inquiries_answered_json()
+                person.llps_facet
+                self.index.prepare_comittee_memberships(person)
+
+
+class LawIndexTestCase(TestCase):
+
+    fixtures = ['categories', 'llps', 'persons', 'laws', 'debates']
+
+    def setUp(self):
+        self.index = LawIndex()
+        for law in Law.objects.all():
+            law.slug
+
+    def test_prefetched_documents(self):
+        """
+        Documents prepared from the prefetching index_queryset equal those
+        prepared from plain Law objects
+        """
+        expected = [self.index.full_prepare(law)
+                    for law in Law.objects.order_by('pk')]
+        prepared = [self.index.full_prepare(law)
+                    for law in self.index.index_queryset().order_by('pk')]
+        self.assertEqual(prepared, expected)
+
+    def test_prefetched_queries(self):
+        """
+        The relations of all laws are fetched in one batch
+        """
+        laws = list(self.index.index_queryset().order_by('pk')[:20])
+        with self.assertNumQueries(0):
+            for law in laws:
+                law.steps_and_phases_json()
+                law.opinions_json()
+                law.documents_json()
+                law.keyword_titles
+                self.index.prepare_response_id(law)
+
+
+
+class IndexQueueTestCase(TestCase):
+
+    def setUp(self):
+        llp = LegislativePeriod.objects.create(
+            number=25, roman_numeral='XXV',
+            start_date=datetime.date(2013, 10, 29))
+        self.law = Law.objects.create(
+            title='Law', parl_id='(I 1)', legislative_period=llp)
+        self.person = Person.objects.create(
+            parl_id='PAD_1', full_name='Person', reversed_name='Person')
+        self.debate = Debate.objects.create(
+            date=timezone.now(), title='1. Sitzung', debate_type='NR',
+            nr=1, llp=llp)
+
+    def test_index_targets(self):
+        """
+        Changed objects queue the indexed objects depending on them
+        """
+        step = Step.objects.create(
+            title='Step', sortkey='001', date=datetime.date(2014, 1, 1),
+            phase=Phase.objects.create(title='Phase'), law=self.law)
+        self.assertEqual(
+            index_queue.index_targets(step),
+            set([(index_queue.LAW, self.law.pk)]))
+
+        statement = DebateStatement.objects.create(
+            date=timezone.now(), debate=self.debate, person=self.person,
+            index=1, doc_section='sec')
+        self.assertEqual(
+            index_queue.index_targets(statement),
+            set([(index_queue.PERSON, self.person.pk),
+                 (index_queue.DEBATE_STATEMENT, statement.pk)]))
+        self.assertEqual(
+            index_queue.index_targets(self.debate),
+            set([(index_queue.DEBATE, self.debate.pk),
+                 (index_queue.DEBATE_STATEMENT, statement.pk)]))
+
+    def test_new_debate_statements(self):
+        """
+        Storing new debate statements queues their debate, the statements
+        and their speakers
+        """
+        from op_scraper.scraper.parlament.pipelines import \
+            DebateStatementPipeline
+
+        class Spider(object):
+            logger = logging.getLogger(__name__)
+            dirty = set()
+
+            def mark_dirty(self, *objs):
+                for obj in objs:
+                    self.dirty.update(index_queue.index_targets(obj))
+
+        spider = Spider()
+        created, updated = DebateStatementPipeline().store_statements(
+            self.debate, [
+                {'doc_section': 'sec1', 'index': 1, 'speaker_id': 'PAD_1'},
+                {'doc_section': 'sec2', 'index': 2, 'speaker_id': None},
+            ], spider)
+        self.assertEqual((created, updated), (2, 0))
+        self.assertEqual(spider.dirty, set(
+            [(index_queue.DEBATE, self.debate.pk),
+             (index_queue.PERSON, self.person.pk)] +
+            [(index_queue.DEBATE_STATEMENT, pk) for pk in
+             self.debate.debate_statements.values_list('pk', flat=True)]))
+
+    def test_mark_dirty(self):
+        """
+        Objects are queued once, marking them again updates the timestamp
+        """
+        index_queue.mark_dirty([(index_queue.PERSON, self.person.pk)])
+        marked = DirtyObject.objects.get().marked
+        index_queue.mark_dirty([(index_queue.PERSON, self.person.pk)])
+        self.assertEqual(DirtyObject.objects.count(), 1)
+        self.assertGreaterEqual(DirtyObject.objects.get().marked, marked)
+
+    def test_queue_concurrently(self):
+        """
+        Entries another process queued in the meantime are marked again
+        instead of failing on the unique constraint
+        """
+        queued = DirtyObject.objects.create(
+            model=index_queue.PERSON, object_pk=self.person.pk,
+            marked=timezone.now() - datetime.timedelta(days=1))
+        now = timezone.now()
+        index_queue._queue(index_queue.PERSON, self.person.pk, now)
+        self.assertEqual(DirtyObject.objects.get(pk=queued.pk).marked, now)
+
+    def test_index_generation(self):
+        """
+        Every index update bumps the generation
+        """
+        self.assertEqual(index_queue.index_generation(), 0)
+        index_queue.bump_index_generation()
+        index_queue.bump_index_generation()
+        self.assertEqual(index_queue.index_generation(), 2)
+        self.assertEqual(IndexGeneration.objects.count(), 1)
+
+    def test_index_generation_updated(self):
+        """
+        Bumping the generation records the time of the update
+        """
+        index_queue.bump_index_generation()
+        IndexGeneration.objects.update(
+            updated=timezone.now() - datetime.timedelta(hours=1))
+        before = timezone.now()
+        index_queue.bump_index_generation()
+        self.assertGreaterEqual(IndexGeneration.objects.get().updated, before)
+
+    def test_update_index_command(self):
+        """
+        Haystack's update_index bumps the generation, too
+        """
+        call_command(
+            'update_index', 'op_scraper.person', using=['default'], verbosity=0)
+        self.assertEqual(index_queue.index_generation(), 1)
@@ -0,0 +1,233 @@
+# -*- coding: UTF-8 -*-
+import json
+import random
+
+from op_scraper.models import SubscribedContent, Person, Party, Mandate
+from op_scraper.models import Function
+from op_scraper.subscriptions import JsonDiffer, SearchDiffer
+
+from django.test import SimpleTestCase, TestCase
+
+
+def diff_arrays_by_membership(arr1, arr2):
+    """
+    The former JsonDiffer.diff_arrays, based on list membership; kept as the
+    reference for the keyed implementation. Unlike the original, the last
+    loop iterates over a copy of del_entries, the original skipped the entry
+    after each one it removed.
+    """
+    del_entries = [e for e in arr1 if e not in arr2]
+    new_entries = [e for e in arr2 if e not in arr1]
+
+    try:
+        changed_entries = [e for e in new_entries if 'pk' in e and e['pk'] in [e2['pk'] for e2 in del_entries if 'pk' in e2]]
+    except:
+        changed_entries = []
+
+    new_entries = [e for e in new_entries if e not in changed_entries]
+
+    for e in list(del_entries):
+        if e in changed_entries:
+            del_entries.remove(e)
+        try:
+            changed_pks = [e2['pk'] for e2 in changed_entries if 'pk' in e2]
+            if changed_pks and 'pk' in e and e['pk'] in changed_pks:
+                del_entries.remove(e)
+        except:
+            pass
+
+    return {'D': del_entries,
+            'N': new_entries,
+            'C': changed_entries}
+
+
+def random_entry(rnd):
+    """
+    A json list entry like the ones in the search results: mostly dicts with
+    a pk, some without one
+    """
+    entry = {
+        'title': rnd.choice([u'Erste Lesung', u'Ausschuss', u'Plenum']),
+        'date': rnd.choice([None, u'2017-01-01', u'2017-02-01']),
+        'pages': [rnd.randint(1, 3) for _ in range(rnd.randint(0, 2))],
+    }
+    if rnd.random() < 0.8:
+        entry['pk'] = rnd.randint(1, 15)
+    return entry
+
+
+def mutate(rnd, arr):
+    """
+    Deletes, adds, changes and reorders some entries of arr
+    """
+    arr = [dict(e) for e in arr if rnd.random() > 0.2]
+    for e in arr:
+        if rnd.random() < 0.3:
+            e['title'] = rnd.choice([u'Erste Lesung', u'Ausschuss', u'Plenum'])
+    arr.extend(random_entry(rnd) for _ in range(rnd.randint(0, 4)))
+    if rnd.random() < 0.3 and arr:
+        # duplicates
+        arr.append(dict(rnd.choice(arr)))
+    rnd.shuffle(arr)
+    return arr
+
+
+class DiffArraysTestCase(SimpleTestCase):
+
+    RUNS = 500
+
+    def test_same_as_membership_diff(self):
+        """
+        The keyed diff returns the same deleted, new and changed entries as
+        the membership-based one, for random lists of entries
+        """
+        rnd = random.Random(1)
+        for run in range(self.RUNS):
+            arr1 = [random_entry(rnd) for _ in range(rnd.randint(0, 12))]
+            arr2 = mutate(rnd, arr1)
+            self.assertEqual(
+                JsonDiffer.diff_arrays(arr1, arr2),
+                diff_arrays_by_membership(arr1, arr2),
+                u"run {}: {} / {}".format(run, arr1, arr2))
+
+    def test_scalar_entries(self):
+        """
+        Lists of strings (keywords, llps) are diffed without changes
+        """
+        rnd = random.Random(2)
+        words = [u'Budget', u'Bildung', u'Umwelt', u'Verkehr', u'Sport']
+        for run in range(self.RUNS):
+            arr1 = rnd.sample(words, rnd.randint(0, len(words)))
+            arr2 = rnd.sample(words, rnd.randint(0, len(words)))
+            self.assertEqual(
+                JsonDiffer.diff_arrays(arr1, arr2),
+                diff_arrays_by_membership(arr1, arr2))
+
+    def test_changed_entries(self):
+        old = [{'pk': 1, 'title': u'a'}, {'pk': 2, 'title': u'b'},
+               {'title': u'no pk'}]
+        new = [{'pk': 1, 'title': u'A'}, {'pk': 2, 'title': u'B'},
+               {'pk': 3, 'title': u'c'}, {'title': u'other'}]
+        self.assertEqual(JsonDiffer.diff_arrays(old, new), {
+            'D': [{'title': u'no pk'}],
+            'N': [{'pk': 3, 'title': u'c'}, {'title': u'other'}],
+            'C': [{'pk': 1, 'title': u'A'}, {'pk': 2, 'title': u'B'}],
+        })
+
+
+class FieldHashesTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.old = {
+            'parl_id': u'(I 1)',
+            'title': u'Gesetz',
+            'steps': json.dumps([{'pk': 1, 'title': u'Erste Lesung'}]),
+            'keywords': json.dumps([u'Budget']),
+        }
+        self.new = dict(self.old,
+            steps=json.dumps([{'pk': 1, 'title': u'Ausschuss'}]))
+
+    def _differ(self, old, new, field_hashes=True):
+        content = SubscribedContent()
+        old_hashes, old_field_hashes = [
+            json.loads(h) for h in content.generate_hashes([self.old])]
+        cur_hashes, cur_field_hashes = [
+            json.loads(h) for h in content.generate_hashes([self.new])]
+        differ = JsonDiffer(
+            old_content=[old], cur_content=[new],
+            old_hashes=old_hashes, cur_hashes=cur_hashes,
+            old_field_hashes=old_field_hashes if field_hashes else None,
+            cur_field_hashes=cur_field_hashes if field_hashes else None)
+        differ.has_changes = True
+        return differ
+
+    def test_hashes(self):
+        content = SubscribedContent()
+        fields = content._hash_fields(self.old)
+        self.assertEqual(set(fields), set(self.old))
+        self.assertEqual(
+            content._hash_content(self.old),
+            content._hash_content(self.old, fields))
+        self.assertNotEqual(
+            content._hash_content(self.old), content._hash_content(self.new))
+        self.assertEqual(content._hash_fields(self.new)['keywords'],
+                         fields['keywords'])
+
+    def test_only_changed_fields(self):
+        """
+        Only the fields whose hashes changed are diffed, the others needn't
+        be archived at all
+        """
+        old = {'parl_id': self.old['parl_id'], 'steps': self.old['steps']}
+        changes = self._differ(old, self.new).collect_changesets()
+        self.assertEqual(changes, {u'(I 1)': {'steps': {
+            'D': [],
+            'N': [],
+            'C': [{'pk': 1, 'title': u'Ausschuss'}],
+        }}})
+
+    def test_without_field_hashes(self):
+        """
+        Results archived before fields were hashed are diffed in full
+        """
+        with_hashes = self._differ(self.old, self.new).collect_changesets()
+        without = self._differ(
+            self.old, self.new, field_hashes=False).collect_changesets()
+        self.assertEqual(with_hashes, without)
+
+
+class SearchDifferTestCase(TestCase):
+
+    PERSONS = 5
+
+    def setUp(self):
+        party = Party.objects.create(titles=[u'Partei'], short=u'PÖ')
+        function = Function.objects.create(title=u'Abgeordnete(r)')
+        self.old_content = []
+        self.cur_content = []
+        for i in range(self.PERSONS):
+            person = Person.objects.create(
+                parl_id=u'PAD_{}'.format(i), full_name=u'Person {}'.format(i),
+                reversed_name=u'{}, Person'.format(i))
+            person.latest_mandate = Mandate.objects.create(
+                person=person, function=function, party=party)
+            person.save()
+            item = {
+                'parl_id': person.parl_id,
+                'full_name': person.full_name,
+                'party': party.short,
+                'category': 'person',
+                'index_name': 'person',
+                'internal_link': u'/personen/{}'.format(person.parl_id),
+                'occupation': u'Beruf',
+            }
+            self.old_content.append(item)
+            # every other person changed their occupation
+            self.cur_content.append(
+                dict(item, occupation=u'Neuer Beruf {}'.format(i))
+                if i % 2 else item)
+
+    def test_render_snippets(self):
+        content = SubscribedContent(
+            title=u'Personen', ui_url=u'https://offenesparlament.at/suche')
+        old_hashes, old_field_hashes = [
+            json.loads(h) for h in content.generate_hashes(self.old_content)]
+        cur_hashes, cur_field_hashes = [
+            json.loads(h) for h in content.generate_hashes(self.cur_content)]
+        differ = SearchDiffer(
+            old_content=self.old_content, cur_content=self.cur_content,
+            old_hashes=old_hashes, cur_hashes=cur_hashes,
+            old_field_hashes=old_field_hashes,
+            cur_field_hashes=cur_field_hashes)
+        differ.content = content
+        differ.has_changes = True
+        self.assertEqual(
+            sorted(differ.collect_changesets()), [u'PAD_1', u'PAD_3'])
+
+        # the changed persons are fetched in one query
+        with self.assertNumQueries(1):
+            snippet = differ.render_snippets()
+        self.assertIn(u'Neuer Beruf 1', snippet)
+        self.assertIn(u'Neuer Beruf 3', snippet)
+        self.assertNotIn(u'Person 2', snippet)
+        self.assertEqual(snippet.count(u'party_tag poe'), 2)
@@ -0,0 +1,84 @@
+# -*- coding: UTF-8 -*-
+from op_scraper.models import User, Verification
+from op_scraper.subscriptions import process_emails
+from offenesparlament.constants import EMAIL
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+
+
+class FlakyEmailBackend(EmailBackend):
+    """
+    Fails sending every other message
+    """
+    attempts = 0
+
+    def send_messages(self, messages):
+        FlakyEmailBackend.attempts += 1
+        if FlakyEmailBackend.attempts % 2:
+            raise IOError('connection lost')
+        return super(FlakyEmailBackend, self).send_messages(messages)
+
+
+class ProcessEmailsTestCase(TestCase):
+
+    EMAILS = [u'a@example.com', u'b@example.com', u'c@example.com']
+
+    def setUp(self):
+        self.users = {}
+        for email in self.EMAILS:
+            verification = Verification.objects.create(verified=True)
+            self.users[email] = User.objects.create(
+                email=email, verification=verification)
+        self.change_snippets = {
+            1: {'snippet': u'<p>Person eins</p>', 'category': 'person'},
+            2: {'snippet': u'<p>Gesetz zwei</p>', 'category': 'law'},
+        }
+
+    def _link(self, email):
+        return reverse('subscriptions_login2', kwargs={
+            'email': email,
+            'key': self.users[email].verification.verification_hash})
+
+    def test_process_emails(self):
+        with self.assertNumQueries(1):
+            process_emails({
+                self.EMAILS[0]: [1, 2],
+                self.EMAILS[1]: [2, 1],
+                self.EMAILS[2]: [2],
+            }, self.change_snippets)
+
+        self.assertEqual(len(mail.outbox), 3)
+        for message in mail.outbox:
+            self.assertEqual(message.subject, EMAIL.SUBSCRIPTION_CHANGES.subject)
+            email = message.to[0]
+            html = message.alternatives[0][0]
+            # every subscriber gets their own link
+            self.assertIn(self._link(email), html)
+            self.assertIn(self._link(email), message.body)
+            self.assertNotIn(EMAIL.SUBSCRIPTION_CHANGES.LINK_PLACEHOLDER, html)
+            self.assertIn(u'Gesetz zwei', html)
+            self.assertEqual(u'Person eins' in html, email != self.EMAILS[2])
+
+    def test_unknown_recipient(self):
+        sent = EMAIL.SUBSCRIPTION_CHANGES.send_bulk(
+            [([u'unknown@example.com', self.EMAILS[0]], {'changes': {}})])
+        self.assertEqual(sent, 1)
+        self.assertEqual(mail.outbox[0].to, [self.EMAILS[0]])
+
+    def test_retries(self):
+        groups = [(self.EMAILS, {'changes': {}})]
+        sent = EMAIL.SUBSCRIPTION_CHANGES.send_bulk(
+            groups, batch_size=2, retries=1, retry_delay=0,
+            connection=FlakyEmailBackend())
+        self.assertEqual(sent, 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+        # without retries, every other email fails
+        del mail.outbox[:]
+        FlakyEmailBackend.attempts = 0
+        sent = EMAIL.SUBSCRIPTION_CHANGES.send_bulk(
+            groups, retries=0, retry_delay=0, connection=FlakyEmailBackend())
+        self.assertEqual(sent, 1)